@@ -221,6 +221,7 @@ CREATE TABLE `medicinestock` (
   PRIMARY KEY (`STOCKID`),
   KEY `BRANCHID` (`BRANCHID`),
   KEY `MEDICINEID` (`MEDICINEID`),
+  KEY `BRANCHID_MEDICINEID_EXPIRYDATE` (`BRANCHID`,`MEDICINEID`,`EXPIRYDATE`),
   CONSTRAINT `medicinestock_ibfk_1` FOREIGN KEY (`BRANCHID`) REFERENCES `branches` (`BRANCHID`),
   CONSTRAINT `medicinestock_ibfk_2` FOREIGN KEY (`MEDICINEID`) REFERENCES `medicines` (`MEDICINEID`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -232,7 +233,7 @@ CREATE TABLE `medicinestock` (
 
 LOCK TABLES `medicinestock` WRITE;
 /*!40000 ALTER TABLE `medicinestock` DISABLE KEYS */;
-INSERT INTO `medicinestock` VALUES (1,1,1,100,'2025-08-08');
+INSERT INTO `medicinestock` VALUES (1,1,1,100,'2025-08-08'),(2,1,1,500,'2030-12-31'),(3,1,2,500,'2030-12-31'),(4,1,3,500,'2030-12-31'),(5,1,4,500,'2030-12-31'),(6,2,1,500,'2030-12-31'),(7,2,2,500,'2030-12-31'),(8,2,3,500,'2030-12-31'),(9,2,4,500,'2030-12-31'),(10,3,1,500,'2030-12-31'),(11,3,2,500,'2030-12-31'),(12,3,3,500,'2030-12-31'),(13,3,4,500,'2030-12-31'),(14,4,1,500,'2030-12-31'),(15,4,2,500,'2030-12-31'),(16,4,3,500,'2030-12-31'),(17,4,4,500,'2030-12-31');
 /*!40000 ALTER TABLE `medicinestock` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -252,6 +253,7 @@ CREATE TABLE `onlineorders` (
   PRIMARY KEY (`ORDERID`),
   KEY `CUSTOMERID` (`CUSTOMERID`),
   KEY `SALEDETAILID` (`SALEDETAILID`),
+  KEY `ORDERDATE` (`ORDERDATE`),
   CONSTRAINT `onlineorders_ibfk_1` FOREIGN KEY (`CUSTOMERID`) REFERENCES `customers` (`CUSTOMERID`),
   CONSTRAINT `onlineorders_ibfk_2` FOREIGN KEY (`SALEDETAILID`) REFERENCES `salesdetails` (`SALEDETAILID`)
 ) ENGINE=InnoDB AUTO_INCREMENT=5 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -267,6 +269,80 @@ INSERT INTO `onlineorders` VALUES (1,191131,1,'2025-08-08 18:24:36','Uttor Badda
 /*!40000 ALTER TABLE `onlineorders` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `reorderlevels`
+--
+
+DROP TABLE IF EXISTS `reorderlevels`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `reorderlevels` (
+  `MEDICINEID` int NOT NULL,
+  `BRANCHID` int NOT NULL,
+  `REORDERLEVEL` int NOT NULL,
+  PRIMARY KEY (`MEDICINEID`,`BRANCHID`),
+  KEY `BRANCHID` (`BRANCHID`),
+  CONSTRAINT `reorderlevels_ibfk_1` FOREIGN KEY (`MEDICINEID`) REFERENCES `medicines` (`MEDICINEID`) ON DELETE CASCADE,
+  CONSTRAINT `reorderlevels_ibfk_2` FOREIGN KEY (`BRANCHID`) REFERENCES `branches` (`BRANCHID`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `salesdailyemployee`
+--
+
+DROP TABLE IF EXISTS `salesdailyemployee`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `salesdailyemployee` (
+  `SALEDATE` date NOT NULL,
+  `BRANCHID` int NOT NULL,
+  `EMPLOYEEID` int NOT NULL,
+  `PAYMENTMETHOD` varchar(100) NOT NULL,
+  `REVENUE` decimal(14,2) NOT NULL,
+  `LINECOUNT` int NOT NULL,
+  PRIMARY KEY (`SALEDATE`,`BRANCHID`,`EMPLOYEEID`,`PAYMENTMETHOD`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `salesdailyemployee`
+--
+
+LOCK TABLES `salesdailyemployee` WRITE;
+/*!40000 ALTER TABLE `salesdailyemployee` DISABLE KEYS */;
+INSERT INTO `salesdailyemployee` VALUES ('2025-08-08',1,153398,'COD',29.00,2),('2025-08-09',1,153398,'Bkash',24.00,1),('2025-08-09',1,153398,'COD',25.50,1);
+/*!40000 ALTER TABLE `salesdailyemployee` ENABLE KEYS */;
+UNLOCK TABLES;
+
+--
+-- Table structure for table `salesdailymedicine`
+--
+
+DROP TABLE IF EXISTS `salesdailymedicine`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `salesdailymedicine` (
+  `SALEDATE` date NOT NULL,
+  `BRANCHID` int NOT NULL,
+  `MEDICINEID` int NOT NULL,
+  `QUANTITY` int NOT NULL,
+  `REVENUE` decimal(14,2) NOT NULL,
+  `LINECOUNT` int NOT NULL,
+  PRIMARY KEY (`SALEDATE`,`BRANCHID`,`MEDICINEID`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `salesdailymedicine`
+--
+
+LOCK TABLES `salesdailymedicine` WRITE;
+/*!40000 ALTER TABLE `salesdailymedicine` DISABLE KEYS */;
+INSERT INTO `salesdailymedicine` VALUES ('2025-08-08',1,1,10,12.00,1),('2025-08-08',1,2,10,17.00,1),('2025-08-09',1,1,20,24.00,1),('2025-08-09',1,2,15,25.50,1);
+/*!40000 ALTER TABLE `salesdailymedicine` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `salesdetails`
 --
@@ -291,6 +367,8 @@ CREATE TABLE `salesdetails` (
   KEY `CUSTOMERID` (`CUSTOMERID`),
   KEY `EMPLOYEEID` (`EMPLOYEEID`),
   KEY `MEDICINEID` (`MEDICINEID`),
+  KEY `SALEDATE_SALEID` (`SALEDATE`,`SALEID`),
+  KEY `SALEID` (`SALEID`),
   CONSTRAINT `salesdetails_ibfk_1` FOREIGN KEY (`BRANCHID`) REFERENCES `branches` (`BRANCHID`),
   CONSTRAINT `salesdetails_ibfk_2` FOREIGN KEY (`CUSTOMERID`) REFERENCES `customers` (`CUSTOMERID`),
   CONSTRAINT `salesdetails_ibfk_3` FOREIGN KEY (`EMPLOYEEID`) REFERENCES `employees` (`EMPLOYEEID`),
@@ -308,6 +386,51 @@ INSERT INTO `salesdetails` VALUES (1,NULL,'2025-08-08',1,191131,153398,1.20,12.0
 /*!40000 ALTER TABLE `salesdetails` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `salesequence`
+--
+
+DROP TABLE IF EXISTS `salesequence`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `salesequence` (
+  `NAME` varchar(50) NOT NULL,
+  `NEXTVALUE` int NOT NULL,
+  PRIMARY KEY (`NAME`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `salesequence`
+--
+
+LOCK TABLES `salesequence` WRITE;
+/*!40000 ALTER TABLE `salesequence` DISABLE KEYS */;
+INSERT INTO `salesequence` VALUES ('SALEID',1);
+/*!40000 ALTER TABLE `salesequence` ENABLE KEYS */;
+UNLOCK TABLES;
+
+--
+-- Table structure for table `salessummary`
+--
+
+DROP TABLE IF EXISTS `salessummary`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `salessummary` (
+  `SALEID` int NOT NULL,
+  `SALEDATE` date NOT NULL,
+  `BRANCHID` int DEFAULT NULL,
+  `CUSTOMERID` int DEFAULT NULL,
+  `EMPLOYEEID` int DEFAULT NULL,
+  `PAYMENTMETHOD` varchar(100) DEFAULT NULL,
+  `LINECOUNT` int NOT NULL,
+  `GRANDTOTAL` decimal(12,2) NOT NULL,
+  PRIMARY KEY (`SALEID`),
+  KEY `SALEDATE_SALEID` (`SALEDATE`,`SALEID`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `shifts`
 --
@@ -0,0 +1,230 @@
+# Bulk, column-wise number crunching over sales history for the admin reports.
+# Rows are streamed out of MySQL in chunks straight into NumPy arrays and every
+# aggregate is an array operation over the whole history, never a Python loop
+# per sale line.
+import datetime
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+FETCH_CHUNK = 50000
+
+
+def read_columns(cursor, query, params, dtypes):
+    # Runs query on a plain (tuple) cursor and returns one array per selected
+    # column, built chunk by chunk so the result set never sits in memory as
+    # Python row tuples. NULLs must be filtered or coalesced in the query.
+    cursor.execute(query, params)
+    chunks = [[] for _ in dtypes]
+    while True:
+        rows = cursor.fetchmany(FETCH_CHUNK)
+        if not rows:
+            break
+        for i, column in enumerate(zip(*rows)):
+            chunks[i].append(np.array(column, dtype=dtypes[i]))
+    return [np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+            for parts, dtype in zip(chunks, dtypes)]
+
+
+def pair_keys(medicine_ids, branch_ids):
+    # Packs (MEDICINEID, BRANCHID) into one int64 so pairs can be grouped with
+    # a single np.unique.
+    return (medicine_ids.astype(np.int64) << 32) | branch_ids.astype(np.int64)
+
+
+# --- Reorder Planner ---
+# Demand is the moving average of units sold per day over the trailing
+# window_days; a pair is suggested for reorder when its unexpired stock will
+# not cover lead_days + cover_days of that demand.
+def compute_reorder_plan(sale_medicine, sale_branch, sale_quantity, stock_medicine, stock_branch, stock_quantity,
+                         window_days, lead_days, cover_days):
+    sale_keys = pair_keys(sale_medicine, sale_branch)
+    stock_keys = pair_keys(stock_medicine, stock_branch)
+    keys, inverse = np.unique(np.concatenate([sale_keys, stock_keys]), return_inverse=True)
+    sold = np.bincount(inverse[:len(sale_keys)], weights=sale_quantity, minlength=len(keys))
+    stock = np.bincount(inverse[len(sale_keys):], weights=stock_quantity, minlength=len(keys))
+    demand = sold / window_days
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(demand > 0, stock / demand, np.inf)
+    suggested = np.ceil(np.maximum(demand * (lead_days + cover_days) - stock, 0)).astype(np.int64)
+    return {
+        'MEDICINEID': keys >> 32,
+        'BRANCHID': keys & 0xFFFFFFFF,
+        'DAILYDEMAND': demand,
+        'STOCK': stock.astype(np.int64),
+        'DAYSOFCOVER': cover,
+        'SUGGESTED': suggested,
+    }
+
+
+def plan_reorders(conn, window_days, lead_days, cover_days, today=None):
+    # Returns the pairs that need ordering, least days of cover first, each
+    # with the medicine's supplier (lowest SUPPLIERID) when one is on file.
+    today = today or datetime.date.today()
+    cursor = conn.cursor()
+    try:
+        sale_medicine, sale_branch, sale_quantity = read_columns(cursor, """
+            SELECT MEDICINEID, BRANCHID, QUANTITY
+            FROM SALESDAILYMEDICINE
+            WHERE SALEDATE > %s AND SALEDATE <= %s AND MEDICINEID <> 0 AND BRANCHID <> 0
+        """, (today - datetime.timedelta(days=window_days), today), (np.int64, np.int64, np.float64))
+        stock_medicine, stock_branch, stock_quantity = read_columns(cursor, """
+            SELECT MEDICINEID, BRANCHID, QUANTITY
+            FROM MEDICINESTOCK
+            WHERE QUANTITY > 0 AND EXPIRYDATE >= %s AND MEDICINEID IS NOT NULL AND BRANCHID IS NOT NULL
+        """, (today,), (np.int64, np.int64, np.float64))
+        cursor.execute("SELECT SUPPLIERID, MEDICINEID, SUPPLIERNAME, CONTACT FROM SUPPLIERS ORDER BY SUPPLIERID DESC")
+        suppliers = {row[1]: row for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+    plan = compute_reorder_plan(sale_medicine, sale_branch, sale_quantity, stock_medicine, stock_branch, stock_quantity,
+                                window_days, lead_days, cover_days)
+    wanted = np.flatnonzero(plan['SUGGESTED'] > 0)
+    wanted = wanted[np.argsort(plan['DAYSOFCOVER'][wanted], kind='stable')]
+    columns = {name: values[wanted].tolist() for name, values in plan.items()}
+    rows = []
+    for i in range(len(wanted)):
+        row = {name: values[i] for name, values in columns.items()}
+        supplier = suppliers.get(row['MEDICINEID'])
+        row['SUPPLIERID'], row['SUPPLIERNAME'], row['CONTACT'] = (supplier[0], supplier[2], supplier[3]) if supplier else (None, None, None)
+        rows.append(row)
+    return rows
+
+
+# --- Sales Reports ---
+# Admin dashboard reports for a date range, read from the daily rollups
+# (SALESDAILYMEDICINE and SALESDAILYEMPLOYEE) rather than SALESDETAILS, so a
+# range costs one row per day and key instead of one per sale line. Rows are
+# loaded once per range as columns (payment methods arrive as small integer
+# codes via FIELD()) and every report is a bincount over IDs densified with
+# np.unique, since EMPLOYEEIDs run to seven digits.
+REPORTS = ('branch_revenue', 'daily_revenue', 'payment_revenue', 'top_medicines', 'employee_totals')
+
+
+def load_sales(conn, date_from, date_to):
+    cursor = conn.cursor()
+    try:
+        day, branch, medicine, quantity, lines, revenue = read_columns(cursor, """
+            SELECT DATEDIFF(SALEDATE, %s), BRANCHID, MEDICINEID, QUANTITY, LINECOUNT, REVENUE
+            FROM SALESDAILYMEDICINE
+            WHERE SALEDATE BETWEEN %s AND %s
+        """, (date_from, date_from, date_to), (np.int32, np.int32, np.int32, np.int64, np.int64, np.float64))
+        cursor.execute("""
+            SELECT DISTINCT PAYMENTMETHOD FROM SALESDAILYEMPLOYEE
+            WHERE SALEDATE BETWEEN %s AND %s AND PAYMENTMETHOD <> ''
+        """, (date_from, date_to))
+        methods = sorted(row[0] for row in cursor.fetchall())
+        payment_code = f"FIELD(PAYMENTMETHOD{', %s' * len(methods)})" if methods else "0"
+        employee, payment, employee_lines, employee_revenue = read_columns(cursor, f"""
+            SELECT EMPLOYEEID, {payment_code}, LINECOUNT, REVENUE
+            FROM SALESDAILYEMPLOYEE
+            WHERE SALEDATE BETWEEN %s AND %s
+        """, (*methods, date_from, date_to), (np.int32, np.int32, np.int64, np.float64))
+    finally:
+        cursor.close()
+    return {
+        'MEDICINE': {'DAY': day, 'BRANCHID': branch, 'MEDICINEID': medicine,
+                     'QUANTITY': quantity, 'LINES': lines, 'REVENUE': revenue},
+        'EMPLOYEE': {'EMPLOYEEID': employee, 'PAYMENT': payment,
+                     'LINES': employee_lines, 'REVENUE': employee_revenue},
+        'PAYMENTMETHODS': ['N/A'] + methods,
+        'DAYS': (date_to - date_from).days + 1,
+    }
+
+
+def group_totals(ids, *weights):
+    # Sums each weight per ID; returns the IDs present and one array of sums
+    # per weight. IDs are mapped to 0..n-1 first so the bincounts are sized by
+    # the IDs in the range, not by the largest ID.
+    keys, inverse = np.unique(ids, return_inverse=True)
+    sums = [np.bincount(inverse, weights=w, minlength=len(keys)) for w in weights]
+    present = np.flatnonzero(sums[0])
+    return keys[present], [total[present] for total in sums]
+
+
+def compute_report(columns, report, top_n=10):
+    medicine, employee = columns['MEDICINE'], columns['EMPLOYEE']
+    if report == 'branch_revenue':
+        ids, (lines, revenue) = group_totals(medicine['BRANCHID'], medicine['LINES'], medicine['REVENUE'])
+        order = np.argsort(-revenue, kind='stable')
+        return [{'BRANCHID': i, 'LINES': int(n), 'REVENUE': r}
+                for i, n, r in zip(ids[order].tolist(), lines[order].tolist(), revenue[order].tolist())]
+    if report == 'daily_revenue':
+        revenue = np.bincount(medicine['DAY'], weights=medicine['REVENUE'], minlength=columns['DAYS'])
+        return revenue.tolist()
+    if report == 'payment_revenue':
+        methods = columns['PAYMENTMETHODS']
+        revenue = np.bincount(employee['PAYMENT'], weights=employee['REVENUE'], minlength=len(methods))
+        lines = np.bincount(employee['PAYMENT'], weights=employee['LINES'], minlength=len(methods))
+        return [{'PAYMENTMETHOD': m, 'LINES': int(n), 'REVENUE': r}
+                for m, n, r in zip(methods, lines.tolist(), revenue.tolist()) if n]
+    if report == 'top_medicines':
+        ids, (lines, revenue, units) = group_totals(medicine['MEDICINEID'], medicine['LINES'], medicine['REVENUE'],
+                                                    medicine['QUANTITY'])
+        top = np.argpartition(-revenue, top_n - 1)[:top_n] if len(ids) > top_n else np.arange(len(ids))
+        top = top[np.argsort(-revenue[top], kind='stable')]
+        return [{'MEDICINEID': i, 'UNITS': int(u), 'REVENUE': r}
+                for i, u, r in zip(ids[top].tolist(), units[top].tolist(), revenue[top].tolist())]
+    if report == 'employee_totals':
+        ids, (lines, revenue) = group_totals(employee['EMPLOYEEID'], employee['LINES'], employee['REVENUE'])
+        order = np.argsort(-revenue, kind='stable')
+        return [{'EMPLOYEEID': i, 'LINES': int(n), 'REVENUE': r}
+                for i, n, r in zip(ids[order].tolist(), lines[order].tolist(), revenue[order].tolist())]
+    raise ValueError(f'Unknown report {report}')
+
+
+class SalesReportCache:
+    # Results are kept per (report, date range) and tagged with a watermark:
+    # the highest SALEDETAILID and the rollup version in SALESEQUENCE, which
+    # rebuild_sales_rollups bumps. A new sale on any worker usually moves the
+    # first, so checking costs one primary-key lookup per request. TiDB hands
+    # out AUTO_INCREMENT IDs in per-node batches, though, so a sale can commit
+    # below the current maximum without moving it; ttl bounds how long such a
+    # sale can be missing from a cached report.
+    def __init__(self, max_entries, top_n, ttl):
+        self.max_entries = max_entries
+        self.top_n = top_n
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reports(self, conn, names, date_from, date_to):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT (SELECT COALESCE(MAX(SALEDETAILID), 0) FROM SALESDETAILS),
+                       (SELECT COALESCE(MAX(NEXTVALUE), 0) FROM SALESEQUENCE WHERE NAME = 'ROLLUPS')
+            """)
+            watermark = tuple(cursor.fetchone())
+        finally:
+            cursor.close()
+        now = time.monotonic()
+
+        results, missing = {}, []
+        with self._lock:
+            for name in names:
+                entry = self._entries.get((name, date_from, date_to))
+                if entry is not None and entry[0] == watermark and now - entry[1] < self.ttl:
+                    self._entries.move_to_end((name, date_from, date_to))
+                    results[name] = entry[2]
+                else:
+                    missing.append(name)
+        if not missing:
+            return results
+
+        columns = load_sales(conn, date_from, date_to)
+        for name in missing:
+            results[name] = compute_report(columns, name, self.top_n)
+        with self._lock:
+            for name in missing:
+                self._entries[(name, date_from, date_to)] = (watermark, now, results[name])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
@@ -1,21 +1,1384 @@
 import mysql.connector
+from mysql.connector import errorcode, pooling
+import os
 import random
+import re
+import sqlite3
+import bisect
+import csv
+import datetime
+import decimal
 import functools
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from config import db_config, SECRET_KEY
+import heapq
+import io
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+import click
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response
+from analytics import plan_reorders, SalesReportCache, REPORTS
+from rollups import rebuild_sales_rollups, rebuild_sales_summary, upsert_sales_rollups
+from config import (db_config, SECRET_KEY, DB_POOL_SIZE, DB_POOL_TIMEOUT, SEARCH_INDEX_TTL, SEARCH_RESULT_LIMIT,
+                    SUGGEST_LIMIT, SUGGEST_CACHE_SIZE, SALE_ID_BLOCK_SIZE,
+                    BULK_SALE_MAX_LINES, REFERENCE_CACHE_TTL, SALES_PAGE_SIZE,
+                    ORDERS_PAGE_SIZE, ORDER_FEED_POLL_INTERVAL, ORDER_FEED_BACKLOG, ORDER_FEED_KEEPALIVE,
+                    ORDER_FEED_OVERLAP,
+                    CART_STORE_SIZE, CART_STORE_PATH, CART_PRICE_CACHE_SIZE, CART_PRICE_TTL,
+                    INVENTORY_INDEX_TTL, LOW_STOCK_THRESHOLD, EXPIRY_ALERT_DAYS, STOCK_ENFORCED,
+                    REORDER_WINDOW_DAYS, REORDER_LEAD_DAYS, REORDER_COVER_DAYS,
+                    REPORT_DEFAULT_DAYS, REPORT_TOP_N, REPORT_CACHE_SIZE, REPORT_CACHE_TTL,
+                    ROLLUP_REBUILD_CHUNK_DAYS, EXPORT_BATCH_SIZE,
+                    IMPORT_CHUNK_SIZE, IMPORT_ERROR_LIMIT)
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
 
+# --- Database Connection Pool ---
+# One pool per process. Gunicorn forks workers after importing the app, so the
+# pool is created lazily and rebuilt whenever the PID changes.
+_pool = None
+_pool_pid = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_pool_stats = {
+    'checkouts': 0,
+    'in_use': 0,
+    'waits': 0,
+    'timeouts': 0,
+    'errors': 0,
+    'total_wait': 0.0,
+    'max_wait': 0.0,
+}
+
+class PooledConnection:
+    # Thin wrapper so that conn.close() in the routes hands the connection back
+    # to the pool (reset + requeue) and frees the checkout slot exactly once.
+    def __init__(self, cnx):
+        self._cnx = cnx
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            self._cnx.close()
+        except mysql.connector.Error as err:
+            # The connection is still requeued; the next checkout pings it and
+            # reconnects if the reset left it unusable.
+            print(f"Database Pool Reset Error: {err}")
+        finally:
+            _release_slot()
+
+    def discard(self):
+        # For a connection abandoned half way through reading a result (a client
+        # that dropped a CSV export): the socket is closed so the server stops
+        # sending, and the next checkout reconnects it.
+        if self._released:
+            return
+        self._released = True
+        try:
+            self._cnx.disconnect()
+            self._cnx.close()
+        except mysql.connector.Error:
+            pass
+        finally:
+            _release_slot()
+
+    def __del__(self):
+        if not getattr(self, '_released', True):
+            self.close()
+
+def _get_pool():
+    global _pool, _pool_pid, _pool_slots
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = pooling.MySQLConnectionPool(
+                pool_name=f"pharmacy_{pid}",
+                pool_size=DB_POOL_SIZE,
+                pool_reset_session=True,
+                **db_config
+            )
+            _pool_slots = threading.BoundedSemaphore(DB_POOL_SIZE)
+            _pool_pid = pid
+            _pool_stats['in_use'] = 0
+    return _pool
+
+def _release_slot():
+    with _pool_lock:
+        _pool_stats['in_use'] -= 1
+    _pool_slots.release()
+
+def get_pool_stats():
+    with _pool_lock:
+        stats = dict(_pool_stats)
+    stats['pid'] = os.getpid()
+    stats['size'] = DB_POOL_SIZE if _pool_pid == os.getpid() else 0
+    stats['idle'] = stats['size'] - stats['in_use']
+    stats['avg_wait'] = stats['total_wait'] / stats['checkouts'] if stats['checkouts'] else 0.0
+    return stats
+
 # --- Database Connection ---
 def get_db_connection():
     try:
-        conn = mysql.connector.connect(**db_config)
-        return conn
+        pool = _get_pool()
+    except mysql.connector.Error as err:
+        print(f"Database Connection Error: {err}")
+        return None
+
+    start = time.monotonic()
+    if not _pool_slots.acquire(blocking=False):
+        with _pool_lock:
+            _pool_stats['waits'] += 1
+        if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+            with _pool_lock:
+                _pool_stats['timeouts'] += 1
+            print(f"Database Connection Error: no pooled connection free after {DB_POOL_TIMEOUT}s")
+            return None
+    waited = time.monotonic() - start
+
+    try:
+        # get_connection() pings the connection and reconnects it if it went stale.
+        cnx = pool.get_connection()
     except mysql.connector.Error as err:
+        _pool_slots.release()
+        with _pool_lock:
+            _pool_stats['errors'] += 1
         print(f"Database Connection Error: {err}")
         return None
 
+    with _pool_lock:
+        _pool_stats['checkouts'] += 1
+        _pool_stats['in_use'] += 1
+        _pool_stats['total_wait'] += waited
+        _pool_stats['max_wait'] = max(_pool_stats['max_wait'], waited)
+    return PooledConnection(cnx)
+
+# --- Medicine Search Index ---
+# Per-process trigram index over MEDICINES + MEDICINECATEGORY, so searching
+# doesn't need a LIKE '%q%' scan. The medicine routes patch it after each
+# commit; a periodic rebuild picks up changes made by other workers.
+MEDICINE_INDEX_QUERY = """
+    SELECT m.MEDICINEID, m.MEDICINENAME, m.PRICE, m.MANUFACTURER, m.CATEGORYID, mc.CATEGORYNAME
+    FROM MEDICINES m
+    LEFT JOIN MEDICINECATEGORY mc ON m.CATEGORYID = mc.CATEGORYID
+"""
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _word_keys(name):
+    # The name from the start of every word, so "caps" completes
+    # "seclo capsule ..." as well as names that begin with it.
+    keys = [name]
+    for i in range(1, len(name)):
+        if name[i - 1] == ' ' or (not name[i - 1].isalnum() and name[i].isalnum()):
+            keys.append(name[i:])
+    return keys
+
+# Fuzzy lookup is SymSpell-style: every indexed term is stored under the
+# strings reachable by deleting up to FUZZY_MAX_DISTANCE characters from its
+# first FUZZY_PREFIX_LENGTH characters. A misspelt query term shares one of
+# those delete keys with its correct spelling, so only a handful of
+# candidates need a real edit-distance check.
+FUZZY_MAX_DISTANCE = 2
+FUZZY_PREFIX_LENGTH = 10
+
+def _tokens(text):
+    # "20mg" and "20 mg" should match, so digits and letters split apart.
+    return re.findall(r'[a-z]+|[0-9]+', text.lower())
+
+def _max_distance(term):
+    if len(term) <= 2 or term.isdigit():
+        return 0
+    return 1 if len(term) <= 5 else FUZZY_MAX_DISTANCE
+
+def _deletes(term, distance):
+    term = term[:FUZZY_PREFIX_LENGTH]
+    result = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+def _edit_distance(a, b, max_dist):
+    # Optimal string alignment distance, giving up once it exceeds max_dist.
+    # Only the diagonal band |i - j| <= max_dist can stay within the limit,
+    # so cells outside it are never filled in.
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    # A typo only touches a few characters, so trimming the shared prefix and
+    # suffix usually leaves a tiny table (or none at all).
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    a, b = a[start:], b[start:]
+    while a and b and a[-1] == b[-1]:
+        a, b = a[:-1], b[:-1]
+    if not a or not b:
+        return len(a) or len(b)
+
+    over = max_dist + 1
+    n, m = len(a), len(b)
+    prev2 = None
+    prev = list(range(m + 1))
+    for i in range(1, n + 1):
+        cur = [over] * (m + 1)
+        cur[0] = i
+        row_min = i
+        ai = a[i - 1]
+        for j in range(max(1, i - max_dist), min(m, i + max_dist) + 1):
+            d = prev[j - 1] + (ai != b[j - 1])
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            cur[j] = d
+            if d < row_min:
+                row_min = d
+        if row_min > max_dist:
+            return over
+        prev2, prev = prev, cur
+    return min(prev[m], over)
+
+class MedicineSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._medicines = {}
+        self._names = {}
+        self._grams = {}
+        self._prefix_keys = []
+        self._suggest_cache = OrderedDict()
+        self._terms = {}
+        self._delete_keys = {}
+        self._built_at = None
+        self._pid = None
+
+    def is_stale(self):
+        return (self._built_at is None or self._pid != os.getpid()
+                or time.monotonic() - self._built_at > SEARCH_INDEX_TTL)
+
+    def rebuild(self, rows):
+        with self._lock:
+            self._medicines = {}
+            self._names = {}
+            self._grams = {}
+            self._prefix_keys = []
+            self._terms = {}
+            self._delete_keys = {}
+            for row in rows:
+                self._add(row, sort_keys=False)
+            self._prefix_keys.sort()
+            self._suggest_cache.clear()
+            self._built_at = time.monotonic()
+            self._pid = os.getpid()
+
+    def invalidate(self):
+        self._built_at = None
+
+    def upsert(self, row):
+        with self._lock:
+            self._discard(row['MEDICINEID'])
+            self._add(row)
+            self._suggest_cache.clear()
+
+    def remove(self, medicine_id):
+        with self._lock:
+            self._discard(medicine_id)
+            self._suggest_cache.clear()
+
+    def get(self, medicine_id):
+        with self._lock:
+            med = self._medicines.get(medicine_id)
+            return dict(med) if med else None
+
+    def rename_category(self, category_id, category_name):
+        with self._lock:
+            for med in self._medicines.values():
+                if med['CATEGORYID'] == category_id:
+                    med['CATEGORYNAME'] = category_name
+
+    def _add(self, row, sort_keys=True):
+        medicine_id = row['MEDICINEID']
+        name = _normalize(row['MEDICINENAME'])
+        self._medicines[medicine_id] = dict(row)
+        self._names[medicine_id] = name
+        for gram in _trigrams(name):
+            self._grams.setdefault(gram, set()).add(medicine_id)
+        for field, text in (('name', row['MEDICINENAME']), ('manufacturer', row['MANUFACTURER'] or '')):
+            for term in _tokens(text):
+                postings = self._terms.get(term)
+                if postings is None:
+                    postings = self._terms[term] = {}
+                    for key in _deletes(term, _max_distance(term)):
+                        # Most keys belong to a single term, so that case is
+                        # stored as the bare string instead of a set.
+                        found = self._delete_keys.get(key)
+                        if found is None:
+                            self._delete_keys[key] = term
+                        elif isinstance(found, str):
+                            if found != term:
+                                self._delete_keys[key] = {found, term}
+                        else:
+                            found.add(term)
+                if postings.get(medicine_id) != 'name':
+                    postings[medicine_id] = field
+        for key in _word_keys(name):
+            if sort_keys:
+                bisect.insort(self._prefix_keys, (key, medicine_id))
+            else:
+                self._prefix_keys.append((key, medicine_id))
+
+    def _discard(self, medicine_id):
+        name = self._names.pop(medicine_id, None)
+        med = self._medicines.pop(medicine_id, None)
+        if name is None:
+            return
+        for term in set(_tokens(med['MEDICINENAME'])) | set(_tokens(med['MANUFACTURER'] or '')):
+            postings = self._terms.get(term)
+            if postings is None:
+                continue
+            postings.pop(medicine_id, None)
+            if not postings:
+                del self._terms[term]
+                for key in _deletes(term, _max_distance(term)):
+                    found = self._delete_keys.get(key)
+                    if found == term:
+                        del self._delete_keys[key]
+                    elif isinstance(found, set):
+                        found.discard(term)
+                        if len(found) == 1:
+                            self._delete_keys[key] = found.pop()
+        for key in _word_keys(name):
+            i = bisect.bisect_left(self._prefix_keys, (key, medicine_id))
+            if i < len(self._prefix_keys) and self._prefix_keys[i] == (key, medicine_id):
+                del self._prefix_keys[i]
+        for gram in _trigrams(name):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(medicine_id)
+                if not ids:
+                    del self._grams[gram]
+
+    def _candidates(self, query):
+        # Queries shorter than a trigram are answered by scanning the names.
+        if len(query) < 3:
+            return self._names.keys()
+        grams = sorted(_trigrams(query), key=lambda g: len(self._grams.get(g, ())))
+        candidates = set(self._grams.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self._grams.get(gram, set())
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query, limit=None):
+        query = _normalize(query)
+        if not query:
+            return []
+        limit = limit or SEARCH_RESULT_LIMIT
+        with self._lock:
+            ranked = []
+            for medicine_id in self._candidates(query):
+                name = self._names[medicine_id]
+                pos = name.find(query)
+                if pos < 0:
+                    continue
+                if name == query:
+                    rank = 0
+                elif pos == 0:
+                    rank = 1
+                elif not name[pos - 1].isalnum():
+                    rank = 2
+                else:
+                    rank = 3
+                ranked.append((rank, pos, len(name), name, medicine_id))
+            ranked.sort()
+            return [dict(self._medicines[r[-1]]) for r in ranked[:limit]]
+
+    def _similar_terms(self, term):
+        max_dist = _max_distance(term)
+        if max_dist == 0:
+            return {term: 0} if term in self._terms else {}
+        matches = {}
+        checked = set()
+        for key in _deletes(term, max_dist):
+            found = self._delete_keys.get(key)
+            if found is None:
+                continue
+            for candidate in ((found,) if isinstance(found, str) else found):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                dist = _edit_distance(term, candidate, max_dist)
+                if dist <= max_dist:
+                    matches[candidate] = dist
+        return matches
+
+    def fuzzy_search(self, query, limit=None):
+        limit = limit or SEARCH_RESULT_LIMIT
+        with self._lock:
+            # Each query term becomes a list of (postings, distance) for the
+            # indexed terms within reach of it. Terms nothing resembles are
+            # dropped rather than failing the whole search.
+            matches = []
+            for term in _tokens(query):
+                similar = self._similar_terms(term)
+                if similar:
+                    matches.append([(self._terms[t], dist) for t, dist in similar.items()])
+            if not matches:
+                return []
+
+            # Every remaining term has to match, so start from the term with
+            # the fewest postings and only probe the others for those ids.
+            matches.sort(key=lambda m: sum(len(postings) for postings, _ in m))
+            candidates = set()
+            for postings, _ in matches[0]:
+                candidates.update(postings)
+
+            ranked = []
+            for medicine_id in candidates:
+                total_dist = off_name = 0
+                for term_matches in matches:
+                    best = None
+                    for postings, dist in term_matches:
+                        field = postings.get(medicine_id)
+                        if field is not None and (best is None or (dist, field != 'name') < best):
+                            best = (dist, field != 'name')
+                    if best is None:
+                        break
+                    total_dist += best[0]
+                    off_name += best[1]
+                else:
+                    name = self._names[medicine_id]
+                    ranked.append((total_dist, off_name, len(name), name, medicine_id))
+            return [dict(self._medicines[r[-1]]) for r in heapq.nsmallest(limit, ranked)]
+
+    def suggest(self, prefix, limit):
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            cache_key = (prefix, limit)
+            cached = self._suggest_cache.get(cache_key)
+            if cached is not None:
+                self._suggest_cache.move_to_end(cache_key)
+                return cached
+
+            # Keys sharing the prefix sit in one contiguous run of the sorted list.
+            ranked = {}
+            i = bisect.bisect_left(self._prefix_keys, (prefix,))
+            while i < len(self._prefix_keys):
+                key, medicine_id = self._prefix_keys[i]
+                if not key.startswith(prefix):
+                    break
+                name = self._names[medicine_id]
+                rank = (0 if len(key) == len(name) else 1, len(name), name)
+                if medicine_id not in ranked or rank < ranked[medicine_id]:
+                    ranked[medicine_id] = rank
+                i += 1
+
+            results = []
+            for medicine_id in sorted(ranked, key=ranked.get)[:limit]:
+                med = self._medicines[medicine_id]
+                results.append({
+                    'MEDICINEID': medicine_id,
+                    'MEDICINENAME': med['MEDICINENAME'],
+                    'PRICE': float(med['PRICE']),
+                })
+
+            self._suggest_cache[cache_key] = results
+            if len(self._suggest_cache) > SUGGEST_CACHE_SIZE:
+                self._suggest_cache.popitem(last=False)
+            return results
+
+medicine_index = MedicineSearchIndex()
+
+def _load_medicine_index(conn=None):
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+        if conn is None:
+            return False
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(MEDICINE_INDEX_QUERY)
+        medicine_index.rebuild(cursor.fetchall())
+        return True
+    except mysql.connector.Error as err:
+        print(f"Search Index Error: {err}")
+        return False
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+
+def get_medicine_index():
+    if medicine_index.is_stale() and not _load_medicine_index():
+        return None
+    return medicine_index
+
+def refresh_indexed_medicine(conn, medicine_id):
+    # Called after a MEDICINES write has been committed on conn.
+    if medicine_index.is_stale():
+        return
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(MEDICINE_INDEX_QUERY + " WHERE m.MEDICINEID = %s", (medicine_id,))
+        row = cursor.fetchone()
+        if row:
+            medicine_index.upsert(row)
+        else:
+            medicine_index.remove(medicine_id)
+    except mysql.connector.Error as err:
+        print(f"Search Index Error: {err}")
+        medicine_index.invalidate()
+    finally:
+        cursor.close()
+
+# --- Branch Inventory Index ---
+# Every MEDICINESTOCK batch, grouped by medicine, so "which branch has it"
+# is a dictionary lookup over that medicine's few batches. Stock routes and
+# sales on this worker patch it as they commit; it is reloaded after
+# INVENTORY_INDEX_TTL to pick up writes made on other workers.
+#
+# It also drives the stock alerts: batches are kept in expiry order, so the
+# ones expiring in the next N days are a bisect and a slice, and each
+# (medicine, branch) total is re-summed whenever one of its batches changes,
+# keeping the set of pairs under their reorder level current. Pairs without a
+# REORDERLEVELS row use LOW_STOCK_THRESHOLD.
+INVENTORY_INDEX_QUERY = "SELECT STOCKID, BRANCHID, MEDICINEID, QUANTITY, EXPIRYDATE FROM MEDICINESTOCK"
+REORDER_LEVELS_QUERY = "SELECT MEDICINEID, BRANCHID, REORDERLEVEL FROM REORDERLEVELS"
+
+class InventoryIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._batches = {}
+        self._by_medicine = {}
+        self._expiry_order = []
+        self._levels = {}
+        self._totals = {}
+        self._low = set()
+        self._built_at = None
+        self._pid = None
+
+    def is_stale(self):
+        return (self._built_at is None or self._pid != os.getpid()
+                or time.monotonic() - self._built_at > INVENTORY_INDEX_TTL)
+
+    def rebuild(self, rows, levels=()):
+        with self._lock:
+            self._batches = {}
+            self._by_medicine = {}
+            self._expiry_order = []
+            self._levels = {(row['MEDICINEID'], row['BRANCHID']): row['REORDERLEVEL'] for row in levels}
+            self._totals = {}
+            self._low = set()
+            for row in rows:
+                self._add(row, sort_keys=False)
+            self._expiry_order.sort()
+            pairs = set(self._levels)
+            pairs.update((batch['MEDICINEID'], batch['BRANCHID']) for batch in self._batches.values())
+            for pair in pairs:
+                self._retotal(pair)
+            self._built_at = time.monotonic()
+            self._pid = os.getpid()
+
+    def invalidate(self):
+        self._built_at = None
+
+    def upsert(self, row):
+        with self._lock:
+            self._discard(row['STOCKID'])
+            self._add(row)
+
+    def remove(self, stock_id):
+        with self._lock:
+            self._discard(stock_id)
+
+    def consume(self, taken):
+        # Applies the (STOCKID, quantity) pairs returned by consume_stock.
+        with self._lock:
+            for stock_id, quantity in taken:
+                batch = self._batches.get(stock_id)
+                if batch is not None:
+                    batch['QUANTITY'] -= quantity
+                    self._retotal((batch['MEDICINEID'], batch['BRANCHID']))
+
+    def set_level(self, medicine_id, branch_id, level):
+        with self._lock:
+            self._levels[(medicine_id, branch_id)] = level
+            self._retotal((medicine_id, branch_id))
+
+    def _add(self, row, sort_keys=True):
+        batch = dict(row)
+        self._batches[batch['STOCKID']] = batch
+        self._by_medicine.setdefault(batch['MEDICINEID'], {})[batch['STOCKID']] = batch
+        if sort_keys:
+            bisect.insort(self._expiry_order, (batch['EXPIRYDATE'], batch['STOCKID']))
+            self._retotal((batch['MEDICINEID'], batch['BRANCHID']))
+        else:
+            self._expiry_order.append((batch['EXPIRYDATE'], batch['STOCKID']))
+
+    def _discard(self, stock_id):
+        batch = self._batches.pop(stock_id, None)
+        if batch is not None:
+            batches = self._by_medicine[batch['MEDICINEID']]
+            del batches[stock_id]
+            if not batches:
+                del self._by_medicine[batch['MEDICINEID']]
+            key = (batch['EXPIRYDATE'], stock_id)
+            pos = bisect.bisect_left(self._expiry_order, key)
+            if pos < len(self._expiry_order) and self._expiry_order[pos] == key:
+                del self._expiry_order[pos]
+            self._retotal((batch['MEDICINEID'], batch['BRANCHID']))
+
+    def _retotal(self, pair):
+        medicine_id, branch_id = pair
+        today = datetime.date.today()
+        total = sum(batch['QUANTITY'] for batch in self._by_medicine.get(medicine_id, {}).values()
+                    if batch['BRANCHID'] == branch_id and batch['QUANTITY'] > 0 and batch['EXPIRYDATE'] >= today)
+        self._totals[pair] = total
+        if total < self._levels.get(pair, LOW_STOCK_THRESHOLD):
+            self._low.add(pair)
+        else:
+            self._low.discard(pair)
+
+    def availability(self, medicine_id):
+        # Sellable stock per branch: unexpired batches with units left, summed,
+        # with the nearest expiry. Largest holdings first.
+        today = datetime.date.today()
+        branches = {}
+        with self._lock:
+            for batch in self._by_medicine.get(medicine_id, {}).values():
+                if batch['QUANTITY'] <= 0 or batch['EXPIRYDATE'] < today:
+                    continue
+                entry = branches.setdefault(batch['BRANCHID'], {'BRANCHID': batch['BRANCHID'], 'QUANTITY': 0, 'NEXTEXPIRY': batch['EXPIRYDATE']})
+                entry['QUANTITY'] += batch['QUANTITY']
+                entry['NEXTEXPIRY'] = min(entry['NEXTEXPIRY'], batch['EXPIRYDATE'])
+        return sorted(branches.values(), key=lambda entry: -entry['QUANTITY'])
+
+    def expiring(self, days, branch_id=None):
+        # Batches with units left that expire between today and today + days,
+        # soonest first.
+        today = datetime.date.today()
+        with self._lock:
+            lo = bisect.bisect_left(self._expiry_order, (today,))
+            hi = bisect.bisect_left(self._expiry_order, (today + datetime.timedelta(days=days + 1),))
+            batches = [self._batches[stock_id] for _, stock_id in self._expiry_order[lo:hi]]
+            return [dict(batch) for batch in batches
+                    if batch['QUANTITY'] > 0 and (branch_id is None or batch['BRANCHID'] == branch_id)]
+
+    def low_stock(self, branch_id=None):
+        # (medicine, branch) pairs whose sellable stock is under their level,
+        # emptiest first.
+        with self._lock:
+            rows = [{'MEDICINEID': medicine_id, 'BRANCHID': pair_branch, 'QUANTITY': self._totals[(medicine_id, pair_branch)],
+                     'REORDERLEVEL': self._levels.get((medicine_id, pair_branch), LOW_STOCK_THRESHOLD)}
+                    for medicine_id, pair_branch in self._low if branch_id is None or pair_branch == branch_id]
+        return sorted(rows, key=lambda row: (row['QUANTITY'] - row['REORDERLEVEL'], row['MEDICINEID']))
+
+inventory_index = InventoryIndex()
+
+def get_inventory_index():
+    if inventory_index.is_stale():
+        conn = get_db_connection()
+        if conn is None:
+            return None
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(INVENTORY_INDEX_QUERY)
+            rows = cursor.fetchall()
+            cursor.execute(REORDER_LEVELS_QUERY)
+            inventory_index.rebuild(rows, cursor.fetchall())
+        except mysql.connector.Error as err:
+            print(f"Inventory Index Error: {err}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+    return inventory_index
+
+def refresh_indexed_stock(conn, stock_id):
+    # Called after a MEDICINESTOCK write has been committed on conn.
+    if inventory_index.is_stale():
+        return
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(INVENTORY_INDEX_QUERY + " WHERE STOCKID = %s", (stock_id,))
+        row = cursor.fetchone()
+        if row:
+            inventory_index.upsert(row)
+        else:
+            inventory_index.remove(stock_id)
+    except mysql.connector.Error as err:
+        print(f"Inventory Index Error: {err}")
+        inventory_index.invalidate()
+    finally:
+        cursor.close()
+
+def branch_availability(medicine_id):
+    # Per-branch stock for one medicine with branch names, or None if the
+    # index could not be loaded.
+    index = get_inventory_index()
+    if index is None:
+        return None
+    entries = index.availability(medicine_id)
+    lists = get_reference_data('branches') if entries else {'branches': []}
+    if lists is None:
+        return None
+    names = {branch['BRANCHID']: branch['BRANCHNAME'] for branch in lists['branches']}
+    return [{**entry, 'BRANCHNAME': names.get(entry['BRANCHID'], 'N/A')} for entry in entries]
+
+# --- Sale Number Allocator ---
+# SALEIDs come from the SALESEQUENCE row instead of MAX(SALEID) + 1. Each
+# worker reserves a block of SALE_ID_BLOCK_SIZE numbers at a time and hands
+# them out from memory, so most sales need no round trip and two workers can
+# never get the same number. Numbers left in a block when a worker exits are
+# simply skipped.
+class SaleIdAllocator:
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._pid = None
+
+    def allocate(self, conn):
+        # Reserving a block commits on conn, so call this before the sale's
+        # own writes.
+        with self._lock:
+            if self._pid != os.getpid() or self._next >= self._end:
+                self._reserve(conn)
+            sale_id = self._next
+            self._next += 1
+            return sale_id
+
+    def _reserve(self, conn):
+        bump = "UPDATE SALESEQUENCE SET NEXTVALUE = LAST_INSERT_ID(NEXTVALUE + %s) WHERE NAME = 'SALEID'"
+        cursor = conn.cursor()
+        try:
+            cursor.execute(bump, (self.block_size,))
+            if cursor.rowcount == 0:
+                # First use on a database without the row: start after the
+                # highest SALEID already recorded.
+                cursor.execute("""
+                    INSERT IGNORE INTO SALESEQUENCE (NAME, NEXTVALUE)
+                    SELECT 'SALEID', COALESCE(MAX(SALEID), 0) + 1 FROM SALESDETAILS
+                """)
+                cursor.execute(bump, (self.block_size,))
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            conn.commit()
+        finally:
+            cursor.close()
+        self._next = end - self.block_size
+        self._end = end
+        self._pid = os.getpid()
+
+sale_ids = SaleIdAllocator(SALE_ID_BLOCK_SIZE)
+
+# --- Reference Data Cache ---
+# Dropdown lists shared by the form pages. Each list is cached per worker for
+# REFERENCE_CACHE_TTL seconds and dropped as soon as a route on this worker
+# changes the underlying table; the TTL bounds staleness from other workers.
+# The cached lists are shared, so callers must not modify them.
+REFERENCE_QUERIES = {
+    'branches': "SELECT BRANCHID, BRANCHNAME FROM BRANCHES",
+    'categories': "SELECT CATEGORYID, CATEGORYNAME FROM MEDICINECATEGORY",
+    'customers': "SELECT CUSTOMERID, CUSTOMERNAME FROM CUSTOMERS",
+    'employees': "SELECT EMPLOYEEID, EMPLOYEENAME FROM EMPLOYEES",
+    'medicines': "SELECT MEDICINEID, MEDICINENAME, PRICE FROM MEDICINES",
+    'shifts': "SELECT SHIFTID, SHIFTNAME FROM SHIFTS",
+}
+_reference_cache = {}
+_reference_lock = threading.Lock()
+
+def get_reference_data(*names, conn=None):
+    # Returns {name: rows}, or None if a list had to be loaded and the
+    # database was unreachable. Pass conn to load misses on an open connection.
+    now = time.monotonic()
+    result = {}
+    with _reference_lock:
+        for name in names:
+            entry = _reference_cache.get(name)
+            if entry is not None and now - entry[0] < REFERENCE_CACHE_TTL:
+                result[name] = entry[1]
+    missing = [name for name in names if name not in result]
+    if not missing:
+        return result
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+        if conn is None:
+            return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for name in missing:
+            cursor.execute(REFERENCE_QUERIES[name])
+            result[name] = cursor.fetchall()
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+    with _reference_lock:
+        for name in missing:
+            _reference_cache[name] = (now, result[name])
+    return result
+
+def invalidate_reference_data(*names):
+    with _reference_lock:
+        for name in names:
+            _reference_cache.pop(name, None)
+
+# --- Cart Store ---
+# Carts are kept on the server, keyed by customer ID, so the session cookie
+# carries no cart and adding an item updates one entry instead of rewriting
+# the whole cart. Both stores map MEDICINEID (int) to quantity.
+class MemoryCartStore:
+    # The default (CART_STORE_PATH = None). Per process, so only for running a
+    # single worker; the least recently used carts are dropped beyond max_carts.
+    def __init__(self, max_carts):
+        self.max_carts = max_carts
+        self._carts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, customer_id, medicine_id, quantity):
+        with self._lock:
+            cart = self._carts.setdefault(customer_id, {})
+            self._carts.move_to_end(customer_id)
+            cart[medicine_id] = cart.get(medicine_id, 0) + quantity
+            while len(self._carts) > self.max_carts:
+                self._carts.popitem(last=False)
+
+    def items(self, customer_id):
+        with self._lock:
+            cart = self._carts.get(customer_id)
+            if cart is None:
+                return {}
+            self._carts.move_to_end(customer_id)
+            return dict(cart)
+
+    def clear(self, customer_id):
+        with self._lock:
+            self._carts.pop(customer_id, None)
+
+class SqliteCartStore:
+    # Shared by every worker on the host through one local SQLite file; each
+    # thread opens its own connection.
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        db = self._db()
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS CART_ITEMS (
+                CUSTOMERID INTEGER NOT NULL,
+                MEDICINEID INTEGER NOT NULL,
+                QUANTITY INTEGER NOT NULL,
+                PRIMARY KEY (CUSTOMERID, MEDICINEID)
+            ) WITHOUT ROWID
+        """)
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def add(self, customer_id, medicine_id, quantity):
+        self._db().execute("""
+            INSERT INTO CART_ITEMS (CUSTOMERID, MEDICINEID, QUANTITY) VALUES (?, ?, ?)
+            ON CONFLICT (CUSTOMERID, MEDICINEID) DO UPDATE SET QUANTITY = QUANTITY + excluded.QUANTITY
+        """, (customer_id, medicine_id, quantity))
+
+    def items(self, customer_id):
+        rows = self._db().execute("SELECT MEDICINEID, QUANTITY FROM CART_ITEMS WHERE CUSTOMERID = ?", (customer_id,))
+        return dict(rows.fetchall())
+
+    def clear(self, customer_id):
+        self._db().execute("DELETE FROM CART_ITEMS WHERE CUSTOMERID = ?", (customer_id,))
+
+# Created on first use, like the pool, so importing the app (CLI commands,
+# scripts, tests) never creates the SQLite file.
+_cart_store = None
+_cart_store_lock = threading.Lock()
+
+def get_cart_store():
+    global _cart_store
+    if _cart_store is None:
+        with _cart_store_lock:
+            if _cart_store is None:
+                _cart_store = SqliteCartStore(CART_STORE_PATH) if CART_STORE_PATH else MemoryCartStore(CART_STORE_SIZE)
+    return _cart_store
+
+def get_cart(customer_id):
+    # Moves a cart left in the session by an older version into the store.
+    legacy_cart = session.pop('cart', None)
+    if legacy_cart:
+        for medicine_id, quantity in legacy_cart.items():
+            get_cart_store().add(customer_id, int(medicine_id), quantity)
+    return get_cart_store().items(customer_id)
+
+# --- Cart Pricing ---
+# Priced carts are memoised on (cart contents, price version). Editing or
+# deleting a medicine bumps the version, which retires every cached cart on
+# this worker; CART_PRICE_TTL covers edits made on other workers.
+class CartPricer:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._cache.clear()
+
+    def price(self, cart):
+        # Returns (items, total) for a {MEDICINEID: quantity} cart, or None if
+        # it had to be priced and the database was unreachable. Items carry
+        # MEDICINEID, MEDICINENAME, PRICE, quantity and subtotal; medicines
+        # that no longer exist are left out. The result is shared, so callers
+        # must not modify it.
+        if not cart:
+            return [], 0
+        with self._lock:
+            key = (tuple(cart.items()), self.version)
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._cache.move_to_end(key)
+                return entry[1]
+
+        conn = get_db_connection()
+        if conn is None:
+            return None
+        cursor = conn.cursor(dictionary=True)
+        try:
+            placeholders = ','.join(['%s'] * len(cart))
+            cursor.execute(f"SELECT MEDICINEID, MEDICINENAME, PRICE FROM MEDICINES WHERE MEDICINEID IN ({placeholders})", tuple(cart))
+            medicines = {med['MEDICINEID']: med for med in cursor.fetchall()}
+        finally:
+            cursor.close()
+            conn.close()
+
+        items, total = [], 0
+        for medicine_id, quantity in cart.items():
+            med = medicines.get(medicine_id)
+            if med:
+                subtotal = med['PRICE'] * quantity
+                total += subtotal
+                items.append({**med, 'quantity': quantity, 'subtotal': subtotal})
+        with self._lock:
+            # Only cache if no price changed while this cart was being priced.
+            if key[1] == self.version:
+                self._cache[key] = (time.monotonic(), (items, total))
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return items, total
+
+cart_pricer = CartPricer(CART_PRICE_CACHE_SIZE, CART_PRICE_TTL)
+
+# --- Sale Lines ---
+def fetch_prices(cursor, medicine_ids):
+    # One IN-list query for every line of a sale instead of one per line.
+    # Expects a dictionary cursor.
+    medicine_ids = list(dict.fromkeys(medicine_ids))
+    if not medicine_ids:
+        return {}
+    placeholders = ','.join(['%s'] * len(medicine_ids))
+    cursor.execute(f"SELECT MEDICINEID, PRICE FROM MEDICINES WHERE MEDICINEID IN ({placeholders})", tuple(medicine_ids))
+    return {row['MEDICINEID']: row['PRICE'] for row in cursor.fetchall()}
+
+def insert_sale_lines(cursor, sale_id, branch_id, customer_id, employee_id, payment_method, lines):
+    # Every line in one multi-row INSERT. Lines carry MEDICINEID, PRICE,
+    # quantity and subtotal, as built by the cart and the sale forms. The
+    # sale's SALESSUMMARY row is written alongside, in the caller's transaction.
+    cursor.execute("""
+        INSERT INTO SALESSUMMARY (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PAYMENTMETHOD, LINECOUNT, GRANDTOTAL)
+        VALUES (%s, CURDATE(), %s, %s, %s, %s, %s, %s)
+    """, (sale_id, branch_id, customer_id, employee_id, payment_method, len(lines), sum(line['subtotal'] for line in lines)))
+    values = []
+    for line in lines:
+        values.extend((sale_id, branch_id, customer_id, employee_id, line['PRICE'], line['subtotal'], payment_method, line['MEDICINEID'], line['quantity']))
+    placeholders = ', '.join(['(%s, CURDATE(), %s, %s, %s, %s, %s, %s, %s, %s)'] * len(lines))
+    cursor.execute(f"""
+        INSERT INTO SALESDETAILS (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PRICEPERUNIT, TOTALAMOUNT, PAYMENTMETHOD, MEDICINEID, QUANTITY)
+        VALUES {placeholders}
+    """, values)
+    upsert_sales_rollups(cursor, branch_id, employee_id, payment_method, lines)
+
+@app.cli.command('rebuild-sales-summary')
+def rebuild_sales_summary_command():
+    """Recompute SALESSUMMARY from SALESDETAILS."""
+    conn = get_db_connection()
+    if conn is None:
+        raise click.ClickException('Database connection error.')
+    try:
+        rebuilt = rebuild_sales_summary(conn)
+    except mysql.connector.Error as err:
+        raise click.ClickException(f'Error: {err}')
+    finally:
+        conn.close()
+    click.echo(f'Rebuilt {rebuilt} sale summaries.')
+
+# --- Sales Rollups ---
+# Upserted with each sale's lines and rebuilt by the command below; the
+# queries live in rollups.py, shared with generate_data.py.
+@app.cli.command('rebuild-sales-rollups')
+@click.option('--chunk-days', type=click.IntRange(min=1), default=ROLLUP_REBUILD_CHUNK_DAYS, show_default=True,
+              help='Days of sales recomputed per transaction.')
+def rebuild_sales_rollups_command(chunk_days):
+    """Recompute the daily sales rollups from SALESDETAILS, up to yesterday."""
+    conn = get_db_connection()
+    if conn is None:
+        raise click.ClickException('Database connection error.')
+    try:
+        days = rebuild_sales_rollups(conn, chunk_days,
+                                     progress=lambda start, end: click.echo(f'Rebuilt {start} to {end}.'))
+    except mysql.connector.Error as err:
+        raise click.ClickException(f'Error: {err}')
+    finally:
+        conn.close()
+    sales_reports.clear()
+    click.echo(f'Rebuilt rollups for {days} days.')
+
+# --- Stock Allocation ---
+class OutOfStock(Exception):
+    # shortages maps MEDICINEID to the quantity the branch could not supply.
+    def __init__(self, shortages):
+        super().__init__(shortages)
+        self.shortages = shortages
+
+def consume_stock(conn, branch_id, lines):
+    # Takes every line's quantity out of the branch's unexpired batches,
+    # first-expiry-first-out, in two statements: one SELECT ... FOR UPDATE
+    # that locks the candidate batches in FEFO order, and one UPDATE whose
+    # WHERE clause refuses to take a batch below zero. Concurrent sales of the
+    # same medicine queue on the row locks, so no decrement is lost. Runs in
+    # the caller's transaction; raises OutOfStock (caller rolls back) if the
+    # branch cannot cover the sale, unless STOCK_ENFORCED is off, in which
+    # case whatever stock there is gets taken. Returns the (STOCKID, quantity)
+    # taken.
+    wanted = {}
+    for line in lines:
+        wanted[line['MEDICINEID']] = wanted.get(line['MEDICINEID'], 0) + line['quantity']
+    cursor = conn.cursor()
+    try:
+        placeholders = ','.join(['%s'] * len(wanted))
+        cursor.execute(f"""
+            SELECT STOCKID, MEDICINEID, QUANTITY
+            FROM MEDICINESTOCK
+            WHERE BRANCHID = %s AND MEDICINEID IN ({placeholders}) AND QUANTITY > 0 AND EXPIRYDATE >= CURDATE()
+            ORDER BY MEDICINEID, EXPIRYDATE, STOCKID
+            FOR UPDATE
+        """, (branch_id, *wanted))
+        remaining = dict(wanted)
+        taken = []
+        for stock_id, medicine_id, quantity in cursor.fetchall():
+            need = remaining[medicine_id]
+            if need > 0:
+                taken.append((stock_id, min(need, quantity)))
+                remaining[medicine_id] = need - min(need, quantity)
+        shortages = {medicine_id: need for medicine_id, need in remaining.items() if need > 0}
+        if shortages and STOCK_ENFORCED:
+            raise OutOfStock(shortages)
+        if not taken:
+            return taken
+
+        cases = ' '.join(['WHEN %s THEN %s'] * len(taken))
+        case_params = [value for batch in taken for value in batch]
+        cursor.execute(f"""
+            UPDATE MEDICINESTOCK
+            SET QUANTITY = QUANTITY - CASE STOCKID {cases} END
+            WHERE STOCKID IN ({','.join(['%s'] * len(taken))}) AND QUANTITY >= CASE STOCKID {cases} END
+        """, case_params + [stock_id for stock_id, _ in taken] + case_params)
+        if cursor.rowcount != len(taken):
+            raise OutOfStock(wanted)
+        return taken
+    finally:
+        cursor.close()
+
+def describe_shortages(shortages):
+    return ', '.join(f'medicine {medicine_id} short by {need}' for medicine_id, need in shortages.items())
+
+# --- CSV Exports ---
+# Exports read through an unbuffered cursor, EXPORT_BATCH_SIZE rows at a time,
+# and each batch is written out as CSV (gzipped on the fly when the client
+# accepts it) before the next is fetched, so a worker holds one batch whatever
+# the size of the table. The worker and its pooled connection stay busy until
+# the download finishes.
+def export_csv(query, params, name, fallback):
+    conn = get_db_connection()
+    if conn is None:
+        flash('Database connection error.', 'danger')
+        return redirect(url_for(fallback))
+    cursor = conn.cursor()
+    try:
+        # Unbuffered, so this only waits for the column list; rows stay on the
+        # server until fetched.
+        cursor.execute(query, params)
+    except mysql.connector.Error as err:
+        cursor.close()
+        conn.close()
+        flash(f'Error: {err}', 'danger')
+        return redirect(url_for(fallback))
+    compress = 'gzip' in request.accept_encodings
+    response = Response(stream_csv(conn, cursor, compress), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}-{datetime.date.today().isoformat()}.csv"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def stream_csv(conn, cursor, compress):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(cursor.column_names)
+    gzipper = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip framing
+    finished = False
+    try:
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            writer.writerows(rows)
+            chunk = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            if gzipper is not None:
+                chunk = gzipper.compress(chunk)
+            if chunk:
+                yield chunk
+            if not rows:
+                break
+        if gzipper is not None:
+            yield gzipper.flush()
+        finished = True
+    except mysql.connector.Error as err:
+        print(f"CSV Export Error: {err}")
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            conn.discard()
+
+# --- CSV Imports ---
+# Bulk loading of medicines and stock batches from a CSV stream. Rows are
+# validated as they are read (references against the cached reference lists)
+# and good rows go in IMPORT_CHUNK_SIZE at a time as one multi-row INSERT and
+# one commit per chunk. If a chunk is refused (a duplicate name or STOCKID, a
+# reference deleted since it was cached) it is replayed row by row so only
+# the offending rows are rejected. Column names are matched case-insensitively;
+# a blank STOCKID is numbered after the highest one in MEDICINESTOCK.
+IMPORT_KINDS = {
+    'medicines': {
+        'columns': ('MEDICINENAME', 'CATEGORYID', 'MANUFACTURER', 'PRICE'),
+        'required': ('MEDICINENAME', 'MANUFACTURER', 'PRICE'),
+        'lists': ('categories',),
+    },
+    'stock': {
+        'columns': ('STOCKID', 'BRANCHID', 'MEDICINEID', 'QUANTITY', 'EXPIRYDATE'),
+        'required': ('BRANCHID', 'MEDICINEID', 'QUANTITY', 'EXPIRYDATE'),
+        'lists': ('branches', 'medicines'),
+    },
+}
+
+def parse_import_row(kind, row, known):
+    # Returns the row's column values in IMPORT_KINDS order, or raises
+    # ValueError with a message for the error report.
+    def integer(name, minimum):
+        try:
+            value = int(row[name])
+        except ValueError:
+            raise ValueError(f'{name} must be a whole number.')
+        if value < minimum:
+            raise ValueError(f'{name} must be at least {minimum}.')
+        return value
+
+    if kind == 'medicines':
+        name = row['MEDICINENAME']
+        if not name or len(name) > 100:
+            raise ValueError('MEDICINENAME must be 1-100 characters.')
+        if name.casefold() in known['names']:
+            raise ValueError(f'MEDICINENAME {name} appears earlier in the file.')
+        manufacturer = row['MANUFACTURER']
+        if not manufacturer or len(manufacturer) > 100:
+            raise ValueError('MANUFACTURER must be 1-100 characters.')
+        category_id = integer('CATEGORYID', 1) if row.get('CATEGORYID') else None
+        if category_id is not None and category_id not in known['categories']:
+            raise ValueError(f'CATEGORYID {category_id} does not exist.')
+        try:
+            price = decimal.Decimal(row['PRICE'])
+        except decimal.InvalidOperation:
+            raise ValueError('PRICE must be a number.')
+        if not price.is_finite() or price < 0 or price >= 10 ** 8:
+            raise ValueError('PRICE must be between 0 and 99999999.99.')
+        known['names'].add(name.casefold())
+        return name, category_id, manufacturer, price.quantize(decimal.Decimal('0.01'))
+
+    stock_id = integer('STOCKID', 1) if row.get('STOCKID') else None
+    if stock_id is not None and stock_id in known['stock_ids']:
+        raise ValueError(f'STOCKID {stock_id} appears earlier in the file.')
+    branch_id = integer('BRANCHID', 1)
+    if branch_id not in known['branches']:
+        raise ValueError(f'BRANCHID {branch_id} does not exist.')
+    medicine_id = integer('MEDICINEID', 1)
+    if medicine_id not in known['medicines']:
+        raise ValueError(f'MEDICINEID {medicine_id} does not exist.')
+    quantity = integer('QUANTITY', 1)
+    try:
+        expiry_date = datetime.date.fromisoformat(row['EXPIRYDATE'])
+    except ValueError:
+        raise ValueError('EXPIRYDATE must be a YYYY-MM-DD date.')
+    if stock_id is not None:
+        known['stock_ids'].add(stock_id)
+    return stock_id, branch_id, medicine_id, quantity, expiry_date
+
+def insert_import_chunk(conn, kind, chunk, report):
+    # chunk is a list of (line number, values). Runs and commits one
+    # transaction; rows the database refuses go to the report.
+    columns = IMPORT_KINDS[kind]['columns']
+    table = 'MEDICINES' if kind == 'medicines' else 'MEDICINESTOCK'
+    row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    cursor = conn.cursor()
+    try:
+        if kind == 'stock' and any(values[0] is None for _, values in chunk):
+            # Locks the top of the STOCKID index until commit, so concurrent
+            # imports and form submits number their batches one after another.
+            cursor.execute("SELECT COALESCE(MAX(STOCKID), 0) FROM MEDICINESTOCK FOR UPDATE")
+            next_id = cursor.fetchone()[0]
+            numbered = []
+            for line, values in chunk:
+                if values[0] is None:
+                    next_id += 1
+                    values = (next_id,) + values[1:]
+                numbered.append((line, values))
+            chunk = numbered
+        try:
+            cursor.execute(insert + ', '.join([row_sql] * len(chunk)),
+                           [value for _, values in chunk for value in values])
+            inserted = len(chunk)
+        except mysql.connector.IntegrityError:
+            # A failed statement only undoes itself, so the STOCKID lock and
+            # the rows replayed below stay in this transaction.
+            inserted = 0
+            for line, values in chunk:
+                try:
+                    cursor.execute(insert + row_sql, values)
+                    inserted += 1
+                except mysql.connector.IntegrityError as err:
+                    add_import_error(report, line, err.msg)
+        conn.commit()
+        report['inserted'] += inserted
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def add_import_error(report, line, message):
+    report['rejected'] += 1
+    if report['error_limit'] is None or len(report['errors']) < report['error_limit']:
+        report['errors'].append((line, message))
+
+def import_csv(conn, kind, stream, error_limit=IMPORT_ERROR_LIMIT):
+    # stream is a text file object. Returns {'inserted', 'rejected', 'errors'}
+    # with at most error_limit (None for all) (line, message) pairs kept; raises ValueError if
+    # the header is unusable. Rows committed before a database error stay in.
+    spec = IMPORT_KINDS[kind]
+    report = {'inserted': 0, 'rejected': 0, 'errors': [], 'error_limit': error_limit}
+    reader = csv.reader(stream)
+    header = [name.strip().upper() for name in next(reader, [])]
+    missing = [name for name in spec['required'] if name not in header]
+    if missing:
+        raise ValueError(f'Missing column(s): {", ".join(missing)}.')
+    positions = {name: header.index(name) for name in spec['columns'] if name in header}
+
+    lists = get_reference_data(*spec['lists'], conn=conn)
+    known = {
+        'categories': {row['CATEGORYID'] for row in lists.get('categories', ())},
+        'branches': {row['BRANCHID'] for row in lists.get('branches', ())},
+        'medicines': {row['MEDICINEID'] for row in lists.get('medicines', ())},
+        'names': set(),
+        'stock_ids': set(),
+    }
+    chunk = []
+    for row in reader:
+        line = reader.line_num
+        if not any(field.strip() for field in row):
+            continue
+        if len(row) < len(header):
+            row = row + [''] * (len(header) - len(row))
+        try:
+            values = parse_import_row(kind, {name: row[i].strip() for name, i in positions.items()}, known)
+        except ValueError as err:
+            add_import_error(report, line, str(err))
+            continue
+        chunk.append((line, values))
+        if len(chunk) == IMPORT_CHUNK_SIZE:
+            insert_import_chunk(conn, kind, chunk, report)
+            chunk = []
+    if chunk:
+        insert_import_chunk(conn, kind, chunk, report)
+
+    if report['inserted']:
+        if kind == 'medicines':
+            invalidate_reference_data('medicines')
+            medicine_index.invalidate()
+        else:
+            inventory_index.invalidate()
+    del report['error_limit']
+    report['errors'].sort()
+    return report
+
+@app.cli.command('import-csv')
+@click.argument('kind', type=click.Choice(sorted(IMPORT_KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False, writable=True),
+              help='Write every rejected row (line, error) to this CSV file.')
+def import_csv_command(kind, path, errors_path):
+    """Bulk load medicines or stock batches from a CSV file."""
+    conn = get_db_connection()
+    if conn is None:
+        raise click.ClickException('Database connection error.')
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as stream:
+            report = import_csv(conn, kind, stream, error_limit=None if errors_path else 20)
+    except (ValueError, UnicodeDecodeError, csv.Error) as err:
+        raise click.ClickException(str(err))
+    except mysql.connector.Error as err:
+        raise click.ClickException(f'Error: {err}')
+    finally:
+        conn.close()
+    if errors_path:
+        with open(errors_path, 'w', newline='', encoding='utf-8') as out:
+            writer = csv.writer(out)
+            writer.writerow(('LINE', 'ERROR'))
+            writer.writerows(report['errors'])
+    else:
+        for line, message in report['errors']:
+            click.echo(f'line {line}: {message}', err=True)
+    click.echo(f"Imported {report['inserted']} row(s), rejected {report['rejected']}.")
+
 # --- Decorator for Access Control ---
 def login_required(role):
     def decorator(f):
@@ -138,24 +1501,31 @@ def forgot_password():
 def search_medicine():
     if request.method == 'POST':
         search_query = request.form.get('search_query', '')
-        conn = get_db_connection()
-        if conn is None:
+        index = get_medicine_index()
+        if index is None:
             flash('Database connection error.', 'danger')
             return render_template('search/search_form.html')
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT m.MEDICINEID, m.MEDICINENAME, m.PRICE, m.MANUFACTURER, mc.CATEGORYNAME
-            FROM MEDICINES m
-            LEFT JOIN MEDICINECATEGORY mc ON m.CATEGORYID = mc.CATEGORYID
-            WHERE m.MEDICINENAME LIKE %s
-        """
-        cursor.execute(query, (f'%{search_query}%',))
-        medicines = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return render_template('search/search_results.html', medicines=medicines, query=search_query)
+        fuzzy = bool(request.form.get('fuzzy'))
+        medicines = [] if fuzzy else index.search(search_query)
+        if not medicines:
+            # Nothing matched as typed: fall back to typo-tolerant matching.
+            medicines = index.fuzzy_search(search_query)
+            fuzzy = True
+        return render_template('search/search_results.html', medicines=medicines, query=search_query, fuzzy=fuzzy)
     return render_template('search/search_form.html')
 
+@app.route('/search/suggest')
+def suggest_medicine():
+    prefix = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', SUGGEST_LIMIT)), 1), SUGGEST_LIMIT)
+    except ValueError:
+        limit = SUGGEST_LIMIT
+    index = get_medicine_index()
+    if index is None:
+        return jsonify(error='Database connection error.'), 503
+    return jsonify(index.suggest(prefix, limit))
+
 @app.route('/medicine-details/<int:medicine_id>')
 def medicine_details(medicine_id):
     conn = get_db_connection()
@@ -175,36 +1545,324 @@ def medicine_details(medicine_id):
     conn.close()
     if not medicine:
         return render_template('404.html'), 404
-    return render_template('search/medicine_details.html', medicine=medicine)
-
-@app.route('/onlineorders')
-def view_online_orders():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    query = """
-    SELECT 
+    availability = branch_availability(medicine_id)
+    return render_template('search/medicine_details.html', medicine=medicine, availability=availability)
+
+@app.route('/availability')
+def medicine_availability():
+    # ?medicineid=1 for one medicine, or ?q=napa for every medicine the
+    # search index matches (up to SUGGEST_LIMIT).
+    medicine_id = request.args.get('medicineid', '')
+    query = request.args.get('q', '').strip()
+    if medicine_id.isdigit():
+        index = get_medicine_index()
+        if index is None:
+            return jsonify(error='Database connection error.'), 503
+        med = index.get(int(medicine_id))
+        medicines = [med] if med else []
+    elif query:
+        index = get_medicine_index()
+        if index is None:
+            return jsonify(error='Database connection error.'), 503
+        medicines = index.search(query, SUGGEST_LIMIT)
+    else:
+        return jsonify(error='Provide medicineid or q.'), 400
+
+    results = []
+    for med in medicines:
+        branches = branch_availability(med['MEDICINEID'])
+        if branches is None:
+            return jsonify(error='Database connection error.'), 503
+        results.append({
+            'MEDICINEID': med['MEDICINEID'],
+            'MEDICINENAME': med['MEDICINENAME'],
+            'BRANCHES': [{**entry, 'NEXTEXPIRY': entry['NEXTEXPIRY'].isoformat()} for entry in branches],
+        })
+    return jsonify(results)
+
+# --- Online Orders Feed ---
+# Paged by (ORDERDATE, ORDERID) keyset over the ORDERDATE index, newest first,
+# so a request holds one page of rows however many orders exist. A page cursor
+# is "<ORDERDATE in ISO format>_ORDERID" for the order at the edge of a page.
+ONLINE_ORDERS_QUERY = """
+    SELECT
         o.ORDERID,
         o.ORDERDATE,
+        o.CUSTOMERID,
+        sd.BRANCHID,
         c.CUSTOMERNAME,
         o.DELIVERYADDRESS,
         sd.TOTALAMOUNT,
         COALESCE(m.MEDICINENAME, 'N/A') AS MEDICINENAME,
-        COALESCE(sd.QUANTITY, 'N/A') AS QUANTITY
-    FROM 
+        COALESCE(NULLIF(sd.QUANTITY, 0), 'N/A') AS QUANTITY
+    FROM
         ONLINEORDERS o
     JOIN CUSTOMERS c ON o.CUSTOMERID = c.CUSTOMERID
     JOIN SALESDETAILS sd ON o.SALEDETAILID = sd.SALEDETAILID
-    LEFT JOIN MEDICINES m ON sd.MEDICINEID = m.MEDICINEID;
-    """
+    LEFT JOIN MEDICINES m ON sd.MEDICINEID = m.MEDICINEID
+"""
+
+def encode_order_cursor(order):
+    return f"{order['ORDERDATE'].isoformat()}_{order['ORDERID']}"
 
-    cursor.execute(query)
+def decode_order_cursor(value):
+    try:
+        order_date, order_id = value.split('_')
+        return datetime.datetime.fromisoformat(order_date), int(order_id)
+    except (AttributeError, ValueError):
+        return None
+
+def parse_order_filters(args):
+    # Keeps only the filters that parse; the rest are dropped rather than
+    # failing the page. Values stay strings so they can go back into links.
+    filters = {}
+    for name in ('date_from', 'date_to'):
+        value = args.get(name, '').strip()
+        try:
+            datetime.date.fromisoformat(value)
+            filters[name] = value
+        except ValueError:
+            pass
+    for name in ('customerid', 'branchid'):
+        value = args.get(name, '').strip()
+        if value.isdigit():
+            filters[name] = value
+    return filters
+
+def order_filter_conditions(filters):
+    conditions, params = [], []
+    if 'date_from' in filters:
+        conditions.append("o.ORDERDATE >= %s")
+        params.append(filters['date_from'])
+    if 'date_to' in filters:
+        conditions.append("o.ORDERDATE < %s + INTERVAL 1 DAY")
+        params.append(filters['date_to'])
+    if 'customerid' in filters:
+        conditions.append("o.CUSTOMERID = %s")
+        params.append(int(filters['customerid']))
+    if 'branchid' in filters:
+        conditions.append("sd.BRANCHID = %s")
+        params.append(int(filters['branchid']))
+    return conditions, params
+
+def fetch_online_orders_page(cursor, filters, after=None, before=None, limit=ORDERS_PAGE_SIZE):
+    # Returns (orders, newer_cursor, older_cursor), like fetch_sales_page.
+    # Expects a dictionary cursor.
+    conditions, params = order_filter_conditions(filters)
+    order = "DESC"
+    if before is not None:
+        conditions.append("(o.ORDERDATE > %s OR (o.ORDERDATE = %s AND o.ORDERID > %s))")
+        params.extend((before[0], before[0], before[1]))
+        order = "ASC"
+    elif after is not None:
+        conditions.append("(o.ORDERDATE < %s OR (o.ORDERDATE = %s AND o.ORDERID < %s))")
+        params.extend((after[0], after[0], after[1]))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cursor.execute(f"""
+        {ONLINE_ORDERS_QUERY}
+        {where}
+        ORDER BY o.ORDERDATE {order}, o.ORDERID {order}
+        LIMIT %s
+    """, params + [limit + 1])
     orders = cursor.fetchall()
+    more = len(orders) > limit
+    orders = orders[:limit]
+    if before is not None:
+        orders.reverse()
+    if not orders:
+        return [], None, None
+
+    if before is not None:
+        newer = encode_order_cursor(orders[0]) if more else None
+        older = encode_order_cursor(orders[-1])
+    else:
+        newer = encode_order_cursor(orders[0]) if after is not None else None
+        older = encode_order_cursor(orders[-1]) if more else None
+    return orders, newer, older
 
+def render_online_orders():
+    filters = parse_order_filters(request.args)
+    conn = get_db_connection()
+    if conn is None:
+        flash('Database connection error.', 'danger')
+        return render_template('employee/online_orders.html', orders=[], newer=None, older=None,
+                               filters=filters, branches=[])
+    cursor = conn.cursor(dictionary=True)
+    orders, newer, older = fetch_online_orders_page(
+        cursor, filters,
+        after=decode_order_cursor(request.args.get('after')),
+        before=decode_order_cursor(request.args.get('before')))
     cursor.close()
+    branches = get_reference_data('branches', conn=conn)['branches']
     conn.close()
+    # Staff on the newest page get new orders pushed to them instead of reloading.
+    live = request.endpoint == 'employee_online_orders' and newer is None and 'date_to' not in filters
+    live_last_id = orders[0]['ORDERID'] if orders else order_feed.last_id()
+    return render_template('employee/online_orders.html', orders=orders, newer=newer, older=older,
+                           filters=filters, branches=branches, live=live, live_last_id=live_last_id)
+
+# --- Live Order Feed ---
+# One poller thread per worker reads recent orders and keeps the most recent
+# ORDER_FEED_BACKLOG of them, pre-encoded, in memory. Streams wait on a
+# condition for the poller, so the database sees one small query per interval
+# however many browsers are connected. Each open stream holds a server thread:
+# run gunicorn with a threaded or async worker class (e.g. -k gthread
+# --threads 200) to serve hundreds of them.
+#
+# ORDERID is no tail to follow: a lower ID can commit after a higher one has
+# been read, and on TiDB IDs from different servers interleave. So every poll
+# re-reads the orders dated within ORDER_FEED_OVERLAP seconds of the newest one
+# seen and skips those it already has; an order is only missed if its
+# transaction took longer than the overlap to commit. Orders are numbered in
+# the order the poller found them and streams keep their place by that number.
+class OrderFeed:
+    def __init__(self, poll_interval, backlog, overlap):
+        self.poll_interval = poll_interval
+        self.overlap = datetime.timedelta(seconds=overlap)
+        self._cond = threading.Condition()
+        self._orders = deque(maxlen=backlog)
+        self._seq = 0
+        self._seen = {}
+        self._newest = None
+        self._primed = False
+        self._subscribers = 0
+        self._pid = None
+
+    def last_id(self):
+        # ORDERID of the last order the poller found, if it has started.
+        with self._cond:
+            return self._orders[-1][1] if self._pid == os.getpid() and self._orders else None
+
+    def subscribe(self):
+        # Starts this worker's poller on first use.
+        with self._cond:
+            self._subscribers += 1
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._orders.clear()
+            self._seen.clear()
+            self._newest = None
+            self._primed = False
+            self._subscribers = 1
+        threading.Thread(target=self._run, name='order-feed', daemon=True).start()
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def wait(self, position, last_id, timeout):
+        # Waits up to timeout for orders after position and returns (orders,
+        # position) with the caller's new position. Orders are (order_id,
+        # customer_id, branch_id, payload) tuples. A stream starts with
+        # position None and the ORDERID it saw last (None means "from now
+        # on"); its place is found once the poller has read the current window.
+        with self._cond:
+            if position is None:
+                if not self._cond.wait_for(lambda: self._primed, timeout):
+                    return [], None
+                position = self._position_after(last_id)
+            self._cond.wait_for(lambda: self._seq > position, timeout)
+            return [order[1:] for order in self._orders if order[0] > position], max(position, self._seq)
+
+    def _position_after(self, last_id):
+        # Just after order last_id in the backlog; failing that, just before
+        # the first order with a higher ORDERID. Anything delivered twice is
+        # dropped by the page, which skips orders it already shows.
+        if last_id is None:
+            return self._seq
+        later = None
+        for seq, order_id, *_ in self._orders:
+            if order_id == last_id:
+                return seq
+            if order_id > last_id and later is None:
+                later = seq - 1
+        return self._seq if later is None else later
+
+    def _run(self):
+        while True:
+            if self._subscribers > 0:
+                try:
+                    self._poll()
+                except mysql.connector.Error as err:
+                    print(f"Order Feed Error: {err}")
+            time.sleep(self.poll_interval)
+
+    def _poll(self):
+        conn = get_db_connection()
+        if conn is None:
+            return
+        cursor = conn.cursor(dictionary=True)
+        try:
+            if self._newest is None:
+                cursor.execute(f"""
+                    {ONLINE_ORDERS_QUERY}
+                    WHERE o.ORDERDATE >= NOW() - INTERVAL %s SECOND
+                    ORDER BY o.ORDERDATE, o.ORDERID
+                """, (int(self.overlap.total_seconds()),))
+            else:
+                cursor.execute(f"""
+                    {ONLINE_ORDERS_QUERY}
+                    WHERE o.ORDERDATE >= %s
+                    ORDER BY o.ORDERDATE, o.ORDERID
+                """, (self._newest - self.overlap,))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        rows = [row for row in rows if row['ORDERID'] not in self._seen]
+        orders = [(row['ORDERID'], row['CUSTOMERID'], row['BRANCHID'], json.dumps({
+            'ORDERID': row['ORDERID'],
+            'ORDERDATE': row['ORDERDATE'].strftime('%Y-%m-%d %H:%M'),
+            'CUSTOMERNAME': row['CUSTOMERNAME'],
+            'DELIVERYADDRESS': row['DELIVERYADDRESS'],
+            'TOTALAMOUNT': f"{row['TOTALAMOUNT']:.2f}",
+            'MEDICINENAME': row['MEDICINENAME'],
+            'QUANTITY': str(row['QUANTITY']),
+        })) for row in rows]
+        with self._cond:
+            for row in rows:
+                self._seen[row['ORDERID']] = row['ORDERDATE']
+                if self._newest is None or row['ORDERDATE'] > self._newest:
+                    self._newest = row['ORDERDATE']
+            if self._newest is not None:
+                # Only IDs still inside the next poll's window can come back.
+                since = self._newest - self.overlap
+                self._seen = {order_id: date for order_id, date in self._seen.items() if date >= since}
+            for order in orders:
+                self._seq += 1
+                self._orders.append((self._seq, *order))
+            if orders or not self._primed:
+                self._primed = True
+                self._cond.notify_all()
+
+order_feed = OrderFeed(ORDER_FEED_POLL_INTERVAL, ORDER_FEED_BACKLOG, ORDER_FEED_OVERLAP)
+
+def stream_orders(last_id, filters):
+    # Server-sent events: one "id:/data:" event per new order, and a comment
+    # line while idle so dead connections are noticed and released.
+    order_feed.subscribe()
+    try:
+        yield 'retry: 5000\n\n'
+        position = None
+        while True:
+            orders, position = order_feed.wait(position, last_id, ORDER_FEED_KEEPALIVE)
+            if not orders:
+                yield ': keepalive\n\n'
+                continue
+            for order_id, customer_id, branch_id, payload in orders:
+                if 'customerid' in filters and str(customer_id) != filters['customerid']:
+                    continue
+                if 'branchid' in filters and str(branch_id) != filters['branchid']:
+                    continue
+                yield f"id: {order_id}\ndata: {payload}\n\n"
+    finally:
+        order_feed.unsubscribe()
 
-    return render_template('onlineorders.html', orders=orders)
+@app.route('/onlineorders')
+@login_required('employee')
+def view_online_orders():
+    return render_online_orders()
 
 # --- Customer Routes ---
 @app.route('/customer/login', methods=['GET', 'POST'])
@@ -254,6 +1912,7 @@ def customer_signup():
                 (customer_id, name, contact, email, password)
             )
             conn.commit()
+            invalidate_reference_data('customers')
             flash('Account created successfully! Please log in.', 'success')
             return redirect(url_for('customer_login'))
         except mysql.connector.Error as err:
@@ -276,8 +1935,6 @@ def add_to_cart(medicine_id):
         flash('You must be logged in as a customer to add items to the cart.', 'warning')
         return redirect(url_for('customer_login'))
 
-    cart = session.get('cart', {})
-    medicine_id_str = str(medicine_id)
     try:
         quantity = int(request.form.get('quantity', 1))
         if quantity < 1:
@@ -285,46 +1942,34 @@ def add_to_cart(medicine_id):
     except (ValueError, TypeError):
         quantity = 1
     
-    if medicine_id_str in cart:
-        cart[medicine_id_str] += quantity
-    else:
-        cart[medicine_id_str] = quantity
-        
-    session['cart'] = cart
+    get_cart_store().add(session['user_id'], medicine_id, quantity)
     flash('Item added to cart!', 'success')
     return redirect(url_for('cart_details'))
 
+def insert_online_order(cursor, sale_id, customer_id, branch_id, employee_id, payment_method, delivery_address, items):
+    # The same number of statements whatever the cart size: the sale lines go
+    # in as one multi-row INSERT, their new SALEDETAILIDs are read back by
+    # SALEID (a plain, non-locking read on the SALEID index), and the
+    # ONLINEORDERS rows go in as one more multi-row INSERT. An INSERT ... SELECT
+    # would take shared locks on what it reads and queue concurrent sales.
+    insert_sale_lines(cursor, sale_id, branch_id, customer_id, employee_id, payment_method, items)
+    cursor.execute("SELECT SALEDETAILID FROM SALESDETAILS WHERE SALEID = %s", (sale_id,))
+    detail_ids = [row[0] for row in cursor.fetchall()]
+    placeholders = ', '.join(['(%s, %s, NOW(), %s)'] * len(detail_ids))
+    cursor.execute(f"""
+        INSERT INTO ONLINEORDERS (CUSTOMERID, SALEDETAILID, ORDERDATE, DELIVERYADDRESS)
+        VALUES {placeholders}
+    """, [value for detail_id in detail_ids for value in (customer_id, detail_id, delivery_address)])
+
 @app.route('/customer/cart', methods=['GET', 'POST'])
 @login_required('customer')
 def cart_details():
-    cart_items_ids = session.get('cart', {})
-    medicines_in_cart = []
-    total_price = 0
+    priced = cart_pricer.price(get_cart(session['user_id']))
+    if priced is None:
+        flash('Database connection error.', 'danger')
+        return render_template('customer/cart_details.html', cart_items=[], total_price=0)
+    medicines_in_cart, total_price = priced
 
-    if cart_items_ids:
-        conn = get_db_connection()
-        if conn is None:
-            flash('Database connection error.', 'danger')
-            return render_template('customer/cart_details.html', cart_items=[], total_price=0)
-        cursor = conn.cursor(dictionary=True)
-        
-        medicine_ids = list(cart_items_ids.keys())
-        if medicine_ids:
-            query_placeholders = ','.join(['%s'] * len(medicine_ids))
-            query = f"SELECT MEDICINEID, MEDICINENAME, PRICE FROM MEDICINES WHERE MEDICINEID IN ({query_placeholders})"
-            cursor.execute(query, tuple(medicine_ids))
-            medicines_data = {str(med['MEDICINEID']): med for med in cursor.fetchall()}
-
-            for med_id, quantity in cart_items_ids.items():
-                med_data = medicines_data.get(med_id)
-                if med_data:
-                    subtotal = med_data['PRICE'] * quantity
-                    total_price += subtotal
-                    medicines_in_cart.append({**med_data, 'quantity': quantity, 'subtotal': subtotal})
-        
-        cursor.close()
-        conn.close()
-    
     if request.method == 'POST':
         delivery_address = request.form.get('address')
         payment_method = request.form.get('payment')
@@ -343,22 +1988,37 @@ def cart_details():
             branch_id = 1 
             employee_id = 153398
 
-            for item in medicines_in_cart:
-                cursor.execute("""
-                    INSERT INTO SALESDETAILS (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PRICEPERUNIT, TOTALAMOUNT, PAYMENTMETHOD, MEDICINEID, QUANTITY)
-                    VALUES (NULL, CURDATE(), %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (branch_id, customer_id, employee_id, item['PRICE'], item['subtotal'], payment_method, item['MEDICINEID'], item['quantity']))
-                sale_detail_id = cursor.lastrowid
-
-                cursor.execute("""
-                    INSERT INTO ONLINEORDERS (CUSTOMERID, SALEDETAILID, ORDERDATE, DELIVERYADDRESS)
-                    VALUES (%s, %s, NOW(), %s)
-                """, (customer_id, sale_detail_id, delivery_address))
-
+            sale_id = sale_ids.allocate(conn)
+            # Charge prices read in this transaction: the memoised cart can be
+            # up to CART_PRICE_TTL old when a price was edited on another worker.
+            price_cursor = conn.cursor(dictionary=True)
+            prices = fetch_prices(price_cursor, [item['MEDICINEID'] for item in medicines_in_cart])
+            price_cursor.close()
+            if len(prices) < len(medicines_in_cart):
+                conn.rollback()
+                cart_pricer.bump()
+                flash('Some items in your cart are no longer available. Please review your cart.', 'warning')
+                return redirect(url_for('cart_details'))
+            items = [{**item, 'PRICE': prices[item['MEDICINEID']], 'subtotal': prices[item['MEDICINEID']] * item['quantity']}
+                     for item in medicines_in_cart]
+            if any(item['PRICE'] != shown['PRICE'] for item, shown in zip(items, medicines_in_cart)):
+                # Never charge a total the customer was not shown: show the
+                # new prices and let them place the order again.
+                conn.rollback()
+                cart_pricer.bump()
+                flash('Prices in your cart have changed. Please review the new total before placing your order.', 'warning')
+                return render_template('customer/cart_details.html', cart_items=items,
+                                       total_price=sum(item['subtotal'] for item in items))
+            taken = consume_stock(conn, branch_id, items)
+            insert_online_order(cursor, sale_id, customer_id, branch_id, employee_id, payment_method, delivery_address, items)
             conn.commit()
-            session.pop('cart', None)
+            inventory_index.consume(taken)
+            get_cart_store().clear(customer_id)
             flash('Your order has been placed successfully!', 'success')
             return redirect(url_for('previous_orders'))
+        except OutOfStock as err:
+            conn.rollback()
+            flash(f'Sorry, some items are out of stock: {describe_shortages(err.shortages)}.', 'danger')
         except mysql.connector.Error as err:
             conn.rollback()
             flash(f"An error occurred while placing the order: {err}", 'danger')
@@ -447,6 +2107,7 @@ def employee_signup():
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (employee_id, name, email, pin, designation, contact, branch_id))
             conn.commit()
+            invalidate_reference_data('employees')
             new_employee_id = employee_id
         except mysql.connector.Error as err:
             flash(f'Error: {err}', 'danger')
@@ -454,18 +2115,12 @@ def employee_signup():
             cursor.close()
             conn.close()
 
-    conn = get_db_connection()
-    if conn is None:
+    lists = get_reference_data('branches')
+    if lists is None:
         flash('Database connection error.', 'danger')
         return render_template('employee/signup.html', branches=[], new_employee_id=new_employee_id)
 
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT BRANCHID, BRANCHNAME FROM BRANCHES")
-    branches = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    return render_template('employee/signup.html', branches=branches, new_employee_id=new_employee_id)
+    return render_template('employee/signup.html', branches=lists['branches'], new_employee_id=new_employee_id)
 
 
 @app.route('/employee/dashboard')
@@ -501,6 +2156,7 @@ def employee_add_medicine_category():
         try:
             cursor.execute("INSERT INTO MEDICINECATEGORY (CATEGORYNAME, CATAGORYDETAILS) VALUES (%s, %s)", (name, details))
             conn.commit()
+            invalidate_reference_data('categories')
             flash('Medicine category added successfully!', 'success')
             return redirect(url_for('employee_medicine_category'))
         except mysql.connector.Error as err:
@@ -525,6 +2181,8 @@ def employee_edit_medicine_category(category_id):
         try:
             update_cursor.execute("UPDATE MEDICINECATEGORY SET CATEGORYNAME = %s, CATAGORYDETAILS = %s WHERE CATEGORYID = %s", (name, details, category_id))
             conn.commit()
+            invalidate_reference_data('categories')
+            medicine_index.rename_category(category_id, name)
             flash('Medicine category updated successfully!', 'success')
             return redirect(url_for('employee_medicine_category'))
         except mysql.connector.Error as err:
@@ -551,6 +2209,7 @@ def employee_delete_medicine_category(category_id):
     try:
         cursor.execute("DELETE FROM MEDICINECATEGORY WHERE CATEGORYID = %s", (category_id,))
         conn.commit()
+        invalidate_reference_data('categories')
         flash('Medicine category deleted successfully.', 'success')
     except mysql.connector.Error as err:
         flash(f'Error deleting category. It might be in use by medicines. Error: {err}', 'danger')
@@ -590,6 +2249,8 @@ def employee_add_medicine():
             cursor.execute("INSERT INTO MEDICINES (MEDICINENAME, CATEGORYID, MANUFACTURER, PRICE) VALUES (%s, %s, %s, %s)",
                            (name, categoryid if categoryid else None, manufacturer, price))
             conn.commit()
+            invalidate_reference_data('medicines')
+            refresh_indexed_medicine(conn, cursor.lastrowid)
             flash('Medicine added successfully!', 'success')
             return redirect(url_for('employee_medicines'))
         except mysql.connector.Error as err:
@@ -598,16 +2259,11 @@ def employee_add_medicine():
             cursor.close()
             conn.close()
     
-    conn = get_db_connection()
-    if conn is None:
+    lists = get_reference_data('categories')
+    if lists is None:
         flash('Database connection error.', 'danger')
         return render_template('employee/add_edit_medicine.html', action='Add', medicine=None, categories=[])
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT CATEGORYID, CATEGORYNAME FROM MEDICINECATEGORY")
-    categories = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return render_template('employee/add_edit_medicine.html', action='Add', medicine=None, categories=categories)
+    return render_template('employee/add_edit_medicine.html', action='Add', medicine=None, categories=lists['categories'])
 
 @app.route('/employee/medicine/edit/<int:medicine_id>', methods=['GET', 'POST'])
 @login_required('employee')
@@ -627,6 +2283,9 @@ def employee_edit_medicine(medicine_id):
             update_cursor.execute("UPDATE MEDICINES SET MEDICINENAME=%s, CATEGORYID=%s, MANUFACTURER=%s, PRICE=%s WHERE MEDICINEID=%s",
                                   (name, categoryid if categoryid else None, manufacturer, price, medicine_id))
             conn.commit()
+            invalidate_reference_data('medicines')
+            cart_pricer.bump()
+            refresh_indexed_medicine(conn, medicine_id)
             flash('Medicine updated successfully!', 'success')
             return redirect(url_for('employee_medicines'))
         except mysql.connector.Error as err:
@@ -637,8 +2296,7 @@ def employee_edit_medicine(medicine_id):
     cursor.execute("SELECT * FROM MEDICINES WHERE MEDICINEID = %s", (medicine_id,))
     medicine = cursor.fetchone()
     
-    cursor.execute("SELECT CATEGORYID, CATEGORYNAME FROM MEDICINECATEGORY")
-    categories = cursor.fetchall()
+    categories = get_reference_data('categories', conn=conn)['categories']
     
     cursor.close()
     conn.close()
@@ -657,6 +2315,9 @@ def employee_delete_medicine(medicine_id):
     try:
         cursor.execute("DELETE FROM MEDICINES WHERE MEDICINEID = %s", (medicine_id,))
         conn.commit()
+        invalidate_reference_data('medicines')
+        cart_pricer.bump()
+        medicine_index.remove(medicine_id)
         flash('Medicine deleted successfully.', 'success')
     except mysql.connector.Error as err:
         flash(f'Error deleting medicine. Error: {err}', 'danger')
@@ -665,6 +2326,13 @@ def employee_delete_medicine(medicine_id):
         conn.close()
     return redirect(url_for('employee_medicines'))
 
+MEDICINE_STOCK_QUERY = """
+    SELECT ms.*, b.BRANCHNAME, m.MEDICINENAME
+    FROM MEDICINESTOCK ms
+    JOIN BRANCHES b ON ms.BRANCHID = b.BRANCHID
+    JOIN MEDICINES m ON ms.MEDICINEID = m.MEDICINEID
+"""
+
 @app.route('/employee/medicine-stock')
 @login_required('employee')
 def employee_medicine_stock():
@@ -673,18 +2341,17 @@ def employee_medicine_stock():
         flash('Database connection error.', 'danger')
         return render_template('employee/medicine_stock.html', stocks=[])
     cursor = conn.cursor(dictionary=True)
-    query = """
-        SELECT ms.*, b.BRANCHNAME, m.MEDICINENAME 
-        FROM MEDICINESTOCK ms 
-        JOIN BRANCHES b ON ms.BRANCHID = b.BRANCHID 
-        JOIN MEDICINES m ON ms.MEDICINEID = m.MEDICINEID
-    """
-    cursor.execute(query)
+    cursor.execute(MEDICINE_STOCK_QUERY)
     stocks = cursor.fetchall()
     cursor.close()
     conn.close()
     return render_template('employee/medicine_stock.html', stocks=stocks)
 
+@app.route('/employee/medicine-stock/export')
+@login_required('employee')
+def employee_medicine_stock_export():
+    return export_csv(f"{MEDICINE_STOCK_QUERY} ORDER BY ms.STOCKID", (), 'medicine-stock', 'employee_medicine_stock')
+
 @app.route('/employee/medicine-stock/add', methods=['GET', 'POST'])
 @login_required('employee')
 def employee_add_medicine_stock():
@@ -703,6 +2370,7 @@ def employee_add_medicine_stock():
             cursor.execute("INSERT INTO MEDICINESTOCK (STOCKID, BRANCHID, MEDICINEID, QUANTITY, EXPIRYDATE) VALUES (%s, %s, %s, %s, %s)",
                            (stockid, branchid, medicineid, quantity, expirydate))
             conn.commit()
+            refresh_indexed_stock(conn, stockid)
             flash('Stock record added successfully!', 'success')
             return redirect(url_for('employee_medicine_stock'))
         except mysql.connector.Error as err:
@@ -711,18 +2379,11 @@ def employee_add_medicine_stock():
             cursor.close()
             conn.close()
 
-    conn = get_db_connection()
-    if conn is None:
+    lists = get_reference_data('branches', 'medicines')
+    if lists is None:
         flash('Database connection error.', 'danger')
         return render_template('employee/add_edit_medicine_stock.html', action='Add', stock=None, branches=[], medicines=[])
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT BRANCHID, BRANCHNAME FROM BRANCHES")
-    branches = cursor.fetchall()
-    cursor.execute("SELECT MEDICINEID, MEDICINENAME FROM MEDICINES")
-    medicines = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return render_template('employee/add_edit_medicine_stock.html', action='Add', stock=None, branches=branches, medicines=medicines)
+    return render_template('employee/add_edit_medicine_stock.html', action='Add', stock=None, branches=lists['branches'], medicines=lists['medicines'])
 
 @app.route('/employee/medicine-stock/edit/<int:stock_id>', methods=['GET', 'POST'])
 @login_required('employee')
@@ -741,6 +2402,7 @@ def employee_edit_medicine_stock(stock_id):
             update_cursor.execute("UPDATE MEDICINESTOCK SET BRANCHID=%s, MEDICINEID=%s, QUANTITY=%s, EXPIRYDATE=%s WHERE STOCKID=%s",
                                   (branchid, medicineid, quantity, expirydate, stock_id))
             conn.commit()
+            refresh_indexed_stock(conn, stock_id)
             flash('Stock record updated successfully!', 'success')
             return redirect(url_for('employee_medicine_stock'))
         except mysql.connector.Error as err:
@@ -751,15 +2413,12 @@ def employee_edit_medicine_stock(stock_id):
     cursor = conn.cursor(dictionary=True)
     cursor.execute("SELECT * FROM MEDICINESTOCK WHERE STOCKID = %s", (stock_id,))
     stock = cursor.fetchone()
-    cursor.execute("SELECT BRANCHID, BRANCHNAME FROM BRANCHES")
-    branches = cursor.fetchall()
-    cursor.execute("SELECT MEDICINEID, MEDICINENAME FROM MEDICINES")
-    medicines = cursor.fetchall()
+    lists = get_reference_data('branches', 'medicines', conn=conn)
     cursor.close()
     conn.close()
     if not stock:
         return render_template('404.html'), 404
-    return render_template('employee/add_edit_medicine_stock.html', action='Edit', stock=stock, branches=branches, medicines=medicines)
+    return render_template('employee/add_edit_medicine_stock.html', action='Edit', stock=stock, branches=lists['branches'], medicines=lists['medicines'])
 
 @app.route('/employee/medicine-stock/delete/<int:stock_id>', methods=['POST'])
 @login_required('employee')
@@ -772,6 +2431,7 @@ def employee_delete_medicine_stock(stock_id):
     try:
         cursor.execute("DELETE FROM MEDICINESTOCK WHERE STOCKID = %s", (stock_id,))
         conn.commit()
+        inventory_index.remove(stock_id)
         flash('Stock record deleted successfully.', 'success')
     except mysql.connector.Error as err:
         flash(f'Error: {err}', 'danger')
@@ -780,36 +2440,173 @@ def employee_delete_medicine_stock(stock_id):
         conn.close()
     return redirect(url_for('employee_medicine_stock'))
 
+@app.route('/employee/import', methods=['GET', 'POST'])
+@login_required('employee')
+def employee_import():
+    kind = request.values.get('kind', 'stock')
+    if kind not in IMPORT_KINDS:
+        kind = 'stock'
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            flash('Please choose a CSV file to import.', 'warning')
+            return redirect(url_for('employee_import', kind=kind))
+        conn = get_db_connection()
+        if conn is None:
+            flash('Database connection error.', 'danger')
+            return redirect(url_for('employee_import', kind=kind))
+        try:
+            report = import_csv(conn, kind, io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+            flash(f"Imported {report['inserted']} row(s), rejected {report['rejected']}.",
+                  'warning' if report['rejected'] else 'success')
+        except (ValueError, UnicodeDecodeError, csv.Error) as err:
+            flash(f'Could not read the file: {err}', 'danger')
+        except mysql.connector.Error as err:
+            flash(f'Error: {err}', 'danger')
+        finally:
+            conn.close()
+    return render_template('employee/import.html', kind=kind, kinds=IMPORT_KINDS, report=report)
+
+@app.route('/employee/stock-alerts')
+@login_required('employee')
+def employee_stock_alerts():
+    try:
+        days = min(max(int(request.args.get('days', EXPIRY_ALERT_DAYS)), 0), 3650)
+    except ValueError:
+        days = EXPIRY_ALERT_DAYS
+    branch_id = request.args.get('branchid', '')
+    branch_id = int(branch_id) if branch_id.isdigit() else None
+    index = get_inventory_index()
+    medicines = get_medicine_index()
+    lists = get_reference_data('branches')
+    if index is None or medicines is None or lists is None:
+        flash('Database connection error.', 'danger')
+        return render_template('employee/stock_alerts.html', expiring=[], low_stock=[], branches=[], days=days, branch_id=branch_id)
+
+    branch_names = {branch['BRANCHID']: branch['BRANCHNAME'] for branch in lists['branches']}
+    expiring = index.expiring(days, branch_id)
+    low_stock = index.low_stock(branch_id)
+    for row in expiring + low_stock:
+        med = medicines.get(row['MEDICINEID'])
+        row['MEDICINENAME'] = med['MEDICINENAME'] if med else 'N/A'
+        row['BRANCHNAME'] = branch_names.get(row['BRANCHID'], 'N/A')
+    return render_template('employee/stock_alerts.html', expiring=expiring, low_stock=low_stock,
+                           branches=lists['branches'], days=days, branch_id=branch_id)
+
+@app.route('/employee/stock-alerts/reorder-level', methods=['POST'])
+@login_required('employee')
+def employee_set_reorder_level():
+    branchid = request.form['branchid']
+    medicineid = request.form['medicineid']
+    level = request.form['reorderlevel']
+    conn = get_db_connection()
+    if conn is None:
+        flash('Database connection error.', 'danger')
+        return redirect(url_for('employee_stock_alerts'))
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO REORDERLEVELS (MEDICINEID, BRANCHID, REORDERLEVEL) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE REORDERLEVEL = VALUES(REORDERLEVEL)
+        """, (medicineid, branchid, level))
+        conn.commit()
+        inventory_index.set_level(int(medicineid), int(branchid), int(level))
+        flash('Reorder level saved.', 'success')
+    except mysql.connector.Error as err:
+        flash(f'Error: {err}', 'danger')
+    finally:
+        cursor.close()
+        conn.close()
+    return redirect(url_for('employee_stock_alerts'))
+
+# --- Sales Ledger ---
+# The ledger reads one pre-aggregated SALESSUMMARY row per sale and is paged
+# by (SALEDATE, SALEID) keyset rather than OFFSET, so each page is a bounded
+# walk of the SALEDATE_SALEID index wherever it starts.
+# A page cursor is "YYYY-MM-DD_SALEID" for the sale at the edge of a page.
+def encode_sale_cursor(sale):
+    return f"{sale['SALEDATE'].isoformat()}_{sale['SALEID']}"
+
+def decode_sale_cursor(value):
+    try:
+        sale_date, sale_id = value.split('_')
+        return datetime.date.fromisoformat(sale_date), int(sale_id)
+    except (AttributeError, ValueError):
+        return None
+
+def fetch_sales_page(cursor, after=None, before=None, limit=SALES_PAGE_SIZE):
+    # Returns (sales, newer_cursor, older_cursor). Pass the older cursor back
+    # as after= for the next page and the newer one as before= for the
+    # previous page. Expects a dictionary cursor.
+    if before is not None:
+        where = "WHERE SALEDATE > %s OR (SALEDATE = %s AND SALEID > %s)"
+        params = (before[0], before[0], before[1])
+        order = "ASC"
+    elif after is not None:
+        where = "WHERE SALEDATE < %s OR (SALEDATE = %s AND SALEID < %s)"
+        params = (after[0], after[0], after[1])
+        order = "DESC"
+    else:
+        where, params, order = "", (), "DESC"
+    cursor.execute(f"""
+        SELECT SALEID, SALEDATE, CUSTOMERID, GRANDTOTAL as GrandTotal, PAYMENTMETHOD
+        FROM SALESSUMMARY
+        {where}
+        ORDER BY SALEDATE {order}, SALEID {order}
+        LIMIT %s
+    """, params + (limit + 1,))
+    sales = cursor.fetchall()
+    more = len(sales) > limit
+    sales = sales[:limit]
+    if before is not None:
+        sales.reverse()
+    if not sales:
+        return [], None, None
+
+    if before is not None:
+        newer = encode_sale_cursor(sales[0]) if more else None
+        older = encode_sale_cursor(sales[-1])
+    else:
+        newer = encode_sale_cursor(sales[0]) if after is not None else None
+        older = encode_sale_cursor(sales[-1]) if more else None
+    return sales, newer, older
+
 @app.route('/employee/sales')
 @login_required('employee')
 def employee_sales():
     conn = get_db_connection()
     if conn is None:
         flash('Database connection error.', 'danger')
-        return render_template('employee/sales.html', sales=[])
+        return render_template('employee/sales.html', sales=[], newer=None, older=None)
     cursor = conn.cursor(dictionary=True)
-    query = """
-        SELECT SALEID, SALEDATE, CUSTOMERID, SUM(TOTALAMOUNT) as GrandTotal, PAYMENTMETHOD
-        FROM SALESDETAILS 
-        GROUP BY SALEID, SALEDATE, CUSTOMERID, PAYMENTMETHOD
-        ORDER BY SALEDATE DESC, SALEID DESC
-    """
-    cursor.execute(query)
-    sales = cursor.fetchall()
+    sales, newer, older = fetch_sales_page(
+        cursor,
+        after=decode_sale_cursor(request.args.get('after')),
+        before=decode_sale_cursor(request.args.get('before')))
     cursor.close()
     conn.close()
-    return render_template('employee/sales.html', sales=sales)
+    return render_template('employee/sales.html', sales=sales, newer=newer, older=older)
+
+@app.route('/employee/sales/export')
+@login_required('employee')
+def employee_sales_export():
+    return export_csv("""
+        SELECT SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PAYMENTMETHOD, LINECOUNT, GRANDTOTAL
+        FROM SALESSUMMARY
+        ORDER BY SALEDATE DESC, SALEID DESC
+    """, (), 'sales', 'employee_sales')
 
 @app.route('/employee/add-sale', methods=['GET', 'POST'])
 @login_required('employee')
 def employee_add_sale():
-    conn = get_db_connection()
-    if conn is None:
-        flash('Database connection error.', 'danger')
-        return redirect(url_for('employee_dashboard'))
-    cursor = conn.cursor(dictionary=True)
-
     if request.method == 'POST':
+        conn = get_db_connection()
+        if conn is None:
+            flash('Database connection error.', 'danger')
+            return redirect(url_for('employee_dashboard'))
+        cursor = conn.cursor(dictionary=True)
+
         customerid = request.form.get('customerid')
         payment_method = request.form.get('payment')
         employee_id = session['user_id']
@@ -817,35 +2614,43 @@ def employee_add_sale():
         cursor.execute("SELECT BRANCHID FROM EMPLOYEES WHERE EMPLOYEEID = %s", (employee_id,))
         branch_id = cursor.fetchone()['BRANCHID']
         
-        cursor.execute("SELECT MAX(SALEID) as max_id FROM SALESDETAILS")
-        max_id = cursor.fetchone()['max_id']
-        new_sale_id = (max_id or 0) + 1
-
         items_to_add = []
-        for i in range(5):
-            med_id = request.form.get(f'medicineid_{i}')
-            quantity = request.form.get(f'quantity_{i}')
+        for key in request.form:
+            if not key.startswith('medicineid_'):
+                continue
+            med_id = request.form.get(key)
+            quantity = request.form.get('quantity_' + key[len('medicineid_'):])
             if med_id and quantity and int(quantity) > 0:
-                items_to_add.append({'med_id': med_id, 'quantity': int(quantity)})
+                items_to_add.append({'MEDICINEID': int(med_id), 'quantity': int(quantity)})
         
         if not items_to_add:
+            cursor.close()
+            conn.close()
             flash('Please add at least one medicine to the sale.', 'warning')
             return redirect(url_for('employee_add_sale'))
 
+        prices = fetch_prices(cursor, [item['MEDICINEID'] for item in items_to_add])
+        missing = [item['MEDICINEID'] for item in items_to_add if item['MEDICINEID'] not in prices]
+        if missing:
+            cursor.close()
+            conn.close()
+            flash(f'Medicine ID(s) {", ".join(map(str, missing))} no longer exist.', 'danger')
+            return redirect(url_for('employee_add_sale'))
+        for item in items_to_add:
+            item['PRICE'] = prices[item['MEDICINEID']]
+            item['subtotal'] = item['PRICE'] * item['quantity']
+
         try:
-            for item in items_to_add:
-                cursor.execute("SELECT PRICE FROM MEDICINES WHERE MEDICINEID = %s", (item['med_id'],))
-                price_per_unit = cursor.fetchone()['PRICE']
-                total_amount = price_per_unit * item['quantity']
-                
-                cursor.execute("""
-                    INSERT INTO SALESDETAILS (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PRICEPERUNIT, TOTALAMOUNT, PAYMENTMETHOD, MEDICINEID, QUANTITY)
-                    VALUES (%s, CURDATE(), %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (new_sale_id, branch_id, customerid, employee_id, price_per_unit, total_amount, payment_method, item['med_id'], item['quantity']))
-            
+            new_sale_id = sale_ids.allocate(conn)
+            taken = consume_stock(conn, branch_id, items_to_add)
+            insert_sale_lines(cursor, new_sale_id, branch_id, customerid, employee_id, payment_method, items_to_add)
             conn.commit()
+            inventory_index.consume(taken)
             flash(f'Sale (ID: {new_sale_id}) created successfully!', 'success')
             return redirect(url_for('employee_sales'))
+        except OutOfStock as err:
+            conn.rollback()
+            flash(f'Not enough stock at this branch: {describe_shortages(err.shortages)}.', 'danger')
         except mysql.connector.Error as err:
             conn.rollback()
             flash(f'Error creating sale: {err}', 'danger')
@@ -853,13 +2658,92 @@ def employee_add_sale():
             cursor.close()
             conn.close()
 
-    cursor.execute("SELECT CUSTOMERID, CUSTOMERNAME FROM CUSTOMERS")
-    customers = cursor.fetchall()
-    cursor.execute("SELECT MEDICINEID, MEDICINENAME, PRICE FROM MEDICINES")
-    medicines = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return render_template('employee/add_sale.html', customers=customers, medicines=medicines)
+    lists = get_reference_data('customers', 'medicines')
+    if lists is None:
+        flash('Database connection error.', 'danger')
+        return redirect(url_for('employee_dashboard'))
+    return render_template('employee/add_sale.html', customers=lists['customers'], medicines=lists['medicines'])
+
+def parse_sale_lines(raw_lines):
+    # Validates every line in one pass and reports all problems together,
+    # keyed by line number, rather than stopping at the first bad one.
+    lines, errors = [], {}
+    if not isinstance(raw_lines, list) or not raw_lines:
+        return [], {'lines': 'Provide a non-empty list of lines.'}
+    if len(raw_lines) > BULK_SALE_MAX_LINES:
+        return [], {'lines': f'At most {BULK_SALE_MAX_LINES} lines per sale.'}
+    for i, raw in enumerate(raw_lines):
+        try:
+            medicine_id = int(raw['medicineid'])
+            quantity = int(raw['quantity'])
+        except (KeyError, TypeError, ValueError):
+            errors[str(i)] = 'Each line needs an integer medicineid and quantity.'
+            continue
+        if quantity < 1:
+            errors[str(i)] = 'Quantity must be at least 1.'
+            continue
+        lines.append({'MEDICINEID': medicine_id, 'quantity': quantity})
+    return lines, errors
+
+@app.route('/employee/api/sales', methods=['POST'])
+@login_required('employee')
+def employee_bulk_sale():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error='Expected a JSON object.'), 400
+    payment_method = payload.get('payment')
+    lines, errors = parse_sale_lines(payload.get('lines'))
+    try:
+        customerid = int(str(payload.get('customerid')))
+    except (TypeError, ValueError):
+        errors['customerid'] = 'Required, as an integer customer ID.'
+    if not payment_method:
+        errors['payment'] = 'Required.'
+    if errors:
+        return jsonify(error='Invalid sale.', details=errors), 400
+
+    conn = get_db_connection()
+    if conn is None:
+        return jsonify(error='Database connection error.'), 503
+    cursor = conn.cursor(dictionary=True)
+    try:
+        employee_id = session['user_id']
+        cursor.execute("SELECT BRANCHID FROM EMPLOYEES WHERE EMPLOYEEID = %s", (employee_id,))
+        branch_id = cursor.fetchone()['BRANCHID']
+        cursor.execute("SELECT CUSTOMERID FROM CUSTOMERS WHERE CUSTOMERID = %s", (customerid,))
+        if cursor.fetchone() is None:
+            return jsonify(error='Invalid sale.', details={'customerid': f'Unknown customer {customerid}.'}), 400
+
+        prices = fetch_prices(cursor, [line['MEDICINEID'] for line in lines])
+        missing = {str(i): f"Unknown medicine {line['MEDICINEID']}." for i, line in enumerate(lines) if line['MEDICINEID'] not in prices}
+        if missing:
+            return jsonify(error='Invalid sale.', details=missing), 400
+        total = 0
+        for line in lines:
+            line['PRICE'] = prices[line['MEDICINEID']]
+            line['subtotal'] = line['PRICE'] * line['quantity']
+            total += line['subtotal']
+
+        sale_id = sale_ids.allocate(conn)
+        taken = consume_stock(conn, branch_id, lines)
+        insert_sale_lines(cursor, sale_id, branch_id, customerid, employee_id, payment_method, lines)
+        conn.commit()
+        inventory_index.consume(taken)
+        return jsonify(SALEID=sale_id, LINES=len(lines), TOTAL=float(total)), 201
+    except OutOfStock as err:
+        conn.rollback()
+        return jsonify(error='Not enough stock.', details={str(medicine_id): need for medicine_id, need in err.shortages.items()}), 409
+    except mysql.connector.IntegrityError as err:
+        conn.rollback()
+        if err.errno == errorcode.ER_DUP_ENTRY:
+            return jsonify(error=f'Sale conflicts with an existing record: {err}'), 409
+        return jsonify(error=f'Error creating sale: {err}'), 500
+    except mysql.connector.Error as err:
+        conn.rollback()
+        return jsonify(error=f'Error creating sale: {err}'), 500
+    finally:
+        cursor.close()
+        conn.close()
 
 @app.route('/employee/sales-item/<int:sale_id>')
 @login_required('employee')
@@ -886,34 +2770,27 @@ def employee_sales_item(sale_id):
 @app.route('/employee/online-orders')
 @login_required('employee')
 def employee_online_orders():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT 
-            o.ORDERID,
-            o.ORDERDATE,
-            c.CUSTOMERNAME,
-            o.DELIVERYADDRESS,
-            sd.TOTALAMOUNT,
-            m.MEDICINENAME,
-            sd.QUANTITY
-        FROM 
-            ONLINEORDERS o
-        JOIN CUSTOMERS c ON o.CUSTOMERID = c.CUSTOMERID
-        JOIN SALESDETAILS sd ON o.SALEDETAILID = sd.SALEDETAILID
-        LEFT JOIN MEDICINES m ON sd.MEDICINEID = m.MEDICINEID
-        ORDER BY o.ORDERDATE DESC;
-    """)
-
-    rows = cursor.fetchall()
-    conn.close()
+    return render_online_orders()
 
-    for row in rows:
-        row['MEDICINENAME'] = row['MEDICINENAME'] or 'N/A'
-        row['QUANTITY'] = row['QUANTITY'] or 'N/A'
-
-    return render_template('employee/online_orders.html', orders=rows)
+@app.route('/employee/online-orders/stream')
+@login_required('employee')
+def employee_online_orders_stream():
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    last_id = int(last_id) if last_id and last_id.isdigit() else None
+    return Response(stream_orders(last_id, parse_order_filters(request.args)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/employee/online-orders/export')
+@login_required('employee')
+def employee_online_orders_export():
+    conditions, params = order_filter_conditions(parse_order_filters(request.args))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return export_csv(f"""
+        {ONLINE_ORDERS_QUERY}
+        {where}
+        ORDER BY o.ORDERDATE DESC, o.ORDERID DESC
+    """, params, 'online-orders', 'employee_online_orders')
 
 
 
@@ -976,6 +2853,7 @@ def admin_signup():
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (employee_id, name, email, pin, designation, contact, branch_id))
             conn.commit()
+            invalidate_reference_data('employees')
             flash(f'Admin account created successfully! Your Admin ID is: {employee_id}', 'success')
             return redirect(url_for('admin_login'))
         except mysql.connector.Error as err:
@@ -984,23 +2862,111 @@ def admin_signup():
             cursor.close()
             conn.close()
 
-    conn = get_db_connection()
-    if conn is None:
+    lists = get_reference_data('branches')
+    if lists is None:
         flash('Database connection error.', 'danger')
         return render_template('admin/signup.html', branches=[])
 
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT BRANCHID, BRANCHNAME FROM BRANCHES")
-    branches = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    return render_template('admin/signup.html', branches=lists['branches'])
 
-    return render_template('admin/signup.html', branches=branches)
+# Dashboard reports, cached per (report, date range) until new sales arrive,
+# the rollups are rebuilt, or REPORT_CACHE_TTL passes.
+sales_reports = SalesReportCache(REPORT_CACHE_SIZE, REPORT_TOP_N, REPORT_CACHE_TTL)
 
 @app.route('/admin/dashboard')
 @login_required('admin')
 def admin_dashboard():
-    return render_template('admin/dashboard.html')
+    today = datetime.date.today()
+    try:
+        date_to = datetime.date.fromisoformat(request.args.get('date_to', ''))
+    except ValueError:
+        date_to = today
+    try:
+        date_from = datetime.date.fromisoformat(request.args.get('date_from', ''))
+    except ValueError:
+        date_from = date_to - datetime.timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+
+    conn = get_db_connection()
+    if conn is None:
+        flash('Database connection error.', 'danger')
+        return render_template('admin/dashboard.html', reports=None, date_from=date_from, date_to=date_to)
+    try:
+        reports = sales_reports.reports(conn, REPORTS, date_from, date_to)
+    except mysql.connector.Error as err:
+        flash(f'Error: {err}', 'danger')
+        reports = None
+    finally:
+        conn.close()
+    if reports is not None:
+        reports = name_report_rows(reports, date_from)
+    return render_template('admin/dashboard.html', reports=reports, date_from=date_from, date_to=date_to)
+
+def name_report_rows(reports, date_from):
+    # Cached report rows are shared, so names go onto copies.
+    medicines = get_medicine_index()
+    lists = get_reference_data('branches', 'employees') or {'branches': [], 'employees': []}
+    branch_names = {branch['BRANCHID']: branch['BRANCHNAME'] for branch in lists['branches']}
+    employee_names = {employee['EMPLOYEEID']: employee['EMPLOYEENAME'] for employee in lists['employees']}
+    named = dict(reports)
+    named['branch_revenue'] = [{**row, 'BRANCHNAME': branch_names.get(row['BRANCHID'], 'N/A')} for row in reports['branch_revenue']]
+    named['employee_totals'] = [{**row, 'EMPLOYEENAME': employee_names.get(row['EMPLOYEEID'], 'N/A')} for row in reports['employee_totals']]
+    named['top_medicines'] = []
+    for row in reports['top_medicines']:
+        med = medicines.get(row['MEDICINEID']) if medicines else None
+        named['top_medicines'].append({**row, 'MEDICINENAME': med['MEDICINENAME'] if med else 'N/A'})
+    named['daily_revenue'] = [{'DATE': date_from + datetime.timedelta(days=i), 'REVENUE': revenue}
+                              for i, revenue in enumerate(reports['daily_revenue'])]
+    return named
+
+@app.route('/admin/pool-stats')
+@login_required('admin')
+def admin_pool_stats():
+    return get_pool_stats()
+
+@app.route('/admin/reorder-plan')
+@login_required('admin')
+def admin_reorder_plan():
+    conn = get_db_connection()
+    if conn is None:
+        flash('Database connection error.', 'danger')
+        return render_template('admin/reorder_plan.html', plan=[], window_days=REORDER_WINDOW_DAYS)
+    try:
+        plan = plan_reorders(conn, REORDER_WINDOW_DAYS, REORDER_LEAD_DAYS, REORDER_COVER_DAYS)
+    except mysql.connector.Error as err:
+        flash(f'Error: {err}', 'danger')
+        plan = []
+    finally:
+        conn.close()
+    add_plan_names(plan)
+    return render_template('admin/reorder_plan.html', plan=plan, window_days=REORDER_WINDOW_DAYS)
+
+def add_plan_names(plan):
+    medicines = get_medicine_index()
+    lists = get_reference_data('branches') or {'branches': []}
+    branch_names = {branch['BRANCHID']: branch['BRANCHNAME'] for branch in lists['branches']}
+    for row in plan:
+        med = medicines.get(row['MEDICINEID']) if medicines else None
+        row['MEDICINENAME'] = med['MEDICINENAME'] if med else 'N/A'
+        row['BRANCHNAME'] = branch_names.get(row['BRANCHID'], 'N/A')
+
+@app.cli.command('reorder-plan')
+def reorder_plan_command():
+    """Print tonight's reorder suggestions as CSV."""
+    conn = get_db_connection()
+    if conn is None:
+        raise click.ClickException('Database connection error.')
+    try:
+        plan = plan_reorders(conn, REORDER_WINDOW_DAYS, REORDER_LEAD_DAYS, REORDER_COVER_DAYS)
+    except mysql.connector.Error as err:
+        raise click.ClickException(f'Error: {err}')
+    finally:
+        conn.close()
+    click.echo('MEDICINEID,BRANCHID,DAILYDEMAND,STOCK,DAYSOFCOVER,SUGGESTED,SUPPLIERID')
+    for row in plan:
+        click.echo(f"{row['MEDICINEID']},{row['BRANCHID']},{row['DAILYDEMAND']:.2f},{row['STOCK']},"
+                   f"{row['DAYSOFCOVER']:.1f},{row['SUGGESTED']},{row['SUPPLIERID'] or ''}")
 
 @app.route('/admin/branches')
 @login_required('admin')
@@ -1032,6 +2998,7 @@ def admin_add_branch():
             cursor.execute("INSERT INTO BRANCHES (BRANCHNAME, LOCATION, BRANCHMANAGERNUBMBER) VALUES (%s, %s, %s)",
                            (name, location, manager_num))
             conn.commit()
+            invalidate_reference_data('branches')
             flash('Branch added successfully!', 'success')
             return redirect(url_for('admin_branches'))
         except mysql.connector.Error as err:
@@ -1060,6 +3027,7 @@ def admin_edit_branch(branch_id):
                 WHERE BRANCHID = %s
             """, (name, location, manager_num, branch_id))
             conn.commit()
+            invalidate_reference_data('branches')
             flash('Branch updated successfully!', 'success')
             return redirect(url_for('admin_branches'))
         except mysql.connector.Error as err:
@@ -1086,6 +3054,7 @@ def admin_delete_branch(branch_id):
     try:
         cursor.execute("DELETE FROM BRANCHES WHERE BRANCHID = %s", (branch_id,))
         conn.commit()
+        invalidate_reference_data('branches')
         flash('Branch deleted successfully.', 'success')
     except mysql.connector.Error as err:
         flash(f'Error deleting branch. It might be in use by employees. Error: {err}', 'danger')
@@ -1132,16 +3101,11 @@ def admin_add_supplier():
             cursor.close()
             conn.close()
     
-    conn = get_db_connection()
-    if conn is None:
+    lists = get_reference_data('medicines')
+    if lists is None:
         flash('Database connection error.', 'danger')
         return render_template('admin/add_edit_supplier.html', action='Add', supplier=None, medicines=[])
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT MEDICINEID, MEDICINENAME FROM MEDICINES")
-    medicines = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return render_template('admin/add_edit_supplier.html', action='Add', supplier=None, medicines=medicines)
+    return render_template('admin/add_edit_supplier.html', action='Add', supplier=None, medicines=lists['medicines'])
 
 @app.route('/admin/supplier/edit/<int:supplier_id>', methods=['GET', 'POST'])
 @login_required('admin')
@@ -1170,8 +3134,7 @@ def admin_edit_supplier(supplier_id):
     cursor.execute("SELECT * FROM SUPPLIERS WHERE SUPPLIERID = %s", (supplier_id,))
     supplier = cursor.fetchone()
     
-    cursor.execute("SELECT MEDICINEID, MEDICINENAME FROM MEDICINES")
-    medicines = cursor.fetchall()
+    medicines = get_reference_data('medicines', conn=conn)['medicines']
     
     cursor.close()
     conn.close()
@@ -1230,6 +3193,7 @@ def admin_add_shift():
             cursor.execute("INSERT INTO SHIFTS (SHIFTID, SHIFTNAME, STARTTIME, ENDTIME, EMPLOYEEID) VALUES (%s, %s, %s, %s, %s)",
                            (shiftid, shiftname, starttime, endtime, employeeid if employeeid else None))
             conn.commit()
+            invalidate_reference_data('shifts')
             flash('Shift added successfully!', 'success')
             return redirect(url_for('admin_shifts'))
         except mysql.connector.Error as err:
@@ -1238,16 +3202,11 @@ def admin_add_shift():
             cursor.close()
             conn.close()
 
-    conn = get_db_connection()
-    if conn is None:
+    lists = get_reference_data('employees')
+    if lists is None:
         flash('Database connection error.', 'danger')
         return render_template('admin/add_edit_shift.html', action='Add', shift=None, employees=[])
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT EMPLOYEEID, EMPLOYEENAME FROM EMPLOYEES")
-    employees = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return render_template('admin/add_edit_shift.html', action='Add', shift=None, employees=employees)
+    return render_template('admin/add_edit_shift.html', action='Add', shift=None, employees=lists['employees'])
 
 @app.route('/admin/shift/edit/<int:shift_id>', methods=['GET', 'POST'])
 @login_required('admin')
@@ -1267,6 +3226,7 @@ def admin_edit_shift(shift_id):
             update_cursor.execute("UPDATE SHIFTS SET SHIFTNAME = %s, STARTTIME = %s, ENDTIME = %s, EMPLOYEEID = %s WHERE SHIFTID = %s",
                                   (shiftname, starttime, endtime, employeeid if employeeid else None, shift_id))
             conn.commit()
+            invalidate_reference_data('shifts')
             flash('Shift updated successfully!', 'success')
             return redirect(url_for('admin_shifts'))
         except mysql.connector.Error as err:
@@ -1277,8 +3237,7 @@ def admin_edit_shift(shift_id):
     cursor.execute("SELECT * FROM SHIFTS WHERE SHIFTID = %s", (shift_id,))
     shift = cursor.fetchone()
     
-    cursor.execute("SELECT EMPLOYEEID, EMPLOYEENAME FROM EMPLOYEES")
-    employees = cursor.fetchall()
+    employees = get_reference_data('employees', conn=conn)['employees']
     
     cursor.close()
     conn.close()
@@ -1297,6 +3256,7 @@ def admin_delete_shift(shift_id):
     try:
         cursor.execute("DELETE FROM SHIFTS WHERE SHIFTID = %s", (shift_id,))
         conn.commit()
+        invalidate_reference_data('shifts')
         flash('Shift deleted successfully.', 'success')
     except mysql.connector.Error as err:
         flash(f'Error: {err}', 'danger')
@@ -1305,6 +3265,14 @@ def admin_delete_shift(shift_id):
         conn.close()
     return redirect(url_for('admin_shifts'))
 
+ATTENDANCE_QUERY = """
+    SELECT a.*, e.EMPLOYEENAME, s.SHIFTNAME, b.BRANCHNAME
+    FROM ATTENDANCE a
+    LEFT JOIN EMPLOYEES e ON a.EMPLOYEEID = e.EMPLOYEEID
+    LEFT JOIN SHIFTS s ON a.SHIFTID = s.SHIFTID
+    LEFT JOIN BRANCHES b ON a.BRANCHID = b.BRANCHID
+"""
+
 @app.route('/admin/attendance')
 @login_required('admin')
 def admin_attendance():
@@ -1313,19 +3281,17 @@ def admin_attendance():
         flash('Database connection error.', 'danger')
         return render_template('admin/attendance.html', attendances=[])
     cursor = conn.cursor(dictionary=True)
-    query = """
-        SELECT a.*, e.EMPLOYEENAME, s.SHIFTNAME, b.BRANCHNAME 
-        FROM ATTENDANCE a
-        LEFT JOIN EMPLOYEES e ON a.EMPLOYEEID = e.EMPLOYEEID
-        LEFT JOIN SHIFTS s ON a.SHIFTID = s.SHIFTID
-        LEFT JOIN BRANCHES b ON a.BRANCHID = b.BRANCHID
-    """
-    cursor.execute(query)
+    cursor.execute(ATTENDANCE_QUERY)
     attendances = cursor.fetchall()
     cursor.close()
     conn.close()
     return render_template('admin/attendance.html', attendances=attendances)
 
+@app.route('/admin/attendance/export')
+@login_required('admin')
+def admin_attendance_export():
+    return export_csv(f"{ATTENDANCE_QUERY} ORDER BY a.ATTENDANCEID", (), 'attendance', 'admin_attendance')
+
 @app.route('/admin/attendance/add', methods=['GET', 'POST'])
 @login_required('admin')
 def admin_add_attendance():
@@ -1355,20 +3321,11 @@ def admin_add_attendance():
             cursor.close()
             conn.close()
 
-    conn = get_db_connection()
-    if conn is None:
+    lists = get_reference_data('employees', 'shifts', 'branches')
+    if lists is None:
         flash('Database connection error.', 'danger')
         return render_template('admin/add_edit_attendance.html', action='Add', attendance=None, employees=[], shifts=[], branches=[])
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT EMPLOYEEID, EMPLOYEENAME FROM EMPLOYEES")
-    employees = cursor.fetchall()
-    cursor.execute("SELECT SHIFTID, SHIFTNAME FROM SHIFTS")
-    shifts = cursor.fetchall()
-    cursor.execute("SELECT BRANCHID, BRANCHNAME FROM BRANCHES")
-    branches = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return render_template('admin/add_edit_attendance.html', action='Add', attendance=None, employees=employees, shifts=shifts, branches=branches)
+    return render_template('admin/add_edit_attendance.html', action='Add', attendance=None, employees=lists['employees'], shifts=lists['shifts'], branches=lists['branches'])
 
 @app.route('/admin/attendance/edit/<int:attendance_id>', methods=['GET', 'POST'])
 @login_required('admin')
@@ -1402,18 +3359,13 @@ def admin_edit_attendance(attendance_id):
     cursor.execute("SELECT * FROM ATTENDANCE WHERE ATTENDANCEID = %s", (attendance_id,))
     attendance = cursor.fetchone()
     
-    cursor.execute("SELECT EMPLOYEEID, EMPLOYEENAME FROM EMPLOYEES")
-    employees = cursor.fetchall()
-    cursor.execute("SELECT SHIFTID, SHIFTNAME FROM SHIFTS")
-    shifts = cursor.fetchall()
-    cursor.execute("SELECT BRANCHID, BRANCHNAME FROM BRANCHES")
-    branches = cursor.fetchall()
+    lists = get_reference_data('employees', 'shifts', 'branches', conn=conn)
     
     cursor.close()
     conn.close()
     if not attendance:
         return render_template('404.html'), 404
-    return render_template('admin/add_edit_attendance.html', action='Edit', attendance=attendance, employees=employees, shifts=shifts, branches=branches)
+    return render_template('admin/add_edit_attendance.html', action='Edit', attendance=attendance, employees=lists['employees'], shifts=lists['shifts'], branches=lists['branches'])
 
 @app.route('/admin/attendance/delete/<int:attendance_id>', methods=['POST'])
 @login_required('admin')
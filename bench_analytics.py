@@ -0,0 +1,118 @@
+# Benchmark for the admin dashboard reports on synthetic sales: the daily
+# rollups (SALESDAILYMEDICINE, SALESDAILYEMPLOYEE) are built from the lines as
+# the sale path would have upserted them, then every report is computed with
+# compute_report over the rollup rows, against the same totals accumulated
+# line by line in Python dicts.
+#
+#   python bench_analytics.py                   # 10M lines, baseline on 1M
+#   python bench_analytics.py --lines 50000000 --python-lines 0
+#
+# Only the computation is timed; the row counts show how much less the
+# dashboard streams out of MySQL reading rollups instead of SALESDETAILS.
+import argparse
+import time
+
+import numpy as np
+
+from analytics import REPORTS, compute_report
+
+PAYMENT_METHODS = ['N/A', 'COD', 'Card', 'Cash', 'Mobile Banking']
+
+
+def make_lines(lines, days, branches, employees, medicines, seed=42):
+    rng = np.random.default_rng(seed)
+    popularity = rng.zipf(1.3, medicines).astype(np.float64)
+    quantity = rng.integers(1, 6, size=lines, dtype=np.int32)
+    price = rng.uniform(0.5, 500, size=medicines)
+    medicine = rng.choice(np.arange(1, medicines + 1, dtype=np.int32), size=lines, p=popularity / popularity.sum())
+    # Employee IDs are six or seven digits, as in EMPLOYEES, not 1..n.
+    employee_ids = (rng.choice(9900000, size=employees, replace=False) + 100000).astype(np.int32)
+    # Cashiers work at one branch and mostly take one kind of payment.
+    cashier = rng.integers(0, employees, size=lines, dtype=np.int32)
+    return {
+        'DAY': rng.integers(0, days, size=lines, dtype=np.int32),
+        'BRANCHID': (cashier % branches + 1).astype(np.int32),
+        'EMPLOYEEID': employee_ids[cashier],
+        'MEDICINEID': medicine,
+        'PAYMENT': np.where(rng.random(lines) < 0.8, cashier % len(PAYMENT_METHODS),
+                            rng.integers(0, len(PAYMENT_METHODS), size=lines)).astype(np.int32),
+        'QUANTITY': quantity,
+        'TOTALAMOUNT': price[medicine - 1] * quantity,
+    }
+
+
+def rollup(lines, keys, sums):
+    # GROUP BY keys over the line columns, the rows the upserts would leave.
+    packed = np.zeros(len(lines[keys[0]]), dtype=np.int64)
+    for key in keys:
+        packed = packed * (int(lines[key].max()) + 1) + lines[key]
+    unique, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+    rows = {key: lines[key][first] for key in keys}
+    rows['LINES'] = np.bincount(inverse, minlength=len(unique))
+    for name, column in sums.items():
+        rows[name] = np.bincount(inverse, weights=lines[column], minlength=len(unique))
+    return rows
+
+
+def make_rollups(lines, days):
+    return {
+        'MEDICINE': rollup(lines, ('DAY', 'BRANCHID', 'MEDICINEID'), {'QUANTITY': 'QUANTITY', 'REVENUE': 'TOTALAMOUNT'}),
+        'EMPLOYEE': rollup(lines, ('DAY', 'BRANCHID', 'EMPLOYEEID', 'PAYMENT'), {'REVENUE': 'TOTALAMOUNT'}),
+        'PAYMENTMETHODS': PAYMENT_METHODS,
+        'DAYS': days,
+    }
+
+
+def python_reports(columns, lines):
+    branch, daily, payment, medicine, employee = {}, {}, {}, {}, {}
+    for day, branch_id, employee_id, medicine_id, method, quantity, amount in zip(
+            *(columns[name][:lines].tolist() for name in
+              ('DAY', 'BRANCHID', 'EMPLOYEEID', 'MEDICINEID', 'PAYMENT', 'QUANTITY', 'TOTALAMOUNT'))):
+        branch[branch_id] = branch.get(branch_id, 0) + amount
+        daily[day] = daily.get(day, 0) + amount
+        payment[method] = payment.get(method, 0) + amount
+        units, revenue = medicine.get(medicine_id, (0, 0))
+        medicine[medicine_id] = (units + quantity, revenue + amount)
+        employee[employee_id] = employee.get(employee_id, 0) + amount
+    top = sorted(medicine.items(), key=lambda item: -item[1][1])[:10]
+    return branch, daily, payment, top, employee
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=10000000, help='sale lines in the date range')
+    parser.add_argument('--python-lines', type=int, default=1000000, help='lines for the dict baseline, 0 to skip')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--branches', type=int, default=20)
+    parser.add_argument('--employees', type=int, default=400)
+    parser.add_argument('--medicines', type=int, default=20000)
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines, args.days, args.branches, args.employees, args.medicines)
+    columns = make_rollups(lines, args.days)
+    rollup_rows = len(columns['MEDICINE']['DAY']) + len(columns['EMPLOYEE']['DAY'])
+    print(f"{args.lines} sale lines over {args.days} days, {args.branches} branches, "
+          f"{args.employees} employees, {args.medicines} medicines")
+    print(f"{rollup_rows} rollup rows ({len(columns['MEDICINE']['DAY'])} medicine, "
+          f"{len(columns['EMPLOYEE']['DAY'])} employee), {args.lines / rollup_rows:.1f} lines per row")
+
+    total = 0
+    for report in REPORTS:
+        start = time.perf_counter()
+        compute_report(columns, report)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"{report:<18} {elapsed:>8.3f}s")
+    print(f"{'all reports':<18} {total:>8.3f}s")
+
+    if args.python_lines:
+        count = min(args.python_lines, args.lines)
+        start = time.perf_counter()
+        python_reports(lines, count)
+        elapsed = time.perf_counter() - start
+        print(f"{'python dicts':<18} {elapsed:>8.3f}s   over {count} raw lines, "
+              f"~{elapsed * args.lines / count:.1f}s projected for {args.lines}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# Round trips needed to persist a sale, old per-item loops against the
+# batched helpers, for a range of basket sizes: online checkout
+# (insert_online_order) and counter sales (fetch_prices + insert_sale_lines).
+#
+#   python bench_checkout.py
+#   python bench_checkout.py --sizes 1 5 20 100 --rtt-ms 40
+#
+# Statements are counted on a recording cursor, so no database is needed. Each
+# execute() is one network round trip and the transaction stays open from the
+# first one until COMMIT, so "lock hold" is roughly statements x RTT.
+import argparse
+
+from app import insert_online_order, fetch_prices, insert_sale_lines
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = 0
+        self.lastrowid = 0
+        self.rowcount = 0
+        self._next_id = 1
+        self._last_insert_rows = 0
+        self._rows = []
+
+    def execute(self, query, params=()):
+        self.statements += 1
+        query = ' '.join(query.split())
+        if query.startswith('INSERT INTO SALESDETAILS'):
+            rows = query.count('CURDATE()')
+            self.lastrowid = self._next_id
+            self._next_id += rows
+            self.rowcount = self._last_insert_rows = rows
+        elif query.startswith('SELECT SALEDETAILID'):
+            self._rows = [(i,) for i in range(self.lastrowid, self.lastrowid + self._last_insert_rows)]
+        elif query.startswith('SELECT MEDICINEID, PRICE'):
+            self._rows = [{'MEDICINEID': medicine_id, 'PRICE': 1.20} for medicine_id in params]
+        elif query.startswith('SELECT PRICE'):
+            self._rows = [{'PRICE': 1.20}]
+        elif 'SELECT' in query:
+            self.rowcount = self._last_insert_rows
+        else:
+            self.rowcount = 1
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchall(self):
+        return self._rows
+
+
+def legacy_checkout(cursor, customer_id, branch_id, employee_id, payment_method, delivery_address, items):
+    for item in items:
+        cursor.execute("""
+            INSERT INTO SALESDETAILS (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PRICEPERUNIT, TOTALAMOUNT, PAYMENTMETHOD, MEDICINEID, QUANTITY)
+            VALUES (NULL, CURDATE(), %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (branch_id, customer_id, employee_id, item['PRICE'], item['subtotal'], payment_method, item['MEDICINEID'], item['quantity']))
+        sale_detail_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO ONLINEORDERS (CUSTOMERID, SALEDETAILID, ORDERDATE, DELIVERYADDRESS)
+            VALUES (%s, %s, NOW(), %s)
+        """, (customer_id, sale_detail_id, delivery_address))
+
+
+def make_cart(size):
+    return [{'MEDICINEID': i, 'PRICE': 1.20, 'quantity': 2, 'subtotal': 2.40} for i in range(1, size + 1)]
+
+
+def batched_checkout(cursor, customer_id, branch_id, employee_id, payment_method, delivery_address, items):
+    # The SALEID normally comes from a block reserved in memory, so it costs
+    # no round trip here.
+    insert_online_order(cursor, 1, customer_id, branch_id, employee_id, payment_method, delivery_address, items)
+
+
+def legacy_counter_sale(cursor, items):
+    cursor.execute("SELECT BRANCHID FROM EMPLOYEES WHERE EMPLOYEEID = %s", (153398,))
+    cursor.execute("SELECT MAX(SALEID) as max_id FROM SALESDETAILS")
+    for item in items:
+        cursor.execute("SELECT PRICE FROM MEDICINES WHERE MEDICINEID = %s", (item['MEDICINEID'],))
+        price_per_unit = cursor.fetchone()['PRICE']
+        cursor.execute("""
+            INSERT INTO SALESDETAILS (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PRICEPERUNIT, TOTALAMOUNT, PAYMENTMETHOD, MEDICINEID, QUANTITY)
+            VALUES (%s, CURDATE(), %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (1, 1, 191131, 153398, price_per_unit, price_per_unit * item['quantity'], 'Cash', item['MEDICINEID'], item['quantity']))
+
+
+def batched_counter_sale(cursor, items):
+    cursor.execute("SELECT BRANCHID FROM EMPLOYEES WHERE EMPLOYEEID = %s", (153398,))
+    prices = fetch_prices(cursor, [item['MEDICINEID'] for item in items])
+    for item in items:
+        item['PRICE'] = prices[item['MEDICINEID']]
+        item['subtotal'] = item['PRICE'] * item['quantity']
+    insert_sale_lines(cursor, 1, 1, 191131, 153398, 'Cash', items)
+
+
+def counter_round_trips(sale, size):
+    cursor = RecordingCursor()
+    sale(cursor, make_cart(size))
+    return cursor.statements + 1  # + COMMIT
+
+
+def round_trips(checkout, size):
+    cursor = RecordingCursor()
+    checkout(cursor, 191131, 1, 153398, 'COD', 'Uttor Badda', make_cart(size))
+    return cursor.statements + 1  # + COMMIT
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 10, 20, 50, 100])
+    parser.add_argument('--rtt-ms', type=float, default=40.0, help='network round trip to the database')
+    args = parser.parse_args()
+
+    header = f"{'items':>6} {'old trips':>10} {'new trips':>10} {'old lock ms':>12} {'new lock ms':>12}"
+    for title, old_path, new_path, count in (
+            ('Online checkout', legacy_checkout, batched_checkout, round_trips),
+            ('Counter sale', legacy_counter_sale, batched_counter_sale, counter_round_trips)):
+        print(title)
+        print(header)
+        for size in args.sizes:
+            old = count(old_path, size)
+            new = count(new_path, size)
+            print(f"{size:>6} {old:>10} {new:>10} {old * args.rtt_ms:>12.0f} {new * args.rtt_ms:>12.0f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
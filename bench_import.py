@@ -0,0 +1,86 @@
+# Bulk stock import on a synthetic supplier file: parsing, validation and
+# batching time for import_csv, and the statements and commits it sends,
+# against one INSERT and commit per row as the add-stock form does.
+#
+#   python bench_import.py                  # 100k stock batches
+#   python bench_import.py --rows 500000 --rtt-ms 5
+#
+# Statements go to a recording connection, so no database is needed; the
+# round trip estimate is statements x RTT and leaves out server-side work.
+import argparse
+import io
+import random
+import time
+
+import app
+
+
+class RecordingCursor:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def execute(self, query, params=()):
+        self.stats['statements'] += 1
+        if 'MAX(STOCKID)' in query:
+            self._row = (0,)
+
+    def fetchone(self):
+        return self._row
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.stats = {'statements': 0, 'commits': 0}
+
+    def cursor(self, **kwargs):
+        return RecordingCursor(self.stats)
+
+    def commit(self):
+        self.stats['commits'] += 1
+
+    def rollback(self):
+        pass
+
+
+def make_file(rows, branches, medicines, seed=42):
+    rng = random.Random(seed)
+    lines = ['BRANCHID,MEDICINEID,QUANTITY,EXPIRYDATE']
+    for _ in range(rows):
+        lines.append(f"{rng.randint(1, branches)},{rng.randint(1, medicines)},{rng.randint(1, 500)},"
+                     f"{rng.randint(2026, 2029)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000, help='stock batches in the file')
+    parser.add_argument('--branches', type=int, default=20)
+    parser.add_argument('--medicines', type=int, default=100000)
+    parser.add_argument('--rtt-ms', type=float, default=40.0, help='network round trip to the database')
+    args = parser.parse_args()
+
+    text = make_file(args.rows, args.branches, args.medicines)
+    now = time.monotonic()
+    app._reference_cache['branches'] = (now, [{'BRANCHID': i} for i in range(1, args.branches + 1)])
+    app._reference_cache['medicines'] = (now, [{'MEDICINEID': i} for i in range(1, args.medicines + 1)])
+
+    conn = RecordingConnection()
+    start = time.perf_counter()
+    report = app.import_csv(conn, 'stock', io.StringIO(text))
+    elapsed = time.perf_counter() - start
+    trips = conn.stats['statements'] + conn.stats['commits']
+    print(f"{args.rows} rows: {report['inserted']} imported, {report['rejected']} rejected")
+    print(f"{'':<14} {'python s':>9} {'statements':>11} {'commits':>8} {'network s':>10}")
+    print(f"{'import_csv':<14} {elapsed:>9.2f} {conn.stats['statements']:>11} {conn.stats['commits']:>8} "
+          f"{trips * args.rtt_ms / 1000:>10.1f}")
+    print(f"{'form per row':<14} {'':>9} {args.rows:>11} {args.rows:>8} {2 * args.rows * args.rtt_ms / 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
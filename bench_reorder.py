@@ -0,0 +1,72 @@
+# Benchmark for the reorder planner's number crunching on synthetic history:
+# the vectorised compute_reorder_plan against the same calculation done row
+# by row in Python.
+#
+#   python bench_reorder.py                     # 5M sale lines
+#   python bench_reorder.py --lines 20000000 --skip-python
+#
+# Only the computation is timed; streaming the columns out of MySQL is
+# separate and depends on the network.
+import argparse
+import math
+import time
+
+import numpy as np
+
+from analytics import compute_reorder_plan
+
+
+def make_history(lines, medicines, branches, batches, seed=42):
+    rng = np.random.default_rng(seed)
+    # Skewed demand: a few medicines sell far more than the rest.
+    popularity = rng.zipf(1.3, medicines).astype(np.float64)
+    sale_medicine = rng.choice(np.arange(1, medicines + 1), size=lines, p=popularity / popularity.sum())
+    sale_branch = rng.integers(1, branches + 1, size=lines)
+    sale_quantity = rng.integers(1, 6, size=lines).astype(np.float64)
+    stock_medicine = rng.integers(1, medicines + 1, size=batches)
+    stock_branch = rng.integers(1, branches + 1, size=batches)
+    stock_quantity = rng.integers(0, 500, size=batches).astype(np.float64)
+    return sale_medicine, sale_branch, sale_quantity, stock_medicine, stock_branch, stock_quantity
+
+
+def python_plan(sale_medicine, sale_branch, sale_quantity, stock_medicine, stock_branch, stock_quantity,
+                window_days, lead_days, cover_days):
+    sold, stock = {}, {}
+    for medicine_id, branch_id, quantity in zip(sale_medicine.tolist(), sale_branch.tolist(), sale_quantity.tolist()):
+        sold[(medicine_id, branch_id)] = sold.get((medicine_id, branch_id), 0) + quantity
+    for medicine_id, branch_id, quantity in zip(stock_medicine.tolist(), stock_branch.tolist(), stock_quantity.tolist()):
+        stock[(medicine_id, branch_id)] = stock.get((medicine_id, branch_id), 0) + quantity
+    plan = {}
+    for pair in sold.keys() | stock.keys():
+        demand = sold.get(pair, 0) / window_days
+        on_hand = stock.get(pair, 0)
+        plan[pair] = math.ceil(max(demand * (lead_days + cover_days) - on_hand, 0))
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=5000000, help='sale lines in the window')
+    parser.add_argument('--medicines', type=int, default=20000)
+    parser.add_argument('--branches', type=int, default=20)
+    parser.add_argument('--batches', type=int, default=200000, help='stock batches on hand')
+    parser.add_argument('--skip-python', action='store_true', help='skip the row-by-row baseline')
+    args = parser.parse_args()
+
+    arrays = make_history(args.lines, args.medicines, args.branches, args.batches)
+    print(f"{args.lines} sale lines, {args.medicines} medicines x {args.branches} branches, {args.batches} batches")
+
+    start = time.perf_counter()
+    plan = compute_reorder_plan(*arrays, 28, 3, 14)
+    elapsed = time.perf_counter() - start
+    print(f"{'vectorised':<12} {elapsed:>8.2f}s   {int((plan['SUGGESTED'] > 0).sum())} pairs to reorder")
+
+    if not args.skip_python:
+        start = time.perf_counter()
+        baseline = python_plan(*arrays, 28, 3, 14)
+        elapsed = time.perf_counter() - start
+        print(f"{'row by row':<12} {elapsed:>8.2f}s   {sum(1 for qty in baseline.values() if qty > 0)} pairs to reorder")
+
+
+if __name__ == '__main__':
+    main()
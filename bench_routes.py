@@ -0,0 +1,338 @@
+# Route-level benchmark: drives the hot routes of the Flask app in-process
+# (through its test client) against a local MySQL stand-in for the database in
+# config.py, and reports latency percentiles, throughput and statements per
+# request for each one.
+#
+#   docker run -d -p 3306:3306 -e MYSQL_ALLOW_EMPTY_PASSWORD=yes mysql:8.0 --lower-case-table-names=1
+#   python bench_routes.py --host 127.0.0.1 --database pharmacy --setup --scale 0.01   # load, then run
+#   python bench_routes.py --host 127.0.0.1 --database pharmacy --json before.json
+#   python bench_routes.py --host 127.0.0.1 --database pharmacy --json after.json --compare before.json
+#   python bench_routes.py --host 127.0.0.1 --database pharmacy --routes search_medicine --threads 4
+#
+# --host and --database are required and the host in config.py is refused
+# (see standin.py): --setup drops and reloads the database it is given.
+# The app names tables in upper case and Project.sql in lower case, so the
+# stand-in must run with lower_case_table_names=1 (as TiDB does); MySQL only
+# accepts that when the data directory is first initialised. Statements per
+# request come from the server's global Questions counter, so nothing else
+# should be using the stand-in while this runs. The checkout and counter sale
+# routes write real sales at branch 1 (the branch those seed accounts belong
+# to); the stock they draw on is topped up there before every run.
+import argparse
+import datetime
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+
+import mysql.connector
+import numpy as np
+
+import standin
+from app import app
+from config import db_config
+from generate_data import DEFAULT_COUNTS, DEFAULT_DAYS, Generator, MySQLSink, scaled_counts
+
+BRANCH_ID = 1
+# Seed accounts from Project.sql, all at branch 1.
+CUSTOMER_LOGIN = ('/customer/login', {'email': 'customer@gmail.com', 'password': 'customer'})
+EMPLOYEE_LOGIN = ('/employee/login', {'employee_id': '176519', 'pin': 'employee'})
+ADMIN_LOGIN = ('/admin/login', {'admin_id': '153398', 'pin': '0153398'})
+# Stock batches added for the run are recognised (and replaced) by this date.
+TOP_UP_EXPIRY = datetime.date(2099, 12, 31)
+TOP_UP_QUANTITY = 1000000
+DELIVERY_ADDRESS = 'House 12, Road 5, Dhanmondi, Dhaka'
+
+
+def load_project_sql(cursor, path):
+    # mysqldump output: one statement per line or spread over lines, each
+    # ending with ';' at the end of a line. The dump's own CREATE DATABASE and
+    # USE are skipped so it loads into the connection's current database.
+    statement = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not statement and (line.startswith(('--', 'CREATE DATABASE', 'USE ')) or not line.strip()):
+                continue
+            statement.append(line)
+            if line.rstrip().endswith(';'):
+                cursor.execute(''.join(statement))
+                statement = []
+
+
+def check_server(cursor):
+    cursor.execute("SELECT @@lower_case_table_names, VERSION()")
+    lower_case, version = cursor.fetchone()
+    if lower_case == 0:
+        raise SystemExit('The stand-in must run with lower_case_table_names=1 (see the top of this file).')
+    return version
+
+
+def setup_database(conn, database, scale, seed):
+    cursor = conn.cursor()
+    check_server(cursor)
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}` DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci")
+    cursor.execute(f"USE `{database}`")
+    load_project_sql(cursor, 'Project.sql')
+    conn.commit()
+    cursor.close()
+    generator = Generator(seed, scaled_counts(DEFAULT_COUNTS, scale), DEFAULT_DAYS, datetime.date.today())
+    sink = MySQLSink(conn, 5000)
+    written = 0
+    start = time.perf_counter()
+    for table, columns, lines in generator.tables():
+        sink.write(table, columns, lines)
+        written += len(lines)
+        print(f"\rLoading {table:<16} {written:>10} rows", end='', flush=True)
+    sink.finish()
+    print(f"\rLoaded {written} generated rows in {time.perf_counter() - start:.1f}s" + ' ' * 20)
+
+
+def prepare_run(conn, sample, rng):
+    # Picks the medicines and customers the run uses and gives every picked
+    # medicine a large batch at BRANCH_ID, so sales never run out of stock.
+    cursor = conn.cursor()
+    version = check_server(cursor)
+    cursor.execute("SELECT MEDICINEID, MEDICINENAME FROM MEDICINES ORDER BY MEDICINEID")
+    medicines = cursor.fetchall()
+    cursor.execute("SELECT CUSTOMERID FROM CUSTOMERS ORDER BY CUSTOMERID")
+    customers = [row[0] for row in cursor.fetchall()]
+    medicines = rng.sample(medicines, min(sample, len(medicines)))
+
+    cursor.execute("DELETE FROM MEDICINESTOCK WHERE BRANCHID = %s AND EXPIRYDATE = %s", (BRANCH_ID, TOP_UP_EXPIRY))
+    cursor.execute("SELECT COALESCE(MAX(STOCKID), 0) FROM MEDICINESTOCK")
+    next_id = cursor.fetchone()[0] + 1
+    cursor.executemany("""
+        INSERT INTO MEDICINESTOCK (STOCKID, BRANCHID, MEDICINEID, QUANTITY, EXPIRYDATE)
+        VALUES (%s, %s, %s, %s, %s)
+    """, [(next_id + i, BRANCH_ID, medicine_id, TOP_UP_QUANTITY, TOP_UP_EXPIRY)
+          for i, (medicine_id, _) in enumerate(medicines)])
+    conn.commit()
+
+    rows = {}
+    for table in ('MEDICINES', 'CUSTOMERS', 'MEDICINESTOCK', 'SALESDETAILS', 'ONLINEORDERS', 'ATTENDANCE'):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        rows[table] = cursor.fetchone()[0]
+    cursor.close()
+    return {'medicines': medicines, 'customers': customers}, rows, version
+
+
+def statements_executed(cursor):
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+    return int(cursor.fetchone()[1])
+
+
+# --- Routes ---
+# Each route is (login, prepare, request, redirect): prepare runs untimed
+# before every request, and a request succeeds when it redirects to redirect
+# or, when that is None, renders 200 without an error flash.
+def search_medicine(client, rng, data):
+    brand = rng.choice(data['medicines'])[1].split()[0].lower()
+    if rng.random() < 0.25:
+        # A dropped letter: no substring match, so the fuzzy fallback runs.
+        i = rng.randrange(len(brand))
+        query = brand[:i] + brand[i + 1:]
+    else:
+        query = brand[:5]
+    return client.post('/search', data={'search_query': query})
+
+
+def medicine_details(client, rng, data):
+    return client.get(f"/medicine-details/{rng.choice(data['medicines'])[0]}")
+
+
+def fill_cart(client, rng, data):
+    for medicine_id, _ in rng.sample(data['medicines'], rng.randint(1, 3)):
+        client.post(f'/add-to-cart/{medicine_id}', data={'quantity': str(rng.randint(1, 3))})
+
+
+def checkout(client, rng, data):
+    return client.post('/customer/cart', data={'address': DELIVERY_ADDRESS, 'payment': rng.choice(['COD', 'Bkash'])})
+
+
+def add_sale(client, rng, data):
+    form = {'customerid': str(rng.choice(data['customers'])), 'payment': rng.choice(['Cash', 'Bkash', 'Card'])}
+    for i, (medicine_id, _) in enumerate(rng.sample(data['medicines'], rng.randint(1, 4))):
+        form[f'medicineid_{i}'] = str(medicine_id)
+        form[f'quantity_{i}'] = str(rng.randint(1, 5))
+    return client.post('/employee/add-sale', data=form)
+
+
+def get(path):
+    return lambda client, rng, data: client.get(path)
+
+
+ROUTES = {
+    'search_medicine': (CUSTOMER_LOGIN, None, search_medicine, None),
+    'medicine_details': (CUSTOMER_LOGIN, None, medicine_details, None),
+    'cart_details_checkout': (CUSTOMER_LOGIN, fill_cart, checkout, '/customer/previous-orders'),
+    'employee_add_sale': (EMPLOYEE_LOGIN, None, add_sale, '/employee/sales'),
+    'employee_sales': (EMPLOYEE_LOGIN, None, get('/employee/sales'), None),
+    'employee_online_orders': (EMPLOYEE_LOGIN, None, get('/employee/online-orders'), None),
+    'employee_medicine_stock': (EMPLOYEE_LOGIN, None, get('/employee/medicine-stock'), None),
+    'admin_attendance': (ADMIN_LOGIN, None, get('/admin/attendance'), None),
+}
+
+
+def logged_in_client(login):
+    client = app.test_client()
+    path, form = login
+    response = client.post(path, data=form)
+    if response.status_code != 302:
+        raise SystemExit(f'Could not log in at {path}; is the stand-in loaded (--setup)?')
+    return client
+
+
+def succeeded(response, redirect):
+    if redirect is not None:
+        return response.status_code == 302 and response.headers.get('Location', '').endswith(redirect)
+    return response.status_code == 200 and b'alert-danger' not in response.data
+
+
+def run_route(name, count, warmup, threads, data, monitor, seed):
+    login, prepare, request, redirect = ROUTES[name]
+    clients = [logged_in_client(login) for _ in range(threads)]
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+
+    def drive(worker, requests, timed):
+        client, rng = clients[worker], random.Random(f'{seed}-{name}-{worker}-{timed}')
+        for _ in range(requests):
+            if prepare:
+                prepare(client, rng, data)
+            start = time.perf_counter()
+            response = request(client, rng, data)
+            elapsed = time.perf_counter() - start
+            # Redirects are not followed, so drop the flash they queued.
+            with client.session_transaction() as sess:
+                sess.pop('_flashes', None)
+            if timed:
+                latencies[worker].append(elapsed)
+                errors[worker] += not succeeded(response, redirect)
+
+    drive(0, warmup, False)
+    before = statements_executed(monitor)
+    start = time.perf_counter()
+    workers = [threading.Thread(target=drive, args=(i, count // threads + (i < count % threads), True))
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - start
+    # The second SHOW counts itself.
+    statements = statements_executed(monitor) - before - 1
+
+    ms = np.concatenate([np.array(times) for times in latencies]) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'requests': len(ms),
+        'errors': sum(errors),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(ms.max()), 3),
+        'throughput_rps': round(len(ms) / wall, 1),
+        'queries_per_request': round(statements / len(ms), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous):
+    print(f"{'route':<24} {'reqs':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>8}")
+    for name, result in results.items():
+        print(f"{name:<24} {result['requests']:>6} {result['errors']:>6} {result['p50_ms']:>9.2f} "
+              f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['throughput_rps']:>8.1f} "
+              f"{result['queries_per_request']:>8.2f}")
+    if previous is None:
+        return
+    print()
+    print(f"Change against {previous['meta'].get('commit') or 'previous run'}")
+    print(f"{'route':<24} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'queries':>8}")
+    for name, result in results.items():
+        old = previous['routes'].get(name)
+        if old is None:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request'):
+            changes.append(f"{(result[key] - old[key]) / old[key] * 100:>+7.1f}%" if old[key] else f"{'-':>8}")
+        print(f"{name:<24} {' '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--setup', action='store_true',
+                        help='drop and reload --database from Project.sql plus generated data')
+    parser.add_argument('--scale', type=float, default=0.01, help='generate_data.py scale for --setup')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--routes', nargs='+', choices=list(ROUTES), default=list(ROUTES), metavar='ROUTE',
+                        help=', '.join(ROUTES))
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per route first')
+    parser.add_argument('--threads', type=int, default=1, help='concurrent clients per route')
+    parser.add_argument('--sample', type=int, default=500, help='medicines the run picks from')
+    parser.add_argument('--json', help='write the results here as JSON')
+    parser.add_argument('--compare', help='JSON from an earlier run to print changes against')
+    standin.add_arguments(parser)
+    args = parser.parse_args()
+    server = standin.connection_config(parser, args)
+
+    if args.setup:
+        # Connected without a database, which may not exist yet.
+        conn = mysql.connector.connect(**{key: value for key, value in server.items() if key != 'database'})
+        setup_database(conn, server['database'], args.scale, args.seed)
+        conn.close()
+    # The app's pool reads db_config when it is first used, so pointing the
+    # shared dict at the stand-in is enough.
+    db_config.clear()
+    db_config.update(server)
+
+    monitor = mysql.connector.connect(**db_config)
+    data, rows, version = prepare_run(monitor, args.sample, random.Random(args.seed))
+    print(f"MySQL {version}: " + ', '.join(f'{table} {count}' for table, count in rows.items()))
+
+    cursor = monitor.cursor()
+    results = {}
+    for name in args.routes:
+        results[name] = run_route(name, args.requests, args.warmup, args.threads, data, cursor, args.seed)
+    cursor.close()
+    monitor.close()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print_results(results, previous)
+
+    if args.json:
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'mysql': version,
+                'rows': rows,
+                'requests': args.requests,
+                'warmup': args.warmup,
+                'threads': args.threads,
+                'seed': args.seed,
+            },
+            'routes': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# Benchmark for medicine search: the old LIKE '%q%' query against the
+# in-memory index (substring and fuzzy modes) on a synthetic catalogue.
+#
+#   python bench_search.py                  # 100k medicines, LIKE run on in-memory SQLite
+#   python bench_search.py --size 20000
+#   python bench_search.py --mysql          # LIKE run on the database in config.py
+#
+# --mysql only reads from MEDICINES, so the LIKE figures there are for whatever
+# catalogue that database holds.
+import argparse
+import random
+import sqlite3
+import time
+
+import mysql.connector
+
+from app import MedicineSearchIndex
+from config import db_config
+
+LIKE_QUERY = """
+    SELECT m.MEDICINEID, m.MEDICINENAME, m.PRICE, m.MANUFACTURER, mc.CATEGORYNAME
+    FROM MEDICINES m
+    LEFT JOIN MEDICINECATEGORY mc ON m.CATEGORYID = mc.CATEGORYID
+    WHERE m.MEDICINENAME LIKE {}
+"""
+
+SYLLABLES = ['na', 'pa', 'se', 'clo', 'me', 'tryl', 'ome', 'pra', 'zole', 'ce', 'fix', 'amo', 'xi',
+             'cil', 'lin', 'ator', 'va', 'sta', 'tin', 'losa', 'tan', 'mon', 'te', 'lu', 'kast', 'ran']
+FORMS = ['Tablet', 'Capsule', 'Syrup', 'Suspension', 'Injection', 'Cream', 'Capsule (Enteric Coated)']
+STRENGTHS = ['5mg', '10mg', '20mg', '40mg', '250mg', '500mg', '100ml', '1g']
+MANUFACTURERS = ['Square Pharmaceuticals PLC', 'Beximco Pharma', 'Opsonin Pharma Ltd.', 'Incepta Pharmaceuticals',
+                 'Renata Limited', 'ACI Limited', 'Eskayef Pharmaceuticals', 'Healthcare Pharmaceuticals']
+CATEGORIES = ['Analgesics (painkillers)', 'Omeprazole', 'Metronidazole', 'Antibiotics', 'Antihistamines']
+
+
+def make_catalogue(size, seed=42):
+    rng = random.Random(seed)
+    rows, seen = [], set()
+    while len(rows) < size:
+        brand = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        name = f"{brand} {rng.choice(FORMS)} {rng.choice(STRENGTHS)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        category_id = rng.randint(1, len(CATEGORIES))
+        rows.append({
+            'MEDICINEID': len(rows) + 1,
+            'MEDICINENAME': name,
+            'PRICE': round(rng.uniform(0.5, 500), 2),
+            'MANUFACTURER': rng.choice(MANUFACTURERS),
+            'CATEGORYID': category_id,
+            'CATEGORYNAME': CATEGORIES[category_id - 1],
+        })
+    return rows
+
+
+def misspell(word, rng):
+    i = rng.randrange(len(word))
+    op = rng.choice(['drop', 'swap', 'replace'])
+    if op == 'drop':
+        return word[:i] + word[i + 1:]
+    if op == 'swap' and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice('abcdefghijklmnopqrstuvwxyz') + word[i + 1:]
+
+
+def make_queries(rows, count, seed=7):
+    rng = random.Random(seed)
+    exact, typos = [], []
+    for row in rng.sample(rows, count):
+        brand = row['MEDICINENAME'].split()[0]
+        exact.append(brand[1:6].lower())
+        typos.append(f"{misspell(brand.lower(), rng)} {row['MEDICINENAME'].split()[-1]}")
+    return exact, typos
+
+
+def sqlite_catalogue(rows):
+    db = sqlite3.connect(':memory:')
+    db.execute("CREATE TABLE MEDICINECATEGORY (CATEGORYID INTEGER PRIMARY KEY, CATEGORYNAME TEXT)")
+    db.execute("CREATE TABLE MEDICINES (MEDICINEID INTEGER PRIMARY KEY, MEDICINENAME TEXT UNIQUE, "
+               "CATEGORYID INTEGER, MANUFACTURER TEXT, PRICE REAL)")
+    db.executemany("INSERT INTO MEDICINECATEGORY VALUES (?, ?)", list(enumerate(CATEGORIES, start=1)))
+    db.executemany("INSERT INTO MEDICINES VALUES (?, ?, ?, ?, ?)",
+                   [(r['MEDICINEID'], r['MEDICINENAME'], r['CATEGORYID'], r['MANUFACTURER'], r['PRICE']) for r in rows])
+    return db
+
+
+def timed(label, queries, run):
+    hits = 0
+    start = time.perf_counter()
+    for q in queries:
+        hits += 1 if run(q) else 0
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed / len(queries) * 1000:>10.3f} ms/query   {hits}/{len(queries)} found")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000, help='number of synthetic medicines')
+    parser.add_argument('--queries', type=int, default=200, help='number of queries per mode')
+    parser.add_argument('--mysql', action='store_true', help='run the LIKE baseline against config.db_config')
+    args = parser.parse_args()
+
+    rows = make_catalogue(args.size)
+    exact, typos = make_queries(rows, args.queries)
+
+    start = time.perf_counter()
+    index = MedicineSearchIndex()
+    index.rebuild(rows)
+    print(f"Catalogue: {len(rows)} medicines, index built in {time.perf_counter() - start:.2f}s")
+
+    if args.mysql:
+        conn = mysql.connector.connect(**db_config)
+        cursor = conn.cursor(dictionary=True)
+
+        def like(q):
+            cursor.execute(LIKE_QUERY.format('%s'), (f'%{q}%',))
+            return cursor.fetchall()
+        baseline = 'LIKE (MySQL)'
+    else:
+        db = sqlite_catalogue(rows)
+
+        def like(q):
+            return db.execute(LIKE_QUERY.format('?'), (f'%{q}%',)).fetchall()
+        baseline = 'LIKE (SQLite, in-memory)'
+
+    timed(f"{baseline}, substring", exact, like)
+    timed(f"{baseline}, misspelt", typos, like)
+    timed("Index search, substring", exact, index.search)
+    timed("Index search, misspelt", typos, index.search)
+    timed("Index fuzzy_search, misspelt", typos, index.fuzzy_search)
+
+    if args.mysql:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
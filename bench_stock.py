@@ -0,0 +1,170 @@
+# Contention benchmark for stock decrements: many cashiers selling the same
+# medicine at one branch at once, through consume_stock (locked FEFO batches
+# plus a guarded UPDATE) and, for comparison, a naive read-then-write update.
+#
+#   python bench_stock.py --host 127.0.0.1 --database pharmacy
+#   python bench_stock.py --host 127.0.0.1 --database pharmacy --cashiers 32 --sales 100 --batches 8
+#
+# Runs only against a local stand-in loaded from Project.sql (see standin.py);
+# it refuses the database in config.py. A scratch medicine and its batches are
+# created at the first branch and deleted afterwards; no other stock is touched.
+# "lost" is units sold that never came off the shelf.
+import argparse
+import datetime
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errorcode
+
+import standin
+from app import consume_stock, OutOfStock
+
+
+def setup(server, batches, quantity):
+    conn = mysql.connector.connect(**server)
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(BRANCHID) FROM BRANCHES")
+    branch_id = cursor.fetchone()[0]
+    cursor.execute("INSERT INTO MEDICINES (MEDICINENAME, MANUFACTURER, PRICE) VALUES (%s, 'bench', 1.00)",
+                   (f'bench-stock-{time.time_ns()}',))
+    medicine_id = cursor.lastrowid
+    cursor.execute("SELECT COALESCE(MAX(STOCKID), 0) FROM MEDICINESTOCK")
+    first_id = cursor.fetchone()[0] + 1
+    today = datetime.date.today()
+    cursor.executemany("INSERT INTO MEDICINESTOCK (STOCKID, BRANCHID, MEDICINEID, QUANTITY, EXPIRYDATE) VALUES (%s, %s, %s, %s, %s)",
+                       [(first_id + i, branch_id, medicine_id, quantity, today + datetime.timedelta(days=30 * (i + 1)))
+                        for i in range(batches)])
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return branch_id, medicine_id
+
+
+def stock_state(server, medicine_id):
+    conn = mysql.connector.connect(**server)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(SUM(QUANTITY), 0), COALESCE(SUM(QUANTITY < 0), 0) FROM MEDICINESTOCK WHERE MEDICINEID = %s",
+                   (medicine_id,))
+    total, negative = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return int(total), int(negative)
+
+
+def reset(server, medicine_id, quantity):
+    conn = mysql.connector.connect(**server)
+    cursor = conn.cursor()
+    cursor.execute("UPDATE MEDICINESTOCK SET QUANTITY = %s WHERE MEDICINEID = %s", (quantity, medicine_id))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def teardown(server, medicine_id):
+    conn = mysql.connector.connect(**server)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM MEDICINESTOCK WHERE MEDICINEID = %s", (medicine_id,))
+    cursor.execute("DELETE FROM MEDICINES WHERE MEDICINEID = %s", (medicine_id,))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def atomic_sale(conn, branch_id, medicine_id, quantity):
+    consume_stock(conn, branch_id, [{'MEDICINEID': medicine_id, 'quantity': quantity}])
+
+
+def naive_sale(conn, branch_id, medicine_id, quantity):
+    # What a straightforward implementation would do: read the first batch
+    # with stock left, then write back the reduced figure.
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT STOCKID, QUANTITY FROM MEDICINESTOCK
+            WHERE BRANCHID = %s AND MEDICINEID = %s AND QUANTITY >= %s AND EXPIRYDATE >= CURDATE()
+            ORDER BY EXPIRYDATE, STOCKID LIMIT 1
+        """, (branch_id, medicine_id, quantity))
+        row = cursor.fetchone()
+        if row is None:
+            raise OutOfStock({medicine_id: quantity})
+        cursor.execute("UPDATE MEDICINESTOCK SET QUANTITY = %s WHERE STOCKID = %s", (row[1] - quantity, row[0]))
+    finally:
+        cursor.close()
+
+
+# Deadlock or lock wait timeout: the sale is retried, up to MAX_RETRIES times.
+RETRY_ERRORS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+MAX_RETRIES = 20
+
+
+def run(server, sale, branch_id, medicine_id, cashiers, sales, quantity):
+    sold = [0] * cashiers
+    refused = [0] * cashiers
+    retries = [0] * cashiers
+    errors = []
+
+    def cashier(n):
+        conn = mysql.connector.connect(**server)
+        try:
+            for _ in range(sales):
+                for attempt in range(MAX_RETRIES + 1):
+                    try:
+                        sale(conn, branch_id, medicine_id, quantity)
+                        conn.commit()
+                        sold[n] += quantity
+                    except OutOfStock:
+                        conn.rollback()
+                        refused[n] += 1
+                    except mysql.connector.Error as err:
+                        conn.rollback()
+                        if err.errno not in RETRY_ERRORS or attempt == MAX_RETRIES:
+                            raise
+                        retries[n] += 1
+                        continue
+                    break
+        except Exception as err:
+            errors.append(err)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=cashier, args=(n,)) for n in range(cashiers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return sum(sold), sum(refused), sum(retries), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cashiers', type=int, default=16, help='concurrent connections selling')
+    parser.add_argument('--sales', type=int, default=50, help='sales per cashier')
+    parser.add_argument('--quantity', type=int, default=1, help='units per sale')
+    parser.add_argument('--batches', type=int, default=4, help='scratch batches, one month of expiry apart')
+    parser.add_argument('--batch-size', type=int, default=150, help='units per scratch batch')
+    standin.add_arguments(parser)
+    args = parser.parse_args()
+    server = standin.connection_config(parser, args)
+
+    branch_id, medicine_id = setup(server, args.batches, args.batch_size)
+    try:
+        print(f"{args.cashiers} cashiers x {args.sales} sales of {args.quantity}, "
+              f"{args.batches} batches x {args.batch_size} units")
+        print(f"{'path':<8} {'sold':>6} {'refused':>8} {'retries':>8} {'shelf drop':>11} {'lost':>6} {'negative':>9} {'sales/s':>8}")
+        for name, sale in (('atomic', atomic_sale), ('naive', naive_sale)):
+            reset(server, medicine_id, args.batch_size)
+            before, _ = stock_state(server, medicine_id)
+            sold, refused, retries, elapsed = run(server, sale, branch_id, medicine_id, args.cashiers, args.sales, args.quantity)
+            after, negative = stock_state(server, medicine_id)
+            rate = args.cashiers * args.sales / elapsed
+            print(f"{name:<8} {sold:>6} {refused:>8} {retries:>8} {before - after:>11} {sold - (before - after):>6} {negative:>9} {rate:>8.0f}")
+    finally:
+        teardown(server, medicine_id)
+
+
+if __name__ == '__main__':
+    main()
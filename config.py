@@ -6,4 +6,101 @@ db_config = {
     'database': 'test'
 }
 
+# Connections kept open per gunicorn worker, and how long (seconds) a request
+# waits for one to free up before giving up.
+DB_POOL_SIZE = 5
+DB_POOL_TIMEOUT = 10
+
+# In-memory medicine search: seconds before a worker reloads its index from the
+# database, and the default cap on results per search.
+SEARCH_INDEX_TTL = 300
+SEARCH_RESULT_LIMIT = 50
+
+# In-memory branch inventory: seconds before a worker reloads it from
+# MEDICINESTOCK, which bounds drift from stock writes made on other workers.
+INVENTORY_INDEX_TTL = 300
+
+# Stock alerts: units below which a medicine counts as low at a branch when no
+# REORDERLEVELS row says otherwise, and the default "expiring within" window.
+LOW_STOCK_THRESHOLD = 20
+EXPIRY_ALERT_DAYS = 30
+
+# Sales take their quantities out of the branch's unexpired MEDICINESTOCK
+# batches and are refused when those cannot cover them. A deployment whose
+# stock table has not been kept up to date should set this to False until it
+# has been counted in: sales then take whatever stock there is and go through.
+STOCK_ENFORCED = True
+
+# Reorder planner: days of sales history averaged into daily demand, supplier
+# lead time in days, and the days of stock an order should leave on hand.
+REORDER_WINDOW_DAYS = 28
+REORDER_LEAD_DAYS = 3
+REORDER_COVER_DAYS = 14
+
+# Admin dashboard reports: default date range in days, rows in the top
+# medicines list, how many (report, date range) results each worker keeps, and
+# the longest a cached result is served (a sale that commits with a lower
+# SALEDETAILID than one already seen does not retire it sooner).
+REPORT_DEFAULT_DAYS = 30
+REPORT_TOP_N = 10
+REPORT_CACHE_SIZE = 64
+REPORT_CACHE_TTL = 120
+
+# Days of sales history recomputed per transaction by
+# `flask --app app rebuild-sales-rollups`.
+ROLLUP_REBUILD_CHUNK_DAYS = 31
+
+# Rows fetched from the database per batch while streaming a CSV export.
+EXPORT_BATCH_SIZE = 2000
+
+# Bulk CSV import: rows inserted and committed per batch, and how many rejected
+# rows the upload page lists (the rest are only counted).
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_ERROR_LIMIT = 500
+
+# Typeahead (/search/suggest): maximum suggestions per keystroke, and how many
+# distinct prefixes each worker keeps cached.
+SUGGEST_LIMIT = 10
+SUGGEST_CACHE_SIZE = 2048
+
+# Sale numbers each worker reserves from SALESEQUENCE in one round trip.
+SALE_ID_BLOCK_SIZE = 20
+
+# Largest basket accepted by the bulk sale endpoint in one request.
+BULK_SALE_MAX_LINES = 1000
+
+# Seconds a worker reuses its cached dropdown lists (branches, medicines, ...).
+REFERENCE_CACHE_TTL = 60
+
+# Sales shown per page of the employee sales ledger.
+SALES_PAGE_SIZE = 25
+
+# Orders shown per page of the online orders feed.
+ORDERS_PAGE_SIZE = 25
+
+# Live order feed: how often (seconds) each worker's poller checks for new
+# orders, how many recent orders it keeps for reconnecting clients, and how
+# often idle streams get a keepalive comment. Each poll re-reads the orders
+# dated within ORDER_FEED_OVERLAP seconds of the newest one seen, so orders
+# whose IDs commit out of order are still picked up.
+ORDER_FEED_POLL_INTERVAL = 2
+ORDER_FEED_BACKLOG = 500
+ORDER_FEED_KEEPALIVE = 15
+ORDER_FEED_OVERLAP = 60
+
+# Customer carts live server-side. With CART_STORE_PATH = None, up to
+# CART_STORE_SIZE carts are kept in the process's memory (least recently used
+# dropped first), which only works with a single worker process. When running
+# several gunicorn workers, set it to a SQLite file path (e.g. 'carts.sqlite3',
+# relative to the directory gunicorn starts in) that every worker on the host
+# shares; the file is created on the first cart request.
+CART_STORE_SIZE = 10000
+CART_STORE_PATH = None
+
+# Priced carts memoised per worker: how many to keep, and seconds before one is
+# re-priced anyway, which bounds how long a price edit made on another worker
+# can go unseen.
+CART_PRICE_CACHE_SIZE = 4096
+CART_PRICE_TTL = 30
+
 SECRET_KEY = 'a_very_secret_and_long_random_string_for_flask_sessions'
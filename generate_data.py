@@ -0,0 +1,515 @@
+# Deterministic synthetic data for scale testing, on top of Project.sql's seed
+# rows. Every table with a foreign key only references rows generated before
+# it (or seed rows), so the data loads with FOREIGN_KEY_CHECKS on; the derived
+# tables (SALESSUMMARY, the daily rollups, SALESEQUENCE) are rebuilt from the
+# loaded SALESDETAILS with the app's own queries (rollups.py).
+#
+#   python generate_data.py --out data/             # tab-separated files + load.sql
+#   cd data && mysql --local-infile=1 pharmacy < load.sql
+#   python generate_data.py --mysql --host 127.0.0.1 --database pharmacy
+#   python generate_data.py --mysql --host 127.0.0.1 --database pharmacy --scale 0.01
+#
+# --mysql inserts straight into a local stand-in named with --host and
+# --database (see standin.py); the database in config.py is refused.
+#
+# The same --seed and counts always produce the same rows, with dates counted back
+# from the day it runs. Load into a fresh copy of Project.sql: generated IDs
+# start after the seed rows' IDs.
+import argparse
+import datetime
+import os
+import time
+
+import mysql.connector
+import numpy as np
+
+import standin
+from rollups import REBUILD_SALES_SUMMARY_QUERY, REBUILD_ROLLUP_QUERIES, rebuild_sales_summary, rebuild_sales_rollups
+
+# Highest IDs among Project.sql's seed rows; generated rows are numbered after
+# them. Customer and employee IDs are six digits in the seed, so generated ones
+# start at 200000.
+SEED_MAX = {
+    'branches': 4, 'medicinecategory': 3, 'medicines': 4, 'suppliers': 2, 'shifts': 2,
+    'medicinestock': 17, 'attendance': 2, 'salesdetails': 4, 'onlineorders': 4,
+    'customers': 199999, 'employees': 199999,
+}
+
+AREAS = [
+    ('Dhanmondi', 'Dhaka'), ('Gulshan 1', 'Dhaka'), ('Gulshan 2', 'Dhaka'), ('Banani', 'Dhaka'),
+    ('Mirpur 1', 'Dhaka'), ('Mirpur 10', 'Dhaka'), ('Mohammadpur', 'Dhaka'), ('Uttara Sector 7', 'Dhaka'),
+    ('Uttara Sector 13', 'Dhaka'), ('Bashundhara', 'Dhaka'), ('Badda', 'Dhaka'), ('Rampura', 'Dhaka'),
+    ('Malibagh', 'Dhaka'), ('Shantinagar', 'Dhaka'), ('Farmgate', 'Dhaka'), ('Tejgaon', 'Dhaka'),
+    ('Lalbagh', 'Dhaka'), ('Old Dhaka', 'Dhaka'), ('Jatrabari', 'Dhaka'), ('Khilgaon', 'Dhaka'),
+    ('Savar', 'Dhaka'), ('Tongi', 'Gazipur'), ('Gazipur Chowrasta', 'Gazipur'), ('Narayanganj Sadar', 'Narayanganj'),
+    ('GEC Circle', 'Chattogram'), ('Nasirabad', 'Chattogram'), ('Halishahar', 'Chattogram'), ('Chawkbazar', 'Chattogram'),
+    ('Zindabazar', 'Sylhet'), ('Ambarkhana', 'Sylhet'), ('Boalia', 'Rajshahi'), ('Uposhohor', 'Rajshahi'),
+    ('Sonadanga', 'Khulna'), ('Khalishpur', 'Khulna'), ('Nathullabad', 'Barishal'), ('Kandirpar', 'Cumilla'),
+    ('Jahangirpur', 'Rangpur'), ('Ganginarpar', 'Mymensingh'), ('Bogura Sadar', 'Bogura'), ('Cox’s Bazar Sadar', 'Cox’s Bazar'),
+]
+FIRST_NAMES = [
+    'Abdul', 'Abu', 'Afsana', 'Ahmed', 'Aklima', 'Alamgir', 'Amina', 'Anika', 'Anisur', 'Arif', 'Ayesha', 'Babul',
+    'Delwar', 'Dilruba', 'Enamul', 'Farhana', 'Farid', 'Fatema', 'Habib', 'Hasan', 'Humayun', 'Imran', 'Jahangir',
+    'Jannat', 'Kamal', 'Kawsar', 'Khadija', 'Liton', 'Mahbub', 'Mamun', 'Marium', 'Masud', 'Mehedi', 'Mitu',
+    'Monir', 'Mosharraf', 'Nadia', 'Nasrin', 'Nazmul', 'Nusrat', 'Parvez', 'Rabeya', 'Rafiq', 'Rahim', 'Rakib',
+    'Rasel', 'Rehana', 'Riad', 'Rubina', 'Saiful', 'Sakib', 'Salma', 'Shahin', 'Shamim', 'Sharmin', 'Shirin',
+    'Sohel', 'Sumaiya', 'Tahmina', 'Tanvir', 'Tania', 'Touhid', 'Yasmin', 'Zahid', 'Zakir', 'Zannatul',
+]
+MIDDLE_NAMES = [
+    'Ahmed', 'Akter', 'Alam', 'Ali', 'Amin', 'Anwar', 'Bari', 'Faruk', 'Ferdous', 'Haque', 'Hossain', 'Islam',
+    'Jahan', 'Kabir', 'Karim', 'Khatun', 'Mahmud', 'Majumder', 'Miah', 'Molla', 'Nahar', 'Rahman', 'Rashid',
+    'Sarkar', 'Siddique', 'Sultana', 'Talukder', 'Uddin', 'Ullah', 'Zaman',
+]
+LAST_NAMES = [
+    'Akand', 'Bhuiyan', 'Biswas', 'Chowdhury', 'Das', 'Dewan', 'Ghosh', 'Howlader', 'Joarder', 'Khan', 'Khandaker',
+    'Mallick', 'Mandal', 'Mia', 'Mollah', 'Munshi', 'Patwary', 'Pramanik', 'Roy', 'Saha', 'Shaikh', 'Shikder',
+    'Sikder', 'Talukdar', 'Tarafder',
+]
+CATEGORIES = [
+    'Analgesics', 'Antacids', 'Antibiotics', 'Anticoagulants', 'Antidepressants', 'Antidiabetics', 'Antiemetics',
+    'Antifungals', 'Antihistamines', 'Antihypertensives', 'Antimalarials', 'Antipsychotics', 'Antipyretics',
+    'Antispasmodics', 'Antivirals', 'Anxiolytics', 'Beta Blockers', 'Bronchodilators', 'Calcium Supplements',
+    'Cholesterol Lowering', 'Corticosteroids', 'Cough Suppressants', 'Decongestants', 'Dermatologicals',
+    'Diuretics', 'Eye Preparations', 'Hormonal Contraceptives', 'Iron Supplements', 'Laxatives', 'Muscle Relaxants',
+    'Oral Rehydration', 'Proton Pump Inhibitors', 'Thyroid Preparations', 'Vaccines', 'Vitamins',
+]
+MANUFACTURERS = [
+    'ACI Limited', 'Acme Laboratories', 'Aristopharma', 'Beacon Pharmaceuticals', 'Beximco Pharma',
+    'Drug International', 'Eskayef Pharmaceuticals', 'General Pharmaceuticals', 'Globe Pharmaceuticals',
+    'Healthcare Pharmaceuticals', 'Ibn Sina Pharmaceutical', 'Incepta Pharmaceuticals', 'Navana Pharmaceuticals',
+    'Novo Healthcare', 'Opsonin Pharma Ltd.', 'Orion Pharma', 'Popular Pharmaceuticals', 'Radiant Pharmaceuticals',
+    'Renata Limited', 'Square Pharmaceuticals PLC', 'Sun Pharmaceutical (Bangladesh)', 'Ziska Pharmaceuticals',
+]
+SYLLABLES = ['na', 'pa', 'se', 'clo', 'me', 'tryl', 'o', 'pra', 'zo', 'ce', 'fix', 'a', 'mo', 'xi', 'cil', 'lin',
+             'to', 'va', 'sta', 'tin', 'lo', 'sar', 'mon', 'te', 'lu', 'ka', 'ran', 'di', 'ro', 'fen', 'ni',
+             'sol', 'ex', 'ri', 'vo', 'bo', 'dex', 'ta', 'ze', 'nol']
+FORMS = ['Tablet', 'Capsule', 'Syrup', 'Suspension', 'Injection', 'Cream', 'Drops']
+STRENGTHS = ['5mg', '10mg', '20mg', '40mg', '100mg', '250mg', '500mg', '1g', '100ml']
+DISTRIBUTORS = [
+    'Al-Madina Distribution', 'Bengal Medical Supplies', 'City Drug House', 'Delta Pharma Traders',
+    'Green Life Distributors', 'Hossain Medical Agency', 'Janata Drug Store', 'Khan Brothers Pharma',
+    'Lazz Pharma Wholesale', 'Medi Hub Traders', 'Mitford Medicine Market', 'Nova Distribution',
+    'Popular Drug Supply', 'Rahman Pharma Agency', 'Sylhet Medical Traders', 'Tasnim Pharma Supply',
+]
+COUNTER_PAYMENTS = (['Cash', 'Bkash', 'Card', 'Nagad'], [0.55, 0.25, 0.12, 0.08])
+ONLINE_PAYMENTS = (['COD', 'Bkash', 'Card'], [0.6, 0.3, 0.1])
+QUANTITIES = ([1, 2, 3, 4, 5, 6, 10, 14, 20, 30], [0.22, 0.16, 0.1, 0.06, 0.08, 0.06, 0.18, 0.06, 0.05, 0.03])
+# (name, start minute, end minute); only the larger branches run a night shift.
+SHIFTS = [('Morning', 8 * 60, 16 * 60), ('Evening', 16 * 60, 24 * 60), ('Night', 0, 8 * 60)]
+NULL = '\\N'
+# Moves the next SALEID past the generated sales.
+SEQUENCE_QUERY = ("UPDATE `salesequence` SET NEXTVALUE = GREATEST(NEXTVALUE, "
+                  "(SELECT COALESCE(MAX(SALEID), 0) + 1 FROM `salesdetails`)) WHERE NAME = 'SALEID'")
+CHUNK_ROWS = 200000
+
+DEFAULT_COUNTS = {
+    'branches': 50, 'employees': 1000, 'customers': 200000, 'medicines': 100000, 'stock': 300000,
+    'sales_lines': 10000000, 'orders': 1000000,
+}
+COUNT_HELP = {
+    'stock': 'stock batches',
+    'sales_lines': 'SALESDETAILS rows (approximate)',
+    'orders': 'ONLINEORDERS rows (approximate)',
+}
+DEFAULT_DAYS = 3 * 365
+
+MINUTE_TIMES = np.array([f'{m // 60 % 24:02d}:{m % 60:02d}:00' for m in range(2 * 24 * 60)], dtype=object)
+
+
+def strs(values):
+    return list(map(str, values.tolist()))
+
+
+def rows(*columns):
+    # Tab-separated lines from equal-length lists of strings.
+    return list(map('\t'.join, zip(*columns)))
+
+
+def money(cents):
+    return list(map('{:.2f}'.format, (cents / 100).tolist()))
+
+
+def unique_names(rng, count, *parts):
+    # Distinct names made from one word of each list, in random order; a number
+    # is appended once every combination has been used.
+    sizes = [len(words) for words in parts]
+    combos = int(np.prod(sizes))
+    picks = np.concatenate([rng.permutation(combos) for _ in range(count // combos + 1)])[:count]
+    names = []
+    for i, pick in enumerate(picks.tolist()):
+        words = []
+        for words_list, size in zip(parts, sizes):
+            words.append(words_list[pick % size])
+            pick //= size
+        name = ' '.join(words)
+        names.append(name if i < combos else f'{name} {i // combos + 1}')
+    return names
+
+
+def scaled_counts(counts, scale):
+    return {name: max(1, int(count * scale)) for name, count in counts.items()}
+
+
+class Generator:
+    def __init__(self, seed, counts, days, today):
+        self.rng = np.random.default_rng(seed)
+        self.counts = counts
+        self.days = days
+        self.first_day = today - datetime.timedelta(days=days)
+        self.day_strings = np.array([(self.first_day + datetime.timedelta(days=d)).isoformat()
+                                     for d in range(days)], dtype=object)
+
+    def ids(self, table, count):
+        return np.arange(SEED_MAX[table] + 1, SEED_MAX[table] + 1 + count)
+
+    def branches(self):
+        count = self.counts['branches']
+        self.branch_ids = self.ids('branches', count)
+        # Footfall differs a lot between branches.
+        size = self.rng.lognormal(0, 0.5, count)
+        self.branch_weights = size / size.sum()
+        names, locations = [], []
+        for i in range(count):
+            area, city = AREAS[i % len(AREAS)]
+            names.append(area if i < len(AREAS) else f'{area} {i // len(AREAS) + 1}')
+            locations.append(f'{area}, {city}')
+        phones = [f'015{branch_id:08d}' for branch_id in self.branch_ids.tolist()]
+        yield 'branches', ('BRANCHID', 'BRANCHNAME', 'LOCATION', 'BRANCHMANAGERNUBMBER'), \
+            rows(strs(self.branch_ids), names, locations, phones)
+
+    def categories(self):
+        count = len(CATEGORIES)
+        self.category_ids = self.ids('medicinecategory', count)
+        details = [f'Medicines used as {name.lower()}.' for name in CATEGORIES]
+        yield 'medicinecategory', ('CATEGORYID', 'CATEGORYNAME', 'CATAGORYDETAILS'), \
+            rows(strs(self.category_ids), CATEGORIES, details)
+
+    def medicines(self):
+        count = self.counts['medicines']
+        rng = self.rng
+        self.medicine_ids = self.ids('medicines', count)
+        # Three products (form and strength) per brand.
+        brands = unique_names(rng, count // 3 + 1, SYLLABLES, SYLLABLES, SYLLABLES)
+        variants = len(FORMS) * len(STRENGTHS)
+        names, seen = [], set()
+        for i in range(count):
+            brand = brands[i // 3].replace(' ', '').capitalize()
+            variant = (i // 3 * 11 + i % 3 * 7) % variants
+            name = f'{brand} {FORMS[variant % len(FORMS)]} {STRENGTHS[variant // len(FORMS)]}'
+            # Different syllables can still spell the same brand.
+            if name.lower() in seen:
+                name = f'{name} ({i})'
+            seen.add(name.lower())
+            names.append(name)
+        categories = [str(c) for c in rng.choice(self.category_ids, count).tolist()]
+        makers = [MANUFACTURERS[m] for m in rng.integers(0, len(MANUFACTURERS), count).tolist()]
+        # Most medicines cost a few taka per unit, a long tail costs hundreds.
+        self.price_cents = np.clip(np.round(rng.lognormal(np.log(8), 1.0, count) * 20) * 5, 50, 500000).astype(np.int64)
+        self.price_strings = np.array(money(self.price_cents), dtype=object)
+        # Zipf-like demand over a random ranking of the catalogue.
+        rank = rng.permutation(count) + 1
+        popularity = 1.0 / rank ** 1.1
+        self.medicine_weights = popularity / popularity.sum()
+        self.medicine_strings = np.array(strs(self.medicine_ids), dtype=object)
+        yield 'medicines', ('MEDICINEID', 'MEDICINENAME', 'CATEGORYID', 'MANUFACTURER', 'PRICE'), \
+            rows(strs(self.medicine_ids), names, categories, makers, list(self.price_strings))
+
+    def suppliers(self):
+        rng = self.rng
+        supplied = np.flatnonzero(rng.random(len(self.medicine_ids)) < 0.8)
+        supplier_ids = self.ids('suppliers', len(supplied))
+        names = [DISTRIBUTORS[d] for d in rng.integers(0, len(DISTRIBUTORS), len(supplied)).tolist()]
+        contacts = [f'016{supplier_id:08d}' for supplier_id in supplier_ids.tolist()]
+        yield 'suppliers', ('SUPPLIERID', 'MEDICINEID', 'SUPPLIERNAME', 'CONTACT'), \
+            rows(strs(supplier_ids), list(self.medicine_strings[supplied]), names, contacts)
+
+    def employees(self):
+        rng = self.rng
+        branches = len(self.branch_ids)
+        count = max(self.counts['employees'], 3 * branches)
+        # Three per branch, the rest spread by branch size; the first at each
+        # branch is its manager.
+        extra = rng.choice(branches, count - 3 * branches, p=self.branch_weights)
+        branch_index = np.sort(np.concatenate([np.repeat(np.arange(branches), 3), extra]))
+        self.employee_ids = self.ids('employees', count)
+        self.employee_branch = branch_index
+        first_at_branch = np.r_[True, branch_index[1:] != branch_index[:-1]]
+        self.branch_managers = self.employee_ids[first_at_branch]
+        roles = rng.choice(np.array(['Pharmacist', 'Cashier', 'Staff'], dtype=object), count, p=[0.3, 0.4, 0.3])
+        roles[first_at_branch] = 'Branch Manager'
+        ids = strs(self.employee_ids)
+        self.employee_strings = np.array(ids, dtype=object)
+        names = unique_names(rng, count, FIRST_NAMES, MIDDLE_NAMES, LAST_NAMES)
+        yield 'employees', ('EMPLOYEEID', 'EMPLOYEENAME', 'EMPLOYEEPIN', 'Email', 'DESIGNATION', 'CONTACT', 'BRANCHID'), \
+            rows(ids, names, ids, [f'{i}@curepoint.com' for i in ids], roles.tolist(),
+                 [f'018{i:08d}' for i in self.employee_ids.tolist()], strs(self.branch_ids[branch_index]))
+
+    def shifts(self):
+        # Morning and evening at every branch, a night shift at the busiest
+        # fifth; employees work their branch's shifts in rotation.
+        night = self.branch_weights >= np.quantile(self.branch_weights, 0.8)
+        shift_rows, self.branch_shifts = [], []
+        shift_id = SEED_MAX['shifts']
+        for b in range(len(self.branch_ids)):
+            ids = []
+            for name, start, end in SHIFTS[:3 if night[b] else 2]:
+                shift_id += 1
+                ids.append(shift_id)
+                shift_rows.append((str(shift_id), name, MINUTE_TIMES[start], MINUTE_TIMES[end],
+                                   str(self.branch_managers[b])))
+            self.branch_shifts.append(ids)
+        yield 'shifts', ('SHIFTID', 'SHIFTNAME', 'STARTTIME', 'ENDTIME', 'EMPLOYEEID'), \
+            list(map('\t'.join, shift_rows))
+
+    def customers(self):
+        rng = self.rng
+        count = self.counts['customers']
+        self.customer_ids = self.ids('customers', count)
+        self.customer_strings = np.array(strs(self.customer_ids), dtype=object)
+        # A few regulars account for much of the registered trade.
+        loyalty = 1.0 / (rng.permutation(count) + 1) ** 0.8
+        self.customer_weights = loyalty / loyalty.sum()
+        names = unique_names(rng, count, FIRST_NAMES, MIDDLE_NAMES, LAST_NAMES)
+        ids = self.customer_strings.tolist()
+        emails = [f"{name.split()[0].lower()}.{i}@example.com" for name, i in zip(names, ids)]
+        yield 'customers', ('CUSTOMERID', 'CUSTOMERNAME', 'CONTACT', 'EMAIL', 'PASSWORD'), \
+            rows(ids, names, [f'017{i:08d}' for i in self.customer_ids.tolist()], emails, [f'pass{i}' for i in ids])
+
+    def stock(self):
+        rng = self.rng
+        count = self.counts['stock']
+        stock_ids = self.ids('medicinestock', count)
+        # Popular medicines are stocked more widely; a few batches have run
+        # out or already expired.
+        spread = self.medicine_weights ** 0.5
+        for start in range(0, count, CHUNK_ROWS):
+            n = min(CHUNK_ROWS, count - start)
+            branch = rng.choice(self.branch_ids, n, p=self.branch_weights)
+            medicine = rng.choice(len(self.medicine_ids), n, p=spread / spread.sum())
+            quantity = np.where(rng.random(n) < 0.05, 0, rng.integers(10, 500, n))
+            expiry = [(self.first_day + datetime.timedelta(days=self.days + int(d))).isoformat()
+                      for d in rng.integers(-90, 3 * 365, n)]
+            yield 'medicinestock', ('STOCKID', 'BRANCHID', 'MEDICINEID', 'QUANTITY', 'EXPIRYDATE'), \
+                rows(strs(stock_ids[start:start + n]), strs(branch), list(self.medicine_strings[medicine]),
+                     strs(quantity), expiry)
+
+    def attendance(self):
+        rng = self.rng
+        employees = len(self.employee_ids)
+        shift_choice = np.array([rng.choice(self.branch_shifts[b]) for b in self.employee_branch.tolist()])
+        shift_start = {sid: start for shifts in self.branch_shifts for sid, (_, start, _) in zip(shifts, SHIFTS)}
+        shift_end = {sid: end for shifts in self.branch_shifts for sid, (_, _, end) in zip(shifts, SHIFTS)}
+        start = np.array([shift_start[s] for s in shift_choice.tolist()])
+        end = np.array([shift_end[s] for s in shift_choice.tolist()])
+        day_off = rng.integers(0, 7, employees)
+        shift_strings = np.array(strs(shift_choice), dtype=object)
+        branch_strings = np.array(strs(self.branch_ids[self.employee_branch]), dtype=object)
+        next_id = SEED_MAX['attendance'] + 1
+        days_per_chunk = max(1, CHUNK_ROWS // employees)
+        for first in range(0, self.days, days_per_chunk):
+            days = np.arange(first, min(first + days_per_chunk, self.days))
+            day, who = np.divmod(np.arange(len(days) * employees), employees)
+            day = days[day]
+            # One day off a week, and about one absence in twenty days.
+            present = ((day + self.first_day.weekday()) % 7 != day_off[who]) & (rng.random(len(day)) >= 0.05)
+            day, who = day[present], who[present]
+            n = len(day)
+            time_in = np.clip(start[who] + np.round(rng.normal(3, 8, n)).astype(np.int64), 0, None)
+            time_out = end[who] + np.round(rng.normal(5, 12, n)).astype(np.int64)
+            time_out = np.clip(time_out, time_in + 60, 2 * 24 * 60 - 1)
+            ids = np.arange(next_id, next_id + n)
+            next_id += n
+            yield 'attendance', ('ATTENDANCEID', 'EMPLOYEEID', 'SHIFTID', 'BRANCHID', 'ATTENDANCEDATE', 'TIMEIN', 'TIMEOUT'), \
+                rows(strs(ids), list(self.employee_strings[who]), list(shift_strings[who]), list(branch_strings[who]),
+                     list(self.day_strings[day]), list(MINUTE_TIMES[time_in]), list(MINUTE_TIMES[time_out]))
+
+    def sales(self):
+        # Sale lines in (date, time) order, each sale's lines together, with
+        # the ONLINEORDERS rows for the lines of online sales.
+        rng = self.rng
+        lines_wanted = self.counts['sales_lines']
+        basket_mean = 2.2
+        online_share = min(self.counts['orders'] / max(lines_wanted, 1), 1.0)
+        # Growth over the period, a quieter Friday and a monsoon bump.
+        d = np.arange(self.days)
+        weekday = (d + self.first_day.weekday()) % 7
+        month = np.array([(self.first_day + datetime.timedelta(days=int(x))).month for x in d])
+        volume = (1 + 0.3 * d / 365) * np.where(weekday == 4, 0.8, 1.0) * np.where((month >= 6) & (month <= 9), 1.15, 1.0)
+        sales_per_day = rng.multinomial(int(lines_wanted / basket_mean), volume / volume.sum())
+
+        # Employees are numbered branch by branch.
+        staff = np.bincount(self.employee_branch, minlength=len(self.branch_ids))
+        first_employee = np.concatenate([[0], np.cumsum(staff)[:-1]])
+        branch_strings = np.array(strs(self.branch_ids), dtype=object)
+        sale_id = 0
+        line_id = SEED_MAX['salesdetails']
+        order_id = SEED_MAX['onlineorders']
+        quantity_strings = np.array([str(q) for q in range(max(QUANTITIES[0]) + 1)], dtype=object)
+        counter_methods = np.array(COUNTER_PAYMENTS[0], dtype=object)
+        online_methods = np.array(ONLINE_PAYMENTS[0], dtype=object)
+        day = 0
+        while day < self.days:
+            last = day
+            total = 0
+            while last < self.days and total < CHUNK_ROWS / basket_mean:
+                total += sales_per_day[last]
+                last += 1
+            sale_day = np.repeat(np.arange(day, last), sales_per_day[day:last])
+            day = last
+            n = len(sale_day)
+            if n == 0:
+                continue
+            minute = np.clip(np.round(rng.normal(15 * 60, 4 * 60, n)), 8 * 60, 23 * 60 + 59).astype(np.int64)
+            order = np.lexsort((minute, sale_day))
+            sale_day, minute = sale_day[order], minute[order]
+            online = rng.random(n) < online_share
+            branch = rng.choice(len(self.branch_ids), n, p=self.branch_weights)
+            employee = first_employee[branch] + rng.integers(0, 1 << 30, n) % staff[branch]
+            # Walk-ins buy without an account; online orders always have one.
+            registered = online | (rng.random(n) < 0.45)
+            customer = rng.choice(len(self.customer_ids), n, p=self.customer_weights)
+            payment = np.where(online, online_methods[rng.choice(len(online_methods), n, p=ONLINE_PAYMENTS[1])],
+                               counter_methods[rng.choice(len(counter_methods), n, p=COUNTER_PAYMENTS[1])])
+            basket = np.minimum(rng.geometric(1 / basket_mean, n), 15)
+
+            sale_ids = np.arange(sale_id + 1, sale_id + 1 + n)
+            sale_id += n
+            per_line = np.repeat(np.arange(n), basket)
+            m = len(per_line)
+            medicine = rng.choice(len(self.medicine_ids), m, p=self.medicine_weights)
+            quantity = rng.choice(QUANTITIES[0], m, p=QUANTITIES[1])
+            line_ids = np.arange(line_id + 1, line_id + 1 + m)
+            line_id += m
+            customer_strings = np.where(registered, self.customer_strings[customer], NULL)
+            yield 'salesdetails', ('SALEDETAILID', 'SALEID', 'SALEDATE', 'BRANCHID', 'CUSTOMERID', 'EMPLOYEEID',
+                                   'PRICEPERUNIT', 'TOTALAMOUNT', 'PAYMENTMETHOD', 'MEDICINEID', 'QUANTITY'), \
+                rows(strs(line_ids), strs(sale_ids[per_line]), list(self.day_strings[sale_day[per_line]]),
+                     list(branch_strings[branch[per_line]]), list(customer_strings[per_line]),
+                     list(self.employee_strings[employee[per_line]]), list(self.price_strings[medicine]),
+                     money(self.price_cents[medicine] * quantity), list(payment[per_line]),
+                     list(self.medicine_strings[medicine]), list(quantity_strings[quantity]))
+
+            online_lines = np.flatnonzero(online[per_line])
+            if len(online_lines):
+                k = len(online_lines)
+                sale_of = per_line[online_lines]
+                order_ids = np.arange(order_id + 1, order_id + 1 + k)
+                order_id += k
+                placed = [f'{self.day_strings[sale_day[s]]} {MINUTE_TIMES[minute[s]]}' for s in sale_of.tolist()]
+                area = rng.integers(0, len(AREAS), k)
+                house = rng.integers(1, 120, k)
+                road = rng.integers(1, 30, k)
+                addresses = [f'House {h}, Road {r}, {AREAS[a][0]}, {AREAS[a][1]}'
+                             for h, r, a in zip(house.tolist(), road.tolist(), area.tolist())]
+                yield 'onlineorders', ('ORDERID', 'CUSTOMERID', 'SALEDETAILID', 'ORDERDATE', 'DELIVERYADDRESS'), \
+                    rows(strs(order_ids), list(self.customer_strings[customer[sale_of]]), strs(line_ids[online_lines]),
+                         placed, addresses)
+        self.last_sale_id = sale_id
+
+    def tables(self):
+        for step in (self.branches, self.categories, self.medicines, self.suppliers, self.employees,
+                     self.shifts, self.customers, self.stock, self.attendance, self.sales):
+            yield from step()
+
+
+class DirectorySink:
+    # One tab-separated file per table and a load.sql that loads them in
+    # foreign key order with LOAD DATA LOCAL INFILE, then rebuilds the
+    # derived tables.
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.files = {}
+
+    def write(self, table, columns, lines):
+        if table not in self.files:
+            self.files[table] = (open(os.path.join(self.path, f'{table}.tsv'), 'w', encoding='utf-8', newline='\n'),
+                                 columns)
+        out = self.files[table][0]
+        out.write('\n'.join(lines))
+        out.write('\n')
+
+    def finish(self):
+        statements = ['USE `pharmacy`;']
+        for table, (out, columns) in self.files.items():
+            out.close()
+            statements.append(f"LOAD DATA LOCAL INFILE '{table}.tsv' INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+                              f"({', '.join(columns)});")
+        statements.append("DELETE FROM `salessummary`;")
+        statements.append(' '.join(REBUILD_SALES_SUMMARY_QUERY.split()) + ';')
+        statements.append("DELETE FROM `salesdailymedicine`;")
+        statements.append("DELETE FROM `salesdailyemployee`;")
+        for query in REBUILD_ROLLUP_QUERIES:
+            statements.append(' '.join((query % ("'1000-01-01'", "'9999-12-31'")).split()) + ';')
+        statements.append(SEQUENCE_QUERY + ';')
+        with open(os.path.join(self.path, 'load.sql'), 'w', encoding='utf-8') as out:
+            out.write('-- Written by generate_data.py. Load Project.sql first, then from this directory:\n')
+            out.write('--   mysql --local-infile=1 pharmacy < load.sql\n')
+            out.write('\n'.join(statements) + '\n')
+
+
+class MySQLSink:
+    # Parameterized INSERTs of up to batch rows on one connection, committed
+    # per batch; executemany sends each batch as one multi-row INSERT.
+    def __init__(self, conn, batch):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch = batch
+
+    def write(self, table, columns, lines):
+        insert = f"INSERT INTO `{table}` ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        for start in range(0, len(lines), self.batch):
+            self.cursor.executemany(insert, [[None if value == NULL else value for value in line.split('\t')]
+                                             for line in lines[start:start + self.batch]])
+            self.conn.commit()
+
+    def finish(self):
+        rebuild_sales_summary(self.conn)
+        rebuild_sales_rollups(self.conn)
+        self.cursor.execute(SEQUENCE_QUERY)
+        self.conn.commit()
+        self.cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--out', help='directory for the tab-separated files and load.sql')
+    target.add_argument('--mysql', action='store_true', help='insert straight into the stand-in given by --host and --database')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies every count below')
+    for name, default in DEFAULT_COUNTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default, help=COUNT_HELP.get(name))
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help='days of sales and attendance history')
+    parser.add_argument('--batch', type=int, default=5000, help='rows per INSERT with --mysql')
+    standin.add_arguments(parser)
+    args = parser.parse_args()
+    server = standin.connection_config(parser, args) if args.mysql else None
+
+    counts = scaled_counts({name: getattr(args, name) for name in DEFAULT_COUNTS}, args.scale)
+    generator = Generator(args.seed, counts, args.days, datetime.date.today())
+    if args.mysql:
+        conn = mysql.connector.connect(**server)
+        sink = MySQLSink(conn, args.batch)
+    else:
+        sink = DirectorySink(args.out)
+
+    written = {}
+    start = time.perf_counter()
+    for table, columns, lines in generator.tables():
+        sink.write(table, columns, lines)
+        written[table] = written.get(table, 0) + len(lines)
+        elapsed = time.perf_counter() - start
+        print(f"\r{table:<16} {written[table]:>10} rows   {sum(written.values()) / elapsed:>9.0f} rows/s", end='', flush=True)
+    print()
+    sink.finish()
+    elapsed = time.perf_counter() - start
+    if args.mysql:
+        conn.close()
+    for table, count in written.items():
+        print(f"{table:<16} {count:>10}")
+    print(f"{sum(written.values())} rows in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
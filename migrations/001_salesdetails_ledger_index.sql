@@ -0,0 +1,6 @@
+-- Composite index for keyset pagination of the employee sales ledger:
+-- pages walk (SALEDATE, SALEID) in index order, so any page costs the same
+-- as the first one. Already part of Project.sql for fresh installs.
+USE `pharmacy`;
+
+ALTER TABLE `salesdetails` ADD KEY `SALEDATE_SALEID` (`SALEDATE`,`SALEID`);
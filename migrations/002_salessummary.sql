@@ -0,0 +1,23 @@
+-- One pre-aggregated row per sale, written in the same transaction as its
+-- SALESDETAILS lines; the employee sales ledger reads from here. The INSERT
+-- backfills existing sales and matches `flask --app app rebuild-sales-summary`.
+USE `pharmacy`;
+
+CREATE TABLE `salessummary` (
+  `SALEID` int NOT NULL,
+  `SALEDATE` date NOT NULL,
+  `BRANCHID` int DEFAULT NULL,
+  `CUSTOMERID` int DEFAULT NULL,
+  `EMPLOYEEID` int DEFAULT NULL,
+  `PAYMENTMETHOD` varchar(100) DEFAULT NULL,
+  `LINECOUNT` int NOT NULL,
+  `GRANDTOTAL` decimal(12,2) NOT NULL,
+  PRIMARY KEY (`SALEID`),
+  KEY `SALEDATE_SALEID` (`SALEDATE`,`SALEID`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO `salessummary` (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PAYMENTMETHOD, LINECOUNT, GRANDTOTAL)
+SELECT SALEID, MIN(SALEDATE), MIN(BRANCHID), MIN(CUSTOMERID), MIN(EMPLOYEEID), MIN(PAYMENTMETHOD), COUNT(*), SUM(TOTALAMOUNT)
+FROM `salesdetails`
+WHERE SALEID IS NOT NULL
+GROUP BY SALEID;
@@ -0,0 +1,5 @@
+-- Index for the paged online orders feed, which walks ONLINEORDERS newest
+-- first by (ORDERDATE, ORDERID); InnoDB appends the primary key to the index.
+USE `pharmacy`;
+
+ALTER TABLE `onlineorders` ADD KEY `ORDERDATE` (`ORDERDATE`);
@@ -0,0 +1,6 @@
+-- Index for FEFO stock allocation: a sale locks only its branch's batches of
+-- the medicines it sells, already in expiry order, instead of every batch in
+-- the branch.
+USE `pharmacy`;
+
+ALTER TABLE `medicinestock` ADD KEY `BRANCHID_MEDICINEID_EXPIRYDATE` (`BRANCHID`,`MEDICINEID`,`EXPIRYDATE`);
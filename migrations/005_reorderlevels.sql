@@ -0,0 +1,13 @@
+-- Per-branch reorder levels for the stock alerts page. Medicines without a
+-- row here use LOW_STOCK_THRESHOLD from config.py.
+USE `pharmacy`;
+
+CREATE TABLE `reorderlevels` (
+  `MEDICINEID` int NOT NULL,
+  `BRANCHID` int NOT NULL,
+  `REORDERLEVEL` int NOT NULL,
+  PRIMARY KEY (`MEDICINEID`,`BRANCHID`),
+  KEY `BRANCHID` (`BRANCHID`),
+  CONSTRAINT `reorderlevels_ibfk_1` FOREIGN KEY (`MEDICINEID`) REFERENCES `medicines` (`MEDICINEID`) ON DELETE CASCADE,
+  CONSTRAINT `reorderlevels_ibfk_2` FOREIGN KEY (`BRANCHID`) REFERENCES `branches` (`BRANCHID`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,35 @@
+-- Daily sales rollups, upserted in the same transaction as the SALESDETAILS
+-- lines they summarise; the admin dashboard and the reorder planner read from
+-- here. Missing IDs are stored as 0 and a missing payment method as ''. The
+-- INSERTs backfill existing sales and match `flask --app app rebuild-sales-rollups`.
+USE `pharmacy`;
+
+CREATE TABLE `salesdailymedicine` (
+  `SALEDATE` date NOT NULL,
+  `BRANCHID` int NOT NULL,
+  `MEDICINEID` int NOT NULL,
+  `QUANTITY` int NOT NULL,
+  `REVENUE` decimal(14,2) NOT NULL,
+  `LINECOUNT` int NOT NULL,
+  PRIMARY KEY (`SALEDATE`,`BRANCHID`,`MEDICINEID`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `salesdailyemployee` (
+  `SALEDATE` date NOT NULL,
+  `BRANCHID` int NOT NULL,
+  `EMPLOYEEID` int NOT NULL,
+  `PAYMENTMETHOD` varchar(100) NOT NULL,
+  `REVENUE` decimal(14,2) NOT NULL,
+  `LINECOUNT` int NOT NULL,
+  PRIMARY KEY (`SALEDATE`,`BRANCHID`,`EMPLOYEEID`,`PAYMENTMETHOD`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO `salesdailymedicine` (SALEDATE, BRANCHID, MEDICINEID, QUANTITY, REVENUE, LINECOUNT)
+SELECT SALEDATE, COALESCE(BRANCHID, 0), COALESCE(MEDICINEID, 0), SUM(QUANTITY), SUM(TOTALAMOUNT), COUNT(*)
+FROM `salesdetails`
+GROUP BY SALEDATE, COALESCE(BRANCHID, 0), COALESCE(MEDICINEID, 0);
+
+INSERT INTO `salesdailyemployee` (SALEDATE, BRANCHID, EMPLOYEEID, PAYMENTMETHOD, REVENUE, LINECOUNT)
+SELECT SALEDATE, COALESCE(BRANCHID, 0), COALESCE(EMPLOYEEID, 0), COALESCE(PAYMENTMETHOD, ''), SUM(TOTALAMOUNT), COUNT(*)
+FROM `salesdetails`
+GROUP BY SALEDATE, COALESCE(BRANCHID, 0), COALESCE(EMPLOYEEID, 0), COALESCE(PAYMENTMETHOD, '');
@@ -0,0 +1,15 @@
+-- Sale number sequence for SaleIdAllocator: workers reserve blocks of SALEIDs
+-- from NEXTVALUE instead of reading MAX(SALEID) + 1 per sale. The INSERT
+-- starts the sequence after the highest SALEID already recorded. Already part
+-- of Project.sql for fresh installs.
+USE `pharmacy`;
+
+CREATE TABLE `salesequence` (
+  `NAME` varchar(50) NOT NULL,
+  `NEXTVALUE` int NOT NULL,
+  PRIMARY KEY (`NAME`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO `salesequence` (NAME, NEXTVALUE)
+SELECT 'SALEID', COALESCE(MAX(SALEID), 0) + 1
+FROM `salesdetails`;
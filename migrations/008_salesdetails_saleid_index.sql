@@ -0,0 +1,6 @@
+-- Index for looking up a sale's lines by SALEID (online checkout reads back the
+-- SALEDETAILIDs it just inserted). Already part of Project.sql for fresh
+-- installs.
+USE `pharmacy`;
+
+ALTER TABLE `salesdetails` ADD KEY `SALEID` (`SALEID`);
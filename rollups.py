@@ -0,0 +1,135 @@
+# Tables derived from SALESDETAILS: SALESSUMMARY (one row per sale) and the
+# daily rollups SALESDAILYMEDICINE and SALESDAILYEMPLOYEE. The sale path keeps
+# them current and the rebuild functions recompute them; app.py and
+# generate_data.py both use these, so this module imports nothing from the app.
+import datetime
+
+import mysql.connector
+
+from config import ROLLUP_REBUILD_CHUNK_DAYS
+
+
+# --- Sales Summary ---
+REBUILD_SALES_SUMMARY_QUERY = """
+    INSERT INTO SALESSUMMARY (SALEID, SALEDATE, BRANCHID, CUSTOMERID, EMPLOYEEID, PAYMENTMETHOD, LINECOUNT, GRANDTOTAL)
+    SELECT SALEID, MIN(SALEDATE), MIN(BRANCHID), MIN(CUSTOMERID), MIN(EMPLOYEEID), MIN(PAYMENTMETHOD), COUNT(*), SUM(TOTALAMOUNT)
+    FROM SALESDETAILS
+    WHERE SALEID IS NOT NULL
+    GROUP BY SALEID
+"""
+
+
+def rebuild_sales_summary(conn):
+    # Recomputes every SALESSUMMARY row from SALESDETAILS in one transaction,
+    # for backfilling or after SALESDETAILS was edited by hand.
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM SALESSUMMARY")
+        cursor.execute(REBUILD_SALES_SUMMARY_QUERY)
+        rebuilt = cursor.rowcount
+        conn.commit()
+        return rebuilt
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+# --- Sales Rollups ---
+# Daily totals kept beside SALESDETAILS so reports read one row per day and
+# (branch, medicine) or (branch, employee, payment method) instead of every
+# line. Missing IDs are stored as 0 and a missing payment method as '', since
+# both are part of the primary key.
+def upsert_sales_rollups(cursor, branch_id, employee_id, payment_method, lines):
+    # Two upsert-increment statements per sale, in the caller's transaction.
+    # Rows are touched in MEDICINEID order, the same order consume_stock locks
+    # batches in, so concurrent sales cannot deadlock on them.
+    per_medicine = {}
+    for line in lines:
+        quantity, revenue, count = per_medicine.get(line['MEDICINEID'], (0, 0, 0))
+        per_medicine[line['MEDICINEID']] = (quantity + line['quantity'], revenue + line['subtotal'], count + 1)
+    values = []
+    for medicine_id in sorted(per_medicine):
+        values.extend((branch_id or 0, medicine_id or 0, *per_medicine[medicine_id]))
+    placeholders = ', '.join(['(CURDATE(), %s, %s, %s, %s, %s)'] * len(per_medicine))
+    cursor.execute(f"""
+        INSERT INTO SALESDAILYMEDICINE (SALEDATE, BRANCHID, MEDICINEID, QUANTITY, REVENUE, LINECOUNT)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE QUANTITY = QUANTITY + VALUES(QUANTITY), REVENUE = REVENUE + VALUES(REVENUE),
+                                LINECOUNT = LINECOUNT + VALUES(LINECOUNT)
+    """, values)
+    cursor.execute("""
+        INSERT INTO SALESDAILYEMPLOYEE (SALEDATE, BRANCHID, EMPLOYEEID, PAYMENTMETHOD, REVENUE, LINECOUNT)
+        VALUES (CURDATE(), %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE REVENUE = REVENUE + VALUES(REVENUE), LINECOUNT = LINECOUNT + VALUES(LINECOUNT)
+    """, (branch_id or 0, employee_id or 0, payment_method or '', sum(line['subtotal'] for line in lines), len(lines)))
+
+
+REBUILD_ROLLUP_QUERIES = (
+    """
+    INSERT INTO SALESDAILYMEDICINE (SALEDATE, BRANCHID, MEDICINEID, QUANTITY, REVENUE, LINECOUNT)
+    SELECT SALEDATE, COALESCE(BRANCHID, 0), COALESCE(MEDICINEID, 0), SUM(QUANTITY), SUM(TOTALAMOUNT), COUNT(*)
+    FROM SALESDETAILS
+    WHERE SALEDATE BETWEEN %s AND %s
+    GROUP BY SALEDATE, COALESCE(BRANCHID, 0), COALESCE(MEDICINEID, 0)
+    """,
+    """
+    INSERT INTO SALESDAILYEMPLOYEE (SALEDATE, BRANCHID, EMPLOYEEID, PAYMENTMETHOD, REVENUE, LINECOUNT)
+    SELECT SALEDATE, COALESCE(BRANCHID, 0), COALESCE(EMPLOYEEID, 0), COALESCE(PAYMENTMETHOD, ''), SUM(TOTALAMOUNT), COUNT(*)
+    FROM SALESDETAILS
+    WHERE SALEDATE BETWEEN %s AND %s
+    GROUP BY SALEDATE, COALESCE(BRANCHID, 0), COALESCE(EMPLOYEEID, 0), COALESCE(PAYMENTMETHOD, '')
+    """,
+)
+
+
+ROLLUP_VERSION_QUERY = """
+    INSERT INTO SALESEQUENCE (NAME, NEXTVALUE) VALUES ('ROLLUPS', 1)
+    ON DUPLICATE KEY UPDATE NEXTVALUE = NEXTVALUE + 1
+"""
+
+
+def rebuild_sales_rollups(conn, chunk_days=ROLLUP_REBUILD_CHUNK_DAYS, progress=None, today=None):
+    # Recomputes both rollups from SALESDETAILS up to yesterday, chunk_days at
+    # a time, each chunk deleting and re-inserting its dates in its own
+    # transaction. Today's rows are left alone: sales upsert them concurrently
+    # and TiDB's optimistic locking would not serialise a rebuild against
+    # them, so a first-of-day upsert could hit a duplicate key or be counted
+    # twice. Past days are never written by sales, so the rebuild can run
+    # while the shop is open; run it after midnight to cover a day in full.
+    today = today or datetime.date.today()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT MIN(d), MAX(d) FROM (
+                SELECT MIN(SALEDATE) AS d FROM SALESDETAILS UNION ALL SELECT MAX(SALEDATE) FROM SALESDETAILS
+                UNION ALL SELECT MIN(SALEDATE) FROM SALESDAILYMEDICINE UNION ALL SELECT MAX(SALEDATE) FROM SALESDAILYMEDICINE
+                UNION ALL SELECT MIN(SALEDATE) FROM SALESDAILYEMPLOYEE UNION ALL SELECT MAX(SALEDATE) FROM SALESDAILYEMPLOYEE
+            ) bounds
+        """)
+        first, last = cursor.fetchone()
+        conn.commit()
+        if last is not None:
+            last = min(last, today - datetime.timedelta(days=1))
+        days = 0
+        while first is not None and first <= last:
+            chunk_end = min(first + datetime.timedelta(days=chunk_days - 1), last)
+            try:
+                cursor.execute("DELETE FROM SALESDAILYMEDICINE WHERE SALEDATE BETWEEN %s AND %s", (first, chunk_end))
+                cursor.execute("DELETE FROM SALESDAILYEMPLOYEE WHERE SALEDATE BETWEEN %s AND %s", (first, chunk_end))
+                for query in REBUILD_ROLLUP_QUERIES:
+                    cursor.execute(query, (first, chunk_end))
+                # Retires the report caches on every worker.
+                cursor.execute(ROLLUP_VERSION_QUERY)
+                conn.commit()
+            except mysql.connector.Error:
+                conn.rollback()
+                raise
+            days += (chunk_end - first).days + 1
+            if progress:
+                progress(first, chunk_end)
+            first = chunk_end + datetime.timedelta(days=1)
+        return days
+    finally:
+        cursor.close()
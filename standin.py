@@ -0,0 +1,25 @@
+# Connection options for the scripts that write scratch or synthetic rows
+# (bench_stock.py, bench_routes.py, generate_data.py --mysql). They only ever
+# talk to a local stand-in named on the command line and refuse the database
+# in config.py.
+from config import db_config
+
+
+def add_arguments(parser):
+    group = parser.add_argument_group('stand-in database')
+    group.add_argument('--host', help='stand-in MySQL server (required; never the host in config.py)')
+    group.add_argument('--port', type=int, default=3306)
+    group.add_argument('--user', default='root')
+    group.add_argument('--password', default='')
+    group.add_argument('--database', help='database on the stand-in (required)')
+
+
+def connection_config(parser, args):
+    # Returns mysql.connector.connect() arguments, or exits through
+    # parser.error() when the target is missing or is the configured database.
+    if not args.host or not args.database:
+        parser.error('--host and --database are required: point this at a local stand-in database')
+    if args.host.lower() == db_config['host'].lower():
+        parser.error(f"{args.host} is the database in config.py; use a local stand-in")
+    return {'host': args.host, 'port': args.port, 'user': args.user, 'password': args.password,
+            'database': args.database}
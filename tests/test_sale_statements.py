@@ -0,0 +1,175 @@
+# Pins the counter sale (employee_add_sale) and online checkout (cart_details)
+# routes to a fixed number of database statements, whatever the number of
+# lines. The routes run through the Flask test client on a recording
+# connection that answers each statement the way MySQL would.
+import decimal
+
+import pytest
+
+import app as pharmacy
+
+
+class RecordingCursor:
+    def __init__(self, conn, dictionary):
+        self.conn = conn
+        self.dictionary = dictionary
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        params = list(params or ())
+        self.conn.statements.append(query)
+        self.conn.params.append(params)
+        self._rows, self.rowcount = [], 1
+        if query.startswith('SELECT BRANCHID FROM EMPLOYEES'):
+            self._rows = [{'BRANCHID': 1}]
+        elif query.startswith('SELECT MEDICINEID, PRICE FROM MEDICINES'):
+            self._rows = [{'MEDICINEID': i, 'PRICE': self.conn.price} for i in params]
+        elif query.startswith('SELECT MEDICINEID, MEDICINENAME, PRICE FROM MEDICINES'):
+            self._rows = [{'MEDICINEID': i, 'MEDICINENAME': f'Medicine {i}', 'PRICE': self.conn.price}
+                          for i in params]
+        elif query.startswith('SELECT LAST_INSERT_ID()'):
+            self._rows = [(self.conn.sale_id_end,)]
+        elif query.startswith('SELECT STOCKID, MEDICINEID, QUANTITY'):
+            self._rows = [(medicine_id, medicine_id, self.conn.stock) for medicine_id in params[1:] if self.conn.stock]
+        elif query.startswith('UPDATE MEDICINESTOCK'):
+            # CASE params, the STOCKID IN list, then the CASE params again.
+            self.rowcount = len(params) // 5
+        elif query.startswith('INSERT INTO SALESDETAILS'):
+            self.rowcount = query.count('CURDATE()')
+            self.lastrowid = self.conn.next_detail_id
+            self.conn.detail_ids = list(range(self.lastrowid, self.lastrowid + self.rowcount))
+            self.conn.next_detail_id += self.rowcount
+        elif query.startswith('SELECT SALEDETAILID'):
+            self._rows = [(detail_id,) for detail_id in self.conn.detail_ids]
+        elif query.startswith(('SELECT CUSTOMERID, CUSTOMERNAME FROM CUSTOMERS', 'SELECT MEDICINEID, MEDICINENAME FROM MEDICINES')):
+            self._rows = []  # The sale form's pick lists, when it is shown again.
+        elif query.startswith('SELECT'):
+            raise AssertionError(f'Unexpected query: {query}')
+        if self.dictionary and self._rows and not isinstance(self._rows[0], dict):
+            raise AssertionError(f'Tuple rows asked for on a dictionary cursor: {query}')
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements = []
+        self.params = []
+        self.price = decimal.Decimal('1.20')
+        self.stock = 1000
+        self.sale_id_end = 101
+        self.next_detail_id = 1
+        self.detail_ids = []
+
+    def cursor(self, dictionary=False, **kwargs):
+        return RecordingCursor(self, dictionary)
+
+    def commit(self):
+        self.statements.append('COMMIT')
+        self.params.append(None)
+
+    def rollback(self):
+        self.statements.append('ROLLBACK')
+        self.params.append(None)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = RecordingConnection()
+    monkeypatch.setattr(pharmacy, 'get_db_connection', lambda: conn)
+    # A block of one reserves on every sale, so each request pays the same.
+    monkeypatch.setattr(pharmacy, 'sale_ids', pharmacy.SaleIdAllocator(1))
+    monkeypatch.setattr(pharmacy, 'cart_pricer', pharmacy.CartPricer(16, 30))
+    monkeypatch.setattr(pharmacy, '_cart_store', pharmacy.MemoryCartStore(16))
+    return conn
+
+
+def logged_in(role, user_id):
+    client = pharmacy.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+        sess['role'] = role
+    return client
+
+
+def counter_sale_statements(conn, lines):
+    client = logged_in('employee', 176519)
+    form = {'customerid': '191131', 'payment': 'Cash'}
+    for i in range(lines):
+        form[f'medicineid_{i}'] = str(i + 1)
+        form[f'quantity_{i}'] = '2'
+    conn.statements.clear()
+    response = client.post('/employee/add-sale', data=form)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/employee/sales')
+    assert conn.statements[-1] == 'COMMIT'
+    return len(conn.statements)
+
+
+def checkout_statements(conn, lines):
+    client = logged_in('customer', 191131)
+    for i in range(lines):
+        pharmacy.get_cart_store().add(191131, i + 1, 2)
+    conn.statements.clear()
+    response = client.post('/customer/cart', data={'address': 'Uttor Badda', 'payment': 'COD'})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/customer/previous-orders')
+    assert conn.statements[-1] == 'COMMIT'
+    return len(conn.statements)
+
+
+@pytest.mark.parametrize('count_statements', [counter_sale_statements, checkout_statements])
+def test_statement_count_does_not_grow_with_lines(conn, count_statements):
+    counts = {lines: count_statements(conn, lines) for lines in (1, 5, 50)}
+    assert len(set(counts.values())) == 1, counts
+
+
+@pytest.mark.parametrize('enforced', [True, False])
+def test_sale_without_stock_on_file(conn, monkeypatch, enforced):
+    # With STOCK_ENFORCED off, a branch that never recorded its stock still sells.
+    monkeypatch.setattr(pharmacy, 'STOCK_ENFORCED', enforced)
+    conn.stock = 0
+    client = logged_in('employee', 176519)
+    response = client.post('/employee/add-sale', data={'customerid': '191131', 'payment': 'Cash',
+                                                       'medicineid_0': '1', 'quantity_0': '2'})
+    assert response.status_code == (200 if enforced else 302)
+    assert any(query.startswith('INSERT INTO SALESDETAILS') for query in conn.statements) is not enforced
+    assert not any(query.startswith('UPDATE MEDICINESTOCK') for query in conn.statements)
+    assert next(query for query in reversed(conn.statements) if query in ('COMMIT', 'ROLLBACK')) == \
+        ('ROLLBACK' if enforced else 'COMMIT')
+
+
+def test_checkout_refuses_prices_the_customer_was_not_shown(conn):
+    # The cart was priced (and memoised) at 1.20; the price has since changed
+    # on another worker, which this worker's price cache cannot see.
+    client = logged_in('customer', 191131)
+    pharmacy.get_cart_store().add(191131, 7, 3)
+    assert client.get('/customer/cart').status_code == 200
+    conn.price = decimal.Decimal('2.50')
+    form = {'address': 'Uttor Badda', 'payment': 'COD'}
+    response = client.post('/customer/cart', data=form)
+    assert response.status_code == 200
+    assert b'Prices in your cart have changed' in response.data
+    assert '7.50' in response.get_data(as_text=True)
+    assert conn.statements[-1] == 'ROLLBACK'
+    assert not any(query.startswith('INSERT INTO SALESDETAILS') for query in conn.statements)
+
+    # Placing the order again, now that the new total was shown, charges it.
+    response = client.post('/customer/cart', data=form)
+    assert response.status_code == 302
+    params = conn.params[next(i for i, query in enumerate(conn.statements) if query.startswith('INSERT INTO SALESDETAILS'))]
+    # (SALEID, BRANCHID, CUSTOMERID, EMPLOYEEID, PRICEPERUNIT, TOTALAMOUNT, ...)
+    assert params[4:6] == [decimal.Decimal('2.50'), decimal.Decimal('7.50')]
@@ -0,0 +1,72 @@
+# When SalesReportCache serves a cached report and when it recomputes one.
+# load_sales is replaced by a counter, so only the watermark query reaches the
+# fake connection.
+import datetime
+
+import pytest
+
+import analytics
+
+DATE_FROM, DATE_TO = datetime.date(2026, 10, 1), datetime.date(2026, 10, 18)
+
+
+class WatermarkCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=()):
+        assert 'MAX(SALEDETAILID)' in query and "NAME = 'ROLLUPS'" in query
+
+    def fetchone(self):
+        return (self.conn.max_detail_id, self.conn.rollup_version)
+
+    def close(self):
+        pass
+
+
+class WatermarkConnection:
+    def __init__(self):
+        self.max_detail_id = 100
+        self.rollup_version = 1
+
+    def cursor(self):
+        return WatermarkCursor(self)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loads = []
+    monkeypatch.setattr(analytics, 'load_sales', lambda conn, date_from, date_to: loads.append(1) or {})
+    monkeypatch.setattr(analytics, 'compute_report', lambda columns, name, top_n: len(loads))
+    return loads
+
+
+def test_cached_until_watermark_moves(loads):
+    conn, cache = WatermarkConnection(), analytics.SalesReportCache(8, 10, ttl=60)
+    cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO)
+    cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO)
+    assert len(loads) == 1
+    conn.max_detail_id += 1
+    cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO)
+    assert len(loads) == 2
+
+
+def test_rollup_rebuild_retires_entries(loads):
+    conn, cache = WatermarkConnection(), analytics.SalesReportCache(8, 10, ttl=60)
+    cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO)
+    conn.rollup_version += 1
+    cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO)
+    assert len(loads) == 2
+
+
+def test_entries_expire_when_the_watermark_does_not_move(loads, monkeypatch):
+    # A sale committed below MAX(SALEDETAILID) leaves the watermark as it was.
+    clock = [1000.0]
+    monkeypatch.setattr(analytics.time, 'monotonic', lambda: clock[0])
+    conn, cache = WatermarkConnection(), analytics.SalesReportCache(8, 10, ttl=60)
+    cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO)
+    clock[0] += 59
+    cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO)
+    assert len(loads) == 1
+    clock[0] += 2
+    assert cache.reports(conn, ['branch_revenue'], DATE_FROM, DATE_TO) == {'branch_revenue': 2}